@@ -0,0 +1,378 @@
+# db_connection.py
+"""
+Database Connection Module
+Shared SQLite connection manager used by the publication and sequence databases.
+Keeps one long-lived connection per thread instead of reconnecting on every call.
+"""
+
+import sqlite3
+import threading
+import atexit
+import os
+import time
+from contextlib import contextmanager
+
+
+# PRAGMAs applied to every new connection (can be overridden per database)
+DEFAULT_PRAGMAS = {
+    "foreign_keys": "ON",
+    "cache_size": -8000,      # negative value = size in KiB (~8 MB page cache)
+    "temp_store": "MEMORY",
+}
+
+# Opt-in write-ahead logging: readers keep going while one writer commits.
+# Any key can be overridden through the pragmas argument.
+WAL_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",       # safe in WAL mode, fsync only at checkpoints
+    "busy_timeout": 5000,          # ms to wait for the write lock
+    "wal_autocheckpoint": 1000,    # pages before an automatic PASSIVE checkpoint
+}
+
+CHECKPOINT_MODES = ("PASSIVE", "FULL", "RESTART", "TRUNCATE")
+
+# Turns WAL on for databases opened without an explicit wal argument (the
+# GUIs), e.g. BIOTOOLS_DB_WAL=1 on a workstation whose database is local
+WAL_ENV_VAR = "BIOTOOLS_DB_WAL"
+
+# Filesystems WAL must not be used on: it keeps its index in shared memory,
+# which only works between processes on the same host
+_NETWORK_FILESYSTEMS = ("nfs", "nfs4", "cifs", "smb3", "smbfs", "afs", "9p", "fuse.sshfs",
+                        "davfs", "fuse.glusterfs", "ceph", "lustre")
+
+
+def wal_from_environment():
+    """True if WAL_ENV_VAR asks for WAL mode"""
+    return os.environ.get(WAL_ENV_VAR, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def is_network_path(db_path):
+    """
+    True if a database file lives on a network filesystem
+
+    Recognizes UNC paths and network drives on Windows and NFS/SMB/sshfs
+    (and WSL 9p) mounts on Linux; anything else counts as local.
+    """
+    path = os.path.abspath(db_path)
+    if os.name == "nt":
+        if path.startswith("\\\\"):
+            return True
+        try:
+            import ctypes
+            drive = os.path.splitdrive(path)[0] + "\\"
+            return ctypes.windll.kernel32.GetDriveTypeW(drive) == 4  # DRIVE_REMOTE
+        except (AttributeError, OSError):
+            return False
+
+    try:
+        with open("/proc/mounts") as mounts:
+            entries = [line.split()[1:3] for line in mounts]
+    except OSError:
+        return False
+
+    directory = os.path.dirname(os.path.realpath(path))
+    best_mount, fs_type = "", ""
+    for mount_point, mount_type in entries:
+        mount_point = mount_point.replace("\\040", " ")
+        inside = directory == mount_point or directory.startswith(mount_point.rstrip("/") + "/")
+        if inside and len(mount_point) > len(best_mount):
+            best_mount, fs_type = mount_point, mount_type
+    return fs_type in _NETWORK_FILESYSTEMS
+
+
+class ConnectionManager:
+    """
+    Pool of long-lived SQLite connections for a single database file.
+
+    Every thread gets its own connection (sqlite3 connections must not be used
+    from several threads at once). Connections are created lazily, configured
+    with the PRAGMAs once, and reused until close_all() is called.
+
+    WAL mode only works when every process using the file runs on the same
+    host: a database shared by several workstations over a network drive
+    must keep the rollback journal, so WAL is refused for network paths.
+    """
+
+    _managers = {}
+    _managers_lock = threading.Lock()
+
+    @classmethod
+    def for_path(cls, db_path, pragmas=None, timeout=5.0, wal=None):
+        """
+        Get the shared manager for a database file, creating it if needed
+
+        Args:
+            db_path (str): Path to SQLite database file
+            pragmas (dict): Extra PRAGMAs
+            timeout (float): Seconds to wait for a locked database
+            wal (bool): Use WAL journal mode (None = WAL_ENV_VAR decides)
+
+        Raises:
+            ValueError: The file is already open with other wal/pragmas settings
+        """
+        key = os.path.abspath(db_path)
+        with cls._managers_lock:
+            manager = cls._managers.get(key)
+            if manager is None or manager.closed:
+                manager = cls(db_path, pragmas=pragmas, timeout=timeout, wal=wal)
+                cls._managers[key] = manager
+            elif (manager.wal, manager.pragmas) != cls.resolve_settings(db_path, pragmas, wal)[:2]:
+                raise ValueError(f"{db_path} is already open with other settings "
+                                 f"(wal={manager.wal}, pragmas={manager.pragmas})")
+            return manager
+
+    @staticmethod
+    def resolve_settings(db_path, pragmas=None, wal=None):
+        """
+        Settings a manager opened with these arguments uses
+
+        Returns:
+            tuple: (wal, pragmas, refused) - refused is True when WAL was
+                   asked for but the file is on a network filesystem
+        """
+        if wal is None:
+            wal = wal_from_environment()
+        network = is_network_path(db_path)
+        settings = dict(DEFAULT_PRAGMAS)
+        if wal and not network:
+            settings.update(WAL_PRAGMAS)
+        if pragmas:
+            settings.update(pragmas)
+        if network:
+            # A file switched to WAL elsewhere stays in WAL until changed back
+            settings["journal_mode"] = "DELETE"
+        return wal and not network, settings, wal and network
+
+    @classmethod
+    def close_all_managers(cls):
+        """Close every pooled connection of every database (called at exit)"""
+        with cls._managers_lock:
+            managers = list(cls._managers.values())
+            cls._managers.clear()
+        for manager in managers:
+            manager.close_all()
+
+    def __init__(self, db_path, pragmas=None, timeout=5.0, wal=None):
+        """
+        Initialize connection manager
+
+        Args:
+            db_path (str): Path to SQLite database file
+            pragmas (dict): PRAGMA name -> value, merged over DEFAULT_PRAGMAS
+            timeout (float): Seconds to wait for a locked database
+            wal (bool): Merge WAL_PRAGMAS before the custom pragmas
+                        (None = WAL_ENV_VAR decides; never on network paths)
+        """
+        self.db_path = db_path
+        self.timeout = timeout
+        self.wal, self.pragmas, refused = self.resolve_settings(db_path, pragmas, wal)
+        if refused:
+            print(f"✗ Not using WAL for {db_path}: it is on a network filesystem, "
+                  f"where WAL is not safe; using the rollback journal")
+
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def get_connection(self):
+        """Get the connection owned by the calling thread"""
+        if self.closed:
+            raise sqlite3.ProgrammingError(f"Connection manager for {self.db_path} is closed")
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+            self._apply_pragmas(conn)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _apply_pragmas(self, conn):
+        """Apply configured PRAGMAs to a freshly opened connection"""
+        for name, value in self.pragmas.items():
+            if not str(name).replace("_", "").isalnum():
+                print(f"✗ Ignoring invalid PRAGMA name: {name}")
+                continue
+            try:
+                conn.execute(f"PRAGMA {name} = {value}")
+            except sqlite3.Error as e:
+                print(f"✗ Could not apply PRAGMA {name}={value}: {e}")
+
+    @contextmanager
+    def transaction(self):
+        """Run a block inside a transaction on the thread's connection"""
+        conn = self.get_connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def journal_mode(self):
+        """Return the journal mode actually in effect (e.g. 'wal' or 'delete')"""
+        return self.get_connection().execute("PRAGMA journal_mode").fetchone()[0]
+
+    def checkpoint(self, mode="PASSIVE"):
+        """
+        Copy WAL frames back into the main database file
+
+        Args:
+            mode (str): One of CHECKPOINT_MODES; TRUNCATE also resets the WAL file
+
+        Returns:
+            tuple: (busy, wal_pages, checkpointed_pages) or None if not in WAL mode
+        """
+        mode = mode.upper()
+        if mode not in CHECKPOINT_MODES:
+            raise ValueError(f"Unknown checkpoint mode: {mode}")
+        if self.journal_mode() != "wal":
+            return None
+
+        result = self.get_connection().execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        print(f"✓ WAL checkpoint ({mode}) on {self.db_path}: {result}")
+        return tuple(result)
+
+    def compact(self):
+        """
+        Checkpoint and truncate the WAL, then VACUUM to reclaim free pages
+
+        Returns:
+            tuple: (size_before, size_after) of the database file in bytes
+        """
+        size_before = self._file_size()
+        conn = self.get_connection()
+        conn.commit()
+        self.checkpoint("TRUNCATE")
+        conn.execute("VACUUM")
+        self.checkpoint("TRUNCATE")
+        size_after = self._file_size()
+        print(f"✓ Compacted {self.db_path}: {size_before} -> {size_after} bytes")
+        return size_before, size_after
+
+    def _file_size(self):
+        """Size of the database file plus its WAL, in bytes"""
+        total = 0
+        for path in (self.db_path, self.db_path + "-wal"):
+            if os.path.exists(path):
+                total += os.path.getsize(path)
+        return total
+
+    def close_thread_connection(self):
+        """Close the calling thread's connection (e.g. when a worker exits)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+
+    def close_all(self):
+        """Close every connection opened by this manager"""
+        with self._lock:
+            connections = self._connections
+            self._connections = []
+            self.closed = True
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                print(f"✗ Error closing connection: {e}")
+        self._local = threading.local()
+
+
+atexit.register(ConnectionManager.close_all_managers)
+
+
+def _stress_writer(db_path, rows, batch_size):
+    """Bulk-insert rows in batches (runs in its own process)"""
+    manager = ConnectionManager(db_path, wal=True)
+    payload = "x" * 200
+    for start in range(0, rows, batch_size):
+        with manager.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO stress (payload) VALUES (?)",
+                [(payload,) for _ in range(min(batch_size, rows - start))]
+            )
+    manager.close_all()
+
+
+def _stress_reader(db_path, stop_event, results):
+    """Count rows in a loop and record the slowest read (runs in its own process)"""
+    manager = ConnectionManager(db_path, wal=True)
+    conn = manager.get_connection()
+    reads = 0
+    errors = 0
+    worst = 0.0
+    while not stop_event.is_set():
+        started = time.perf_counter()
+        try:
+            conn.execute("SELECT COUNT(*) FROM stress").fetchone()
+            reads += 1
+        except sqlite3.OperationalError:
+            errors += 1
+        worst = max(worst, time.perf_counter() - started)
+    results.put((reads, errors, worst))
+    manager.close_all()
+
+
+def run_wal_stress_test(db_path="wal_stress.db", readers=4, rows=200000, batch_size=2000):
+    """
+    Multi-process stress test: one process bulk-inserts while several
+    processes keep reading. In WAL mode readers should never see
+    'database is locked' and their worst-case latency should stay small.
+    """
+    import multiprocessing
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    setup = ConnectionManager(db_path, wal=True)
+    with setup.transaction() as conn:
+        conn.execute("CREATE TABLE stress (id INTEGER PRIMARY KEY, payload TEXT)")
+    print(f"Journal mode: {setup.journal_mode()}")
+
+    stop_event = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    reader_procs = [
+        multiprocessing.Process(target=_stress_reader, args=(db_path, stop_event, results))
+        for _ in range(readers)
+    ]
+    for proc in reader_procs:
+        proc.start()
+
+    started = time.perf_counter()
+    writer = multiprocessing.Process(target=_stress_writer, args=(db_path, rows, batch_size))
+    writer.start()
+    writer.join()
+    write_time = time.perf_counter() - started
+
+    stop_event.set()
+    stats = [results.get() for _ in reader_procs]
+    for proc in reader_procs:
+        proc.join()
+
+    total_reads = sum(s[0] for s in stats)
+    total_errors = sum(s[1] for s in stats)
+    worst = max(s[2] for s in stats)
+    print(f"Inserted {rows} rows in {write_time:.2f}s")
+    print(f"{readers} readers completed {total_reads} reads during the insert, "
+          f"{total_errors} lock errors, worst read {worst * 1000:.1f} ms")
+
+    setup.compact()
+    setup.close_all()
+    return total_reads, total_errors, worst
+
+
+# Run the WAL stress test if run directly
+if __name__ == "__main__":
+    reads, errors, _ = run_wal_stress_test()
+    if reads > 0 and errors == 0:
+        print("\n✓ Test passed! Readers kept going during bulk inserts")
+    else:
+        print("\n✗ Test failed! Readers were blocked by the writer")
@@ -0,0 +1,186 @@
+# pdf_text_index.py
+"""
+PDF Text Index Module
+Extracts page text from stored PDFs with PyMuPDF in a background thread and
+keeps a page-level FTS5 index so "PDF Search" can return
+(publication, page, snippet) hits.
+"""
+
+import sqlite3
+import threading
+import queue
+
+try:
+    import fitz  # PyMuPDF
+    FITZ_AVAILABLE = True
+except ImportError:
+    FITZ_AVAILABLE = False
+    print("Warning: PyMuPDF not available, PDF text will not be indexed")
+
+
+# Page rows get rowid = document_id * PAGE_ROWID_STRIDE + page_number, so the
+# pages of one document are a rowid range (document_id is UNINDEXED in FTS5
+# and cannot be looked up without scanning the whole index)
+PAGE_ROWID_STRIDE = 1 << 20
+
+
+def page_rowid_range(document_id):
+    """(first, last) rowid of the page rows of a document"""
+    first = document_id * PAGE_ROWID_STRIDE
+    return first, first + PAGE_ROWID_STRIDE - 1
+
+
+def init_schema(cursor):
+    """
+    Create the page text index and its bookkeeping table
+
+    Pages are indexed per document (PDFs are content-addressed), so a PDF
+    attached to several publications is extracted only once. Rows are removed
+    by trigger when the last reference to a document is released.
+    """
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS document_pages_fts USING fts5(
+            text,
+            document_id UNINDEXED,
+            page_number UNINDEXED,
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS document_text_status (
+            document_id INTEGER PRIMARY KEY,
+            page_count INTEGER,
+            error TEXT
+        )
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS documents_text_cleanup AFTER DELETE ON documents BEGIN
+            DELETE FROM document_pages_fts
+            WHERE rowid BETWEEN old.id * {PAGE_ROWID_STRIDE} AND old.id * {PAGE_ROWID_STRIDE} + {PAGE_ROWID_STRIDE - 1};
+            DELETE FROM document_text_status WHERE document_id = old.id;
+        END
+    ''')
+
+
+class PDFTextIndexer:
+    """
+    Background worker that fills document_pages_fts.
+
+    Call start() once; it queues every document that has not been indexed yet
+    and then processes documents passed to enqueue() as PDFs are added.
+    """
+
+    def __init__(self, db):
+        """
+        Initialize the indexer
+
+        Args:
+            db: PublicationDatabase whose documents should be indexed
+        """
+        self.db = db
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def available(self):
+        """True if PDFs can be indexed (PyMuPDF installed and FTS5 compiled in)"""
+        return FITZ_AVAILABLE and self.db.fts_enabled
+
+    def start(self):
+        """Start the worker thread and queue all unindexed documents"""
+        if not self.available or (self._thread and self._thread.is_alive()):
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="pdf-text-indexer", daemon=True)
+        self._thread.start()
+
+        cursor = self.db.connections.get_connection().cursor()
+        cursor.execute('''
+            SELECT id FROM documents
+            WHERE id NOT IN (SELECT document_id FROM document_text_status)
+        ''')
+        pending = [row[0] for row in cursor.fetchall()]
+        for document_id in pending:
+            self.enqueue(document_id)
+        if pending:
+            print(f"PDF indexer: {len(pending)} document(s) queued for text extraction")
+
+    def enqueue(self, document_id):
+        """Queue a document for (re)indexing"""
+        if document_id is not None and self.available:
+            self._queue.put(document_id)
+
+    def stop(self, wait=True):
+        """Stop the worker after the current document"""
+        self._stop.set()
+        self._queue.put(None)
+        if wait and self._thread:
+            self._thread.join()
+
+    def _run(self):
+        """Worker loop"""
+        try:
+            while not self._stop.is_set():
+                document_id = self._queue.get()
+                try:
+                    if document_id is not None:
+                        self.index_document(document_id)
+                finally:
+                    self._queue.task_done()
+        finally:
+            self.db.connections.close_thread_connection()
+
+    def index_document(self, document_id):
+        """Extract and index the text of every page of one document"""
+        with self.db.connections.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT 1 FROM document_text_status WHERE document_id = ?', (document_id,))
+            if cursor.fetchone():
+                return
+            data = self.db.documents.get_data(cursor, document_id)
+
+        if data is None:
+            return
+
+        pages = []
+        error = None
+        try:
+            with fitz.open(stream=data, filetype="pdf") as doc:
+                first_rowid = page_rowid_range(document_id)[0]
+                for page_number, page in enumerate(doc, 1):
+                    if page_number >= PAGE_ROWID_STRIDE:
+                        break
+                    text = page.get_text()
+                    if text.strip():
+                        pages.append((first_rowid + page_number, text, document_id, page_number))
+                page_count = len(doc)
+        except Exception as e:
+            error = str(e)
+            page_count = 0
+        del data
+
+        try:
+            with self.db.connections.transaction() as conn:
+                cursor = conn.cursor()
+                # The document may have been deleted while we were extracting
+                cursor.execute('SELECT 1 FROM documents WHERE id = ?', (document_id,))
+                if not cursor.fetchone():
+                    return
+                cursor.execute('DELETE FROM document_pages_fts WHERE rowid BETWEEN ? AND ?',
+                               page_rowid_range(document_id))
+                cursor.executemany(
+                    'INSERT INTO document_pages_fts (rowid, text, document_id, page_number) VALUES (?, ?, ?, ?)',
+                    pages
+                )
+                cursor.execute(
+                    'INSERT OR REPLACE INTO document_text_status (document_id, page_count, error) VALUES (?, ?, ?)',
+                    (document_id, page_count, error)
+                )
+            if error:
+                print(f"✗ PDF indexer: could not read document {document_id}: {error}")
+            else:
+                print(f"✓ PDF indexer: indexed {len(pages)} page(s) of document {document_id}")
+        except sqlite3.Error as e:
+            print(f"✗ PDF indexer: database error for document {document_id}: {e}")
@@ -27,6 +27,9 @@ except ImportError:
         print("Warning: PublicationDatabase module not found.")
         DB_AVAILABLE = False
 
+from virtual_list import VirtualResultsList
+from query_executor import QueryExecutor
+
 
 class PublicationDatabaseGUI(tk.Frame):
     def __init__(self, parent, main_app=None):
@@ -44,9 +47,15 @@ class PublicationDatabaseGUI(tk.Frame):
         # Initialize database
         if DB_AVAILABLE:
             self.db = PublicationDatabase()
+            # Extract PDF text in the background for the "PDF Search" mode
+            self.db.start_pdf_indexing()
         else:
             self.db = None
 
+        # Database calls run on a worker thread so the window keeps repainting
+        self.busy_label = None
+        self.executor = QueryExecutor(self, on_busy=self.set_busy)
+
         self.back_button_image = None
         self.load_back_button_image()
 
@@ -344,6 +353,16 @@ class PublicationDatabaseGUI(tk.Frame):
 
         self.search_entry.bind("<Return>", lambda e: self.perform_search())
 
+        # Busy indicator shown while a query runs in the background
+        self.busy_label = tk.Label(
+            self.main_view_container,
+            text="",
+            font=("Arial", 9, "italic"),
+            fg="#FFD54F",
+            bg="#305CDE"
+        )
+        self.busy_label.pack(anchor="e", padx=60)
+
         # Show All Publications button
         show_all_button = tk.Button(
             self.main_view_container,
@@ -818,7 +837,8 @@ class PublicationDatabaseGUI(tk.Frame):
         # Save to database
         if self.db:
             try:
-                pub = self.db.add_publication(
+                self.executor.submit(
+                    self.db.add_publication,
                     authors=authors if authors else None,
                     publication_year=int(publication_year) if publication_year else None,
                     article_title=article_title if article_title else None,
@@ -828,22 +848,31 @@ class PublicationDatabaseGUI(tk.Frame):
                     page_range=page_range if page_range else None,
                     abstract=abstract if abstract else None,
                     pdf_data=self.current_pdf_data,
-                    pdf_filename=self.current_pdf_filename
-                )
-                messagebox.showinfo(
-                    "Success",
-                    f"Publication submitted successfully!\n\n"
-                    f"ID: {pub['id']}\n"
-                    f"Title: {article_title if article_title else 'No title'}\n"
-                    f"PDF: {'Yes' if self.current_pdf_data else 'No'}"
+                    pdf_filename=self.current_pdf_filename,
+                    on_done=lambda pub: self.on_publication_saved(pub, article_title),
+                    on_error=lambda e: messagebox.showerror("Error", f"Failed to save publication:\n{str(e)}")
                 )
-                self.clear_form()
-                self.navigate_to("main_view")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save publication:\n{str(e)}")
         else:
             messagebox.showerror("Error", "Database not available")
 
+    def on_publication_saved(self, pub, article_title):
+        """Report a finished submission (runs on the Tk thread)"""
+        if not pub or 'id' not in pub:
+            messagebox.showerror("Error", "Failed to save publication. Database returned no record.")
+            return
+
+        messagebox.showinfo(
+            "Success",
+            f"Publication submitted successfully!\n\n"
+            f"ID: {pub['id']}\n"
+            f"Title: {article_title if article_title else 'No title'}\n"
+            f"PDF: {'Yes' if self.current_pdf_data else 'No'}"
+        )
+        self.clear_form()
+        self.navigate_to("main_view")
+
     def clear_form(self):
         """Clear all form fields and PDF data"""
         for field_name, widget in self.form_entries.items():
@@ -907,16 +936,23 @@ class PublicationDatabaseGUI(tk.Frame):
             return
 
         if self.db:
-            results = self.db.search_publications(query, search_type)
-            self.display_results(results, query, search_type)
+            # A newer search supersedes one that is still running
+            self.executor.submit(
+                self.db.search_publications, query, search_type,
+                on_done=lambda results: self.display_results(results, query, search_type),
+                key="search"
+            )
         else:
             messagebox.showerror("Error", "Database not available")
 
     def show_all_publications(self):
         """Show all publications"""
         if self.db:
-            results = self.db.get_all_publications()
-            self.display_results(results, "All Publications", "manual")
+            self.executor.submit(
+                self.db.get_all_publications,
+                on_done=lambda results: self.display_results(results, "All Publications", "manual"),
+                key="search"
+            )
         else:
             messagebox.showerror("Error", "Database not available")
 
@@ -958,103 +994,29 @@ class PublicationDatabaseGUI(tk.Frame):
             )
             header_label.pack(anchor="w", fill=tk.X)
 
-            # Display each result as a clickable label
-            for idx, pub in enumerate(results, 1):
-                formatted_text = self.format_publication(pub)
-
-                # Create a frame for each result
-                result_frame = tk.Frame(self.results_container, bg="#305CDE", pady=5)
-                result_frame.pack(anchor="w", fill=tk.X, padx=10)
-
-                # Number label
-                number_label = tk.Label(
-                    result_frame,
-                    text=f"{idx}.",
-                    font=("Arial", 9, "bold"),
-                    fg="white",
-                    bg="#305CDE",
-                    anchor="nw"
-                )
-                number_label.pack(side=tk.LEFT, anchor="n", padx=(0, 5))
-
-                # Publication details as a clickable label (hyperlink style)
-                result_label = tk.Label(
-                    result_frame,
-                    text=formatted_text,
-                    font=("Arial", 9, "underline"),
-                    fg="#4CAF50",  # Green color for hyperlink
-                    bg="#305CDE",
-                    anchor="w",
-                    justify=tk.LEFT,
-                    wraplength=500,
-                    cursor="hand2"  # Change cursor to hand pointer
-                )
-                result_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
-
-                # Bind click event to show detailed view
-                result_label.bind("<Button-1>", lambda e, p=pub: self.navigate_to("detail", p))
-
-                # Hover effects
-                result_label.bind("<Enter>", lambda e, lbl=result_label: lbl.config(fg="#66BB6A"))
-                result_label.bind("<Leave>", lambda e, lbl=result_label: lbl.config(fg="#4CAF50"))
-
-                # Action buttons frame
-                button_frame = tk.Frame(result_frame, bg="#305CDE")
-                button_frame.pack(side=tk.RIGHT, padx=(10, 0))
-
-                # PDF Download button (if PDF exists)
-                if pub.get('pdf_data') is not None:
-                    pdf_button = tk.Button(
-                        button_frame,
-                        text="📥 PDF",
-                        command=lambda p=pub: self.download_pdf(p),
-                        bg="#FF9800",
-                        fg="white",
-                        font=("Arial", 8, "bold"),
-                        cursor="hand2",
-                        relief=tk.FLAT,
-                        bd=0,
-                        padx=8,
-                        pady=2
-                    )
-                    pdf_button.pack(side=tk.LEFT, padx=(0, 5))
-
-                # Edit button
-                edit_button = tk.Button(
-                    button_frame,
-                    text="Edit",
-                    command=lambda p=pub: self.navigate_to("edit", p),
-                    bg="#2196F3",
-                    fg="white",
-                    font=("Arial", 8, "bold"),
-                    cursor="hand2",
-                    relief=tk.FLAT,
-                    bd=0,
-                    padx=10,
-                    pady=3
-                )
-                edit_button.pack(side=tk.LEFT, padx=(0, 5))
-
-                # Delete button
-                delete_button = tk.Button(
-                    button_frame,
-                    text="Delete",
-                    command=lambda p=pub: self.delete_publication_confirm(p),
-                    bg="#F44336",
-                    fg="white",
-                    font=("Arial", 8, "bold"),
-                    cursor="hand2",
-                    relief=tk.FLAT,
-                    bd=0,
-                    padx=10,
-                    pady=3
-                )
-                delete_button.pack(side=tk.LEFT)
-
-                # Optional: Add a subtle separator between results
-                if idx < len(results):
-                    separator = tk.Frame(self.results_container, bg="#1E3A8A", height=1)
-                    separator.pack(fill=tk.X, padx=20, pady=3)
+            # Virtualized list: one Treeview item per result instead of a widget set
+            self.results_list = VirtualResultsList(
+                self.results_container,
+                columns=[
+                    ("number", "#", 50, False),
+                    ("publication", "Publication", 420, True),
+                    ("match", "PDF Match", 220, True),
+                    ("pdf", "PDF", 50, False),
+                ],
+                on_open=lambda p: self.navigate_to("detail", p),
+                actions=[
+                    ("📥 PDF", "#FF9800", self.download_pdf, lambda p: p.get('pdf_document_id') is not None),
+                    ("Edit", "#2196F3", lambda p: self.navigate_to("edit", p), None),
+                    ("Delete", "#F44336", self.delete_publication_confirm, None),
+                ]
+            )
+            self.results_list.pack(fill=tk.BOTH, expand=True, padx=10)
+            self.results_list.set_rows(results, lambda idx, pub: (
+                f"{idx}.",
+                self.format_publication(pub),
+                f"p. {pub['pdf_page']}: {pub['pdf_snippet']}" if pub.get('pdf_snippet') else "",
+                "📄" if pub.get('pdf_document_id') is not None else ""
+            ))
 
     def download_pdf(self, pub):
         """Download PDF file from database"""
@@ -1067,14 +1029,24 @@ class PublicationDatabaseGUI(tk.Frame):
             )
 
             if save_path:
-                try:
-                    exported_path = self.db.export_pdf(pub['id'], save_path)
-                    if exported_path:
-                        messagebox.showinfo("Success", f"PDF downloaded successfully!\nSaved to: {exported_path}")
-                    else:
-                        messagebox.showerror("Error", "Failed to download PDF. File may not exist.")
-                except Exception as e:
-                    messagebox.showerror("Error", f"Failed to download PDF: {str(e)}")
+                self.executor.submit(
+                    self.db.export_pdf, pub['id'], save_path,
+                    on_done=self.on_pdf_exported,
+                    on_error=lambda e: messagebox.showerror("Error", f"Failed to download PDF: {str(e)}")
+                )
+
+    def on_pdf_exported(self, exported_path):
+        """Report the outcome of a PDF export (runs on the Tk thread)"""
+        if exported_path:
+            messagebox.showinfo("Success", f"PDF downloaded successfully!\nSaved to: {exported_path}")
+        else:
+            messagebox.showerror("Error", "Failed to download PDF. File may not exist.")
+
+    def set_busy(self, busy):
+        """Show or hide the busy indicator while database work is running"""
+        self.config(cursor="watch" if busy else "")
+        if self.busy_label:
+            self.busy_label.config(text="⏳ Working..." if busy else "")
 
     def show_publication_detail(self, pub):
         """Show detailed view of a publication in a new frame"""
@@ -1235,7 +1207,7 @@ class PublicationDatabaseGUI(tk.Frame):
         button_frame.pack(pady=30)
 
         # PDF Download button (if PDF exists)
-        if pub.get('pdf_data') is not None:
+        if pub.get('pdf_document_id') is not None:
             pdf_button = tk.Button(
                 button_frame,
                 text="📥 Download PDF",
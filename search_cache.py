@@ -0,0 +1,157 @@
+# search_cache.py
+"""
+Search Cache Module
+In-memory LRU cache of search results for search-as-you-type.
+When the user keeps typing, the new query usually extends a cached one and
+can only match a subset of its hits, so it is answered by filtering the
+cached hits instead of running another database query.
+"""
+
+import re
+import bisect
+import threading
+import unicodedata
+from collections import OrderedDict
+
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def normalize_query(query):
+    """Cache key for a search box string (case and whitespace insensitive)"""
+    return " ".join(query.lower().split())
+
+
+def fold_text(text):
+    """Lowercase and strip diacritics, like the FTS5 unicode61 tokenizer"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def word_index(text):
+    """Sorted tuple of the distinct words of text (input for prefix_terms_match)"""
+    return tuple(sorted(set(_WORD_RE.findall(fold_text(text)))))
+
+
+def prefix_terms_match(words, query):
+    """
+    True if every word of query is a prefix of one of words (FTS prefix semantics)
+
+    Args:
+        words: Sorted tuple from word_index()
+        query (str): Normalized query
+    """
+    for term in _WORD_RE.findall(fold_text(query)):
+        i = bisect.bisect_left(words, term)
+        if i == len(words) or not words[i].startswith(term):
+            return False
+    return True
+
+
+def _like_regex(query):
+    """Compile a LIKE '%query%' pattern (% and _ are wildcards)"""
+    pattern = "".join(".*" if c == "%" else "." if c == "_" else re.escape(c) for c in query)
+    return re.compile(pattern)
+
+
+def like_match(text, query):
+    """
+    True if one column of text matches LIKE '%query%'
+
+    Args:
+        text (str): Lowercased column values joined with newlines
+        query (str): Normalized query (never contains a newline)
+    """
+    if "%" not in query and "_" not in query:
+        return query in text
+    return any(_like_regex(query).search(line) for line in text.split("\n"))
+
+
+class SearchResultCache:
+    """
+    LRU cache: normalized query -> list of (record, match_data) hits.
+
+    match_data is whatever the database's matcher needs to re-check a hit
+    (e.g. a word index); records are returned to the caller. Thread safe,
+    since lookups run on the query executor thread.
+    """
+
+    def __init__(self, max_entries=32, max_results=2000):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries (int): Number of queries kept
+            max_results (int): Larger result sets are not cached
+        """
+        self.max_entries = max_entries
+        self.max_results = max_results
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.prefix_hits = 0
+        self.misses = 0
+
+    def get(self, query, matches):
+        """
+        Look up a query
+
+        Args:
+            query (str): Search box string
+            matches: Function(match_data, normalized_query) -> bool, used to
+                     filter the hits of a cached query that query extends
+
+        Returns:
+            list or None: Cached records, or None on a miss
+        """
+        key = normalize_query(query)
+        with self._lock:
+            entries = self._entries.get(key)
+            if entries is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return [record for record, _ in entries]
+
+            # Quoted phrases cannot be re-checked against cached hits
+            base = None
+            if '"' not in key:
+                base = max((cached for cached in self._entries
+                            if cached and '"' not in cached and key.startswith(cached)),
+                           key=len, default=None)
+            if base is None:
+                self.misses += 1
+                return None
+
+            entries = [(record, data) for record, data in self._entries[base] if matches(data, key)]
+            self._store(key, entries)
+            self.prefix_hits += 1
+            return [record for record, _ in entries]
+
+    def put(self, query, entries, generation):
+        """
+        Cache the complete hit list of a query
+
+        Args:
+            query (str): Search box string
+            entries: List of (record, match_data)
+            generation (int): Value of self.generation before the query ran;
+                              results of a query that raced a write are dropped
+        """
+        if len(entries) > self.max_results:
+            return
+        with self._lock:
+            if generation == self.generation:
+                self._store(normalize_query(query), entries)
+
+    def _store(self, key, entries):
+        self._entries[key] = entries
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Invalidate everything (called after every write to the table)"""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
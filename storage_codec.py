@@ -0,0 +1,308 @@
+# storage_codec.py
+"""
+Storage Codec Module
+Transparent compression of large column values (PDF documents, sequences).
+Every stored value records the codec that produced it (NULL = stored as is),
+so rows written before compression existed, or with another codec, can be
+mixed freely. Values are only decoded when they are actually read.
+"""
+
+import time
+import zlib
+import lzma
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+# Values smaller than this are always stored as is
+MIN_COMPRESS_SIZE = 4096
+
+# Compression must shrink a value by at least this fraction to be kept
+MIN_SAVING = 0.10
+
+# Bytes of a file compressed as a sample before deciding how to store it
+SAMPLE_SIZE = 256 * 1024
+
+
+class _Decompressor:
+    """Streaming decompressor with a uniform decompress()/flush() interface"""
+
+    def __init__(self, obj):
+        self._obj = obj
+
+    def decompress(self, data):
+        return self._obj.decompress(data)
+
+    def flush(self):
+        flush = getattr(self._obj, 'flush', None)
+        return flush() if flush else b""
+
+
+class Codec:
+    """
+    A named compression method: one-shot and streaming compress/decompress.
+    Pass None for compressor/decompressor when a codec is one-shot only.
+    """
+
+    def __init__(self, name, compress, decompress, compressor, decompressor):
+        self.name = name
+        self.compress = compress
+        self.decompress = decompress
+        self._compressor = compressor
+        self._decompressor = decompressor
+
+    def compressor(self):
+        """New streaming compressor (compress(chunk) / flush())"""
+        if self._compressor is None:
+            raise ValueError(f"Storage codec '{self.name}' does not support streaming")
+        return self._compressor()
+
+    def decompressor(self):
+        """New streaming decompressor (decompress(chunk) / flush())"""
+        if self._decompressor is None:
+            raise ValueError(f"Storage codec '{self.name}' does not support streaming")
+        return _Decompressor(self._decompressor())
+
+    def __repr__(self):
+        return f"Codec({self.name!r})"
+
+
+CODECS = {
+    'zlib': Codec('zlib',
+                  lambda data: zlib.compress(data, 6),
+                  zlib.decompress,
+                  lambda: zlib.compressobj(6),
+                  zlib.decompressobj),
+    'lzma': Codec('lzma',
+                  lambda data: lzma.compress(data, preset=6),
+                  lzma.decompress,
+                  lambda: lzma.LZMACompressor(preset=6),
+                  lzma.LZMADecompressor),
+}
+
+if ZSTD_AVAILABLE:
+    CODECS['zstd'] = Codec('zstd',
+                           lambda data: zstandard.ZstdCompressor(level=9).compress(data),
+                           lambda data: zstandard.ZstdDecompressor().decompress(data),
+                           lambda: zstandard.ZstdCompressor(level=9).compressobj(),
+                           lambda: zstandard.ZstdDecompressor().decompressobj())
+
+# zstd when installed (fast and dense), zlib otherwise
+DEFAULT_CODEC = 'zstd' if ZSTD_AVAILABLE else 'zlib'
+
+
+def register_codec(codec):
+    """Make an additional codec known to decode() (e.g. nucleotide packing)"""
+    CODECS[codec.name] = codec
+
+
+def get_codec(name):
+    """Look up a codec by name (raises ValueError for unknown or missing codecs)"""
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Storage codec '{name}' is not available") from None
+
+
+def pays_off(size, compressed_size):
+    """True if compressed_size is a worthwhile saving over size bytes"""
+    return compressed_size <= size * (1 - MIN_SAVING)
+
+
+def encode(data, codec=DEFAULT_CODEC):
+    """
+    Compress a value if that pays off
+
+    Args:
+        data (bytes): Value to store
+        codec (str): Codec name, or None to never compress
+
+    Returns:
+        tuple: (codec name or None, stored bytes)
+    """
+    if codec is None or len(data) < MIN_COMPRESS_SIZE:
+        return None, data
+    compressed = get_codec(codec).compress(data)
+    if not pays_off(len(data), len(compressed)):
+        return None, data
+    return codec, compressed
+
+
+def decode(codec, payload):
+    """Inverse of encode(): return the original bytes"""
+    if codec is None:
+        return payload
+    return get_codec(codec).decompress(bytes(payload))
+
+
+def encode_text(text, codec=DEFAULT_CODEC):
+    """
+    encode() for TEXT columns
+
+    Returns:
+        tuple: (codec name or None, str if stored as is, bytes if compressed)
+    """
+    if text is None:
+        return None, None
+    codec, payload = encode(text.encode("utf-8"), codec)
+    return (None, text) if codec is None else (codec, payload)
+
+
+def decode_text(codec, payload):
+    """Inverse of encode_text()"""
+    if codec is None or payload is None:
+        return payload
+    return decode(codec, payload).decode("utf-8")
+
+
+def sample_pays_off(sample, codec=DEFAULT_CODEC):
+    """Guess from the first bytes of a file whether compressing all of it pays off"""
+    if codec is None or len(sample) < MIN_COMPRESS_SIZE:
+        return False
+    return pays_off(len(sample), len(get_codec(codec).compress(sample)))
+
+
+class LazyRecord(dict):
+    """
+    Record dict whose encoded columns are decoded on first access.
+
+    The encoded keys are present from the start (so 'in' and keys() work);
+    their values are decompressed by [] / get() / items() / values().
+    Iterating, comparing and copying (dict(record), {**record}) decode
+    everything first, since dict's own fast paths would see the placeholders.
+    """
+
+    def __init__(self, values, encoded):
+        """
+        Args:
+            values (dict): Plain column values
+            encoded (dict): column -> (codec, payload) for compressed columns
+        """
+        super().__init__(values)
+        for key in encoded:
+            dict.__setitem__(self, key, None)
+        self._encoded = dict(encoded)
+
+    def _decode(self, key):
+        codec, payload = self._encoded.pop(key)
+        value = decode_text(codec, payload)
+        dict.__setitem__(self, key, value)
+        return value
+
+    def _decode_all(self):
+        for key in list(self._encoded):
+            self._decode(key)
+
+    def __getitem__(self, key):
+        if key in self._encoded:
+            return self._decode(key)
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __setitem__(self, key, value):
+        self._encoded.pop(key, None)
+        dict.__setitem__(self, key, value)
+
+    def pop(self, key, *default):
+        if key in self._encoded:
+            self._decode(key)
+        return dict.pop(self, key, *default)
+
+    def items(self):
+        self._decode_all()
+        return dict.items(self)
+
+    def values(self):
+        self._decode_all()
+        return dict.values(self)
+
+    def copy(self):
+        self._decode_all()
+        return dict(self)
+
+    def __iter__(self):
+        # Overriding __iter__ also makes dict(record) and {**record} use
+        # keys() and [] instead of reading the storage directly
+        self._decode_all()
+        return dict.__iter__(self)
+
+    def keys(self):
+        self._decode_all()
+        return dict.keys(self)
+
+    def __eq__(self, other):
+        self._decode_all()
+        if isinstance(other, LazyRecord):
+            other._decode_all()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __or__(self, other):
+        self._decode_all()
+        return dict.__or__(self, other)
+
+    def __ror__(self, other):
+        self._decode_all()
+        return dict.__ror__(self, other)
+
+    def __reduce__(self):
+        # Pickled and deep-copied as a plain, fully decoded dict
+        self._decode_all()
+        return dict, (dict.copy(self),)
+
+    def __repr__(self):
+        self._decode_all()
+        return dict.__repr__(self)
+
+
+def random_genome(length, seed=1):
+    """Synthetic nucleotide sequence with repeats, for the benchmark"""
+    import random
+
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < length:
+        if parts and rng.random() < 0.2:
+            # Repeats and duplicated segments, as in real genomes
+            part = parts[rng.randrange(len(parts))]
+        else:
+            part = "".join(rng.choices("ACGT", weights=(30, 20, 20, 30), k=rng.randint(200, 5000)))
+        parts.append(part)
+        total += len(part)
+    return "".join(parts)[:length]
+
+
+def run_benchmark(lengths=(10_000, 1_000_000, 5_000_000)):
+    """Print size and encode/decode time of every codec on synthetic genomes"""
+    print(f"{'length':>10} {'codec':>6} {'stored':>12} {'ratio':>6} {'encode ms':>10} {'decode ms':>10}")
+    for length in lengths:
+        text = random_genome(length)
+        raw = text.encode("utf-8")
+        for name in [None] + list(CODECS):
+            start = time.perf_counter()
+            payload = raw if name is None else get_codec(name).compress(raw)
+            encoded = time.perf_counter()
+            decoded = raw if name is None else get_codec(name).decompress(payload)
+            done = time.perf_counter()
+            assert decoded == raw
+            print(f"{length:>10} {name or 'raw':>6} {len(payload):>12} "
+                  f"{len(raw) / len(payload):>6.2f} {(encoded - start) * 1000:>10.1f} "
+                  f"{(done - encoded) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    if not ZSTD_AVAILABLE:
+        print("Note: zstandard is not installed, zstd is skipped")
+    run_benchmark()
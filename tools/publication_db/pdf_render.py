@@ -0,0 +1,312 @@
+# pdf_render.py
+"""
+PDF Render Module
+Background page rendering and a memory-bounded render cache for the
+publication PDF viewer. Pages are rendered off the Tk thread and handed
+back by polling a queue with after(), like QueryExecutor.
+"""
+
+import os
+import threading
+import queue
+import itertools
+import traceback
+from collections import OrderedDict
+import tkinter as tk
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+
+# Default memory budget for rendered pages kept by RenderCache
+RENDER_CACHE_BYTES = 128 * 1024 * 1024
+
+# Default location of the on-disk page thumbnail cache
+THUMBNAIL_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bio_tools_gui", "pdf_thumbnails")
+
+
+class RenderCache:
+    """
+    LRU cache of rendered pages (PIL images) bounded by their pixel memory.
+
+    Keys are (doc_hash, page_number, zoom, clip) so the same page of the same
+    PDF is reused across zoom changes and across reopening the publication.
+    Thread safe, since the render worker fills it.
+    """
+
+    def __init__(self, max_bytes=RENDER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def image_bytes(image):
+        return image.width * image.height * len(image.getbands())
+
+    def get(self, key):
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+            return image
+
+    def put(self, key, image):
+        size = self.image_bytes(image)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._images.pop(key, None)
+            if old is not None:
+                self.current_bytes -= self.image_bytes(old)
+            self._images[key] = image
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self.current_bytes -= self.image_bytes(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self.current_bytes = 0
+
+
+class ThumbnailCache:
+    """
+    Page thumbnails persisted as PNG files, keyed by document hash.
+
+    Layout: <root>/<doc_hash>/<page_number>.png. PDFs are content addressed,
+    so a document reopened from any publication finds its thumbnails.
+    """
+
+    def __init__(self, root=THUMBNAIL_DIR):
+        self.root = root
+
+    def path(self, doc_hash, page_number):
+        return os.path.join(self.root, doc_hash, f"{page_number}.png")
+
+    def load(self, doc_hash, page_number):
+        """Return the stored thumbnail as a PIL image, or None"""
+        path = self.path(doc_hash, page_number)
+        if not os.path.exists(path):
+            return None
+        try:
+            with Image.open(path) as image:
+                return image.convert("RGB")
+        except (OSError, ValueError) as e:
+            print(f"✗ Thumbnail cache: unreadable {path}: {e}")
+            return None
+
+    def save(self, doc_hash, page_number, image):
+        """Store a thumbnail (written to a temp file, then renamed)"""
+        path = self.path(doc_hash, page_number)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            image.save(temp_path, "PNG")
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"✗ Thumbnail cache: could not write {path}: {e}")
+
+
+class RenderJob:
+    """One page render request and the callback that receives the image"""
+
+    __slots__ = ('key', 'page_number', 'zoom', 'clip', 'store', 'on_done', 'on_error', 'generation')
+
+    def __init__(self, key, page_number, zoom, clip, store, on_done, on_error, generation):
+        self.key = key
+        self.page_number = page_number
+        self.zoom = zoom
+        self.clip = clip
+        self.store = store
+        self.on_done = on_done
+        self.on_error = on_error
+        self.generation = generation
+
+
+class PageRenderer:
+    """
+    Renders the pages of one PDF on a background worker.
+
+    MuPDF is not thread safe, so the pool is a single worker thread that
+    opens its own fitz.Document from the PDF bytes; the Tk thread never
+    renders. Requests are served by priority (the visible page first, then
+    prefetched neighbours by distance). Calling new_generation() when the
+    user pages or zooms drops queued requests that are no longer needed.
+    """
+
+    def __init__(self, widget, pdf_data, doc_hash, cache, tile_cache=None, poll_ms=30):
+        """
+        Initialize the renderer
+
+        Args:
+            widget: Any Tk widget, used for after() polling
+            pdf_data (bytes): PDF content
+            doc_hash (str): SHA-256 of the PDF, used in cache keys
+            cache (RenderCache): Cache shared by all renderers of the viewer
+            tile_cache (RenderCache): Cache for clipped (tile) renders, default: cache
+            poll_ms (int): Result queue polling interval in milliseconds
+        """
+        self.widget = widget
+        self.pdf_data = pdf_data
+        self.doc_hash = doc_hash
+        self.cache = cache
+        self.tile_cache = tile_cache if tile_cache is not None else cache
+        self.poll_ms = poll_ms
+
+        self.generation = 0
+        self._jobs = queue.PriorityQueue()
+        self._results = queue.Queue()
+        self._order = itertools.count()
+        self._pending = 0
+        self._polling = False
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name="pdf-page-renderer", daemon=True)
+        self._thread.start()
+
+    def cache_key(self, page_number, zoom, clip=None):
+        return (self.doc_hash, page_number, round(zoom, 3), clip)
+
+    def cache_for(self, clip):
+        return self.tile_cache if clip else self.cache
+
+    def cached(self, page_number, zoom, clip=None):
+        """Return the cached render of a page (or page tile), or None"""
+        return self.cache_for(clip).get(self.cache_key(page_number, zoom, clip))
+
+    def new_generation(self):
+        """Invalidate every queued request (the view changed)"""
+        self.generation += 1
+        return self.generation
+
+    def request(self, page_number, zoom, on_done=None, on_error=None, priority=0, clip=None):
+        """
+        Queue a page render
+
+        Args:
+            page_number (int): 0-based page index
+            zoom (float): Render scale (1.0 = 72 DPI)
+            on_done: Callback(image) run on the Tk thread if the request is
+                     still current when the render finishes
+            on_error: Callback(exception) run on the Tk thread (default: print)
+            priority (int): Lower is rendered first
+            clip (tuple): Optional (x0, y0, x1, y1) pixel rectangle of the
+                          page at this zoom; only that tile is rendered
+        """
+        if self._closed:
+            return
+        key = self.cache_key(page_number, zoom, clip)
+        self._submit(RenderJob(key, page_number, zoom, clip, None, on_done, on_error, self.generation), priority)
+
+    def request_thumbnail(self, page_number, zoom, store, on_done, priority=1000):
+        """
+        Queue a thumbnail, loaded from the ThumbnailCache store or rendered and saved there
+
+        Thumbnails are not tied to the view: new_generation() does not drop them.
+        """
+        if self._closed:
+            return
+        key = ("thumbnail", self.doc_hash, page_number, zoom)
+        self._submit(RenderJob(key, page_number, zoom, None, store, on_done, None, None), priority)
+
+    def _submit(self, job, priority):
+        self._pending += 1
+        self._jobs.put((priority, next(self._order), job))
+
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._poll)
+
+    def close(self):
+        """Stop the worker; queued requests are discarded"""
+        self._closed = True
+        self.new_generation()
+        self._jobs.put((-1, next(self._order), None))
+
+    def _run(self):
+        """Worker loop: owns the fitz.Document for this renderer"""
+        doc = None
+        try:
+            doc = fitz.open(stream=self.pdf_data, filetype="pdf")
+            while True:
+                _, _, job = self._jobs.get()
+                if job is None or self._closed:
+                    break
+                if not self._is_current(job):
+                    self._results.put((job, None, None))
+                    continue
+
+                try:
+                    if job.store is not None:
+                        image = job.store.load(self.doc_hash, job.page_number)
+                        if image is None:
+                            image = self._render(doc, job)
+                            job.store.save(self.doc_hash, job.page_number, image)
+                    else:
+                        cache = self.cache_for(job.clip)
+                        image = cache.get(job.key)
+                        if image is None:
+                            image = self._render(doc, job)
+                            cache.put(job.key, image)
+                    self._results.put((job, image, None))
+                except Exception as e:
+                    traceback.print_exc()
+                    self._results.put((job, None, e))
+        except Exception as e:
+            self._closed = True
+            print(f"✗ PDF renderer: could not open document: {e}")
+        finally:
+            if doc is not None:
+                doc.close()
+
+    def _is_current(self, job):
+        return job.generation is None or job.generation == self.generation
+
+    @staticmethod
+    def _render(doc, job):
+        """Render one page (or the clipped part of it) to an RGB PIL image"""
+        page = doc[job.page_number]
+        clip = None
+        if job.clip:
+            # Pixel rectangle at this zoom -> page coordinates
+            x0, y0, x1, y1 = job.clip
+            left, top = page.rect.x0, page.rect.y0
+            clip = fitz.Rect(left + x0 / job.zoom, top + y0 / job.zoom,
+                             left + x1 / job.zoom, top + y1 / job.zoom)
+        pix = page.get_pixmap(matrix=fitz.Matrix(job.zoom, job.zoom), clip=clip, alpha=False)
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+    def _poll(self):
+        """Deliver finished renders on the Tk thread"""
+        try:
+            while True:
+                try:
+                    job, image, error = self._results.get_nowait()
+                except queue.Empty:
+                    break
+
+                self._pending -= 1
+                if self._closed or not self._is_current(job):
+                    continue
+                try:
+                    if error is not None:
+                        if job.on_error:
+                            job.on_error(error)
+                        else:
+                            print(f"✗ PDF renderer: page {job.page_number + 1} failed: {error}")
+                    elif job.on_done:
+                        job.on_done(image)
+                except Exception:
+                    # e.g. the page's canvas was destroyed; keep delivering the others
+                    traceback.print_exc()
+        finally:
+            try:
+                if self._pending > 0 and not self._closed:
+                    self.widget.after(self.poll_ms, self._poll)
+                else:
+                    self._polling = False
+            except tk.TclError:
+                # Viewer was destroyed while pages were rendering
+                self._polling = False
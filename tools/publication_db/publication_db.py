@@ -7,24 +7,140 @@ FIXED: Better error handling and debugging
 
 import sqlite3
 import os
+import re
+
+from db_connection import ConnectionManager
+from document_store import DocumentStore, DocumentTooLargeError, MAX_DOCUMENT_SIZE
+from search_cache import SearchResultCache, normalize_query, word_index, prefix_terms_match, like_match
+import pdf_text_index
+import storage_codec
+
+
+# Text columns matched by the LIKE fallback search (no FTS5 available)
+SEARCH_COLUMNS = ('journal_name', 'publication_year', 'volume', 'page_range',
+                  'title', 'authors', 'abstract', 'pdf_filename')
+
+# Columns of the publications_fts full-text index and their BM25 weights.
+# Year/volume/page range are tiny but kept so they stay searchable.
+FTS_COLUMNS = ('title', 'authors', 'journal_name', 'abstract', 'pdf_filename',
+               'publication_year', 'volume', 'page_range')
+FTS_WEIGHTS = (10.0, 5.0, 2.0, 1.0, 1.0, 1.0, 1.0, 1.0)
+
+_FTS_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_FTS_PART_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def build_fts_query(query):
+    """
+    Turn a search box string into a safe FTS5 MATCH expression
+
+    Bare words become prefix queries ("watso" matches "Watson"), text in
+    double quotes becomes a phrase query. All terms must match (implicit AND).
+
+    Returns:
+        str or None: MATCH expression, or None if the query has no searchable tokens
+    """
+    terms = []
+    for phrase, word in _FTS_PART_RE.findall(query):
+        if phrase:
+            tokens = _FTS_TOKEN_RE.findall(phrase)
+            if tokens:
+                terms.append('"' + " ".join(tokens) + '"')
+        else:
+            for token in _FTS_TOKEN_RE.findall(word):
+                terms.append(f'"{token}"*')
+    return " ".join(terms) if terms else None
+
+
+class PublicationSummary:
+    """
+    Lightweight listing record: only the columns the results list shows.
+    Supports pub['id'] / pub.get('title') like the full record dicts.
+    """
+    __slots__ = ('id', 'title', 'authors', 'has_pdf')
+
+    def __init__(self, id, title, authors, has_pdf):
+        self.id = id
+        self.title = title
+        self.authors = authors
+        self.has_pdf = bool(has_pdf)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __repr__(self):
+        return f"PublicationSummary(id={self.id!r}, title={self.title!r})"
 
 
 class PublicationDatabase:
-    def __init__(self, db_path="publications.db"):
+    def __init__(self, db_path="publications.db", pragmas=None, wal=None,
+                 max_pdf_size=MAX_DOCUMENT_SIZE, codec=storage_codec.DEFAULT_CODEC):
         """
         Initialize publication database
 
         Args:
             db_path (str): Path to SQLite database file
+            pragmas (dict): Optional PRAGMAs for the pooled connections
+            wal (bool): Opt in to WAL journal mode so searches are not blocked
+                        by a writer (synchronous/busy_timeout/wal_autocheckpoint
+                        can be tuned through pragmas). None = set by the
+                        BIOTOOLS_DB_WAL environment variable. Only for a
+                        database on a local disk: WAL is refused on network
+                        drives shared by several workstations
+            max_pdf_size (int): Largest accepted PDF upload in bytes
+            codec (str): storage_codec codec for stored PDFs (None = never compress)
         """
         self.db_path = db_path
+        self.connections = ConnectionManager.for_path(db_path, pragmas=pragmas, wal=wal)
+        self.documents = DocumentStore(max_size=max_pdf_size, codec=codec)
+        # Search-as-you-type results; cleared by every add/update/delete
+        self.search_cache = SearchResultCache()
+        self.fts_enabled = False
+        self.pdf_indexer = None
         print(f"Initializing database at: {os.path.abspath(db_path)}")
         self.init_database()
 
+    def _connect(self):
+        """Get the pooled connection for the calling thread"""
+        return self.connections.get_connection()
+
+    def close(self):
+        """Close all pooled connections to this database"""
+        if self.pdf_indexer:
+            self.pdf_indexer.stop()
+            self.pdf_indexer = None
+        self.connections.close_all()
+
+    def start_pdf_indexing(self):
+        """
+        Start the background PDF text indexer behind the "PDF Search" mode
+
+        Returns:
+            PDFTextIndexer: The running indexer (inactive if PyMuPDF or FTS5 is missing)
+        """
+        if self.pdf_indexer is None:
+            self.pdf_indexer = pdf_text_index.PDFTextIndexer(self)
+            self.pdf_indexer.start()
+        return self.pdf_indexer
+
+    def checkpoint(self, mode="PASSIVE"):
+        """Run a WAL checkpoint (no-op when WAL mode is not enabled)"""
+        return self.connections.checkpoint(mode)
+
+    def compact(self):
+        """Checkpoint the WAL and VACUUM the database file"""
+        return self.connections.compact()
+
     def init_database(self):
         """Initialize database with schema"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
             cursor.execute('''
@@ -37,11 +153,22 @@ class PublicationDatabase:
                     title TEXT,
                     authors TEXT,
                     abstract TEXT,
-                    pdf_data BLOB,
+                    pdf_document_id INTEGER REFERENCES documents(id),
+                    pdf_size INTEGER,
                     pdf_filename TEXT
                 )
             ''')
 
+            # PDFs live in the content-addressed documents table
+            self.documents.init_schema(cursor)
+
+            cursor.execute("PRAGMA table_info(publications)")
+            columns = [column[1] for column in cursor.fetchall()]
+            if 'pdf_document_id' not in columns:
+                cursor.execute('ALTER TABLE publications ADD COLUMN pdf_document_id INTEGER REFERENCES documents(id)')
+                cursor.execute('ALTER TABLE publications ADD COLUMN pdf_size INTEGER')
+            self.documents.migrate_inline_blobs(cursor, 'publications')
+
             # Create index for search performance
             try:
                 cursor.execute('''
@@ -51,18 +178,170 @@ class PublicationDatabase:
             except sqlite3.OperationalError as e:
                 print(f"Note: Index already exists or couldn't be created: {e}")
 
+            self.fts_enabled = self._init_fts(cursor)
+            if self.fts_enabled:
+                pdf_text_index.init_schema(cursor)
+
             conn.commit()
-            conn.close()
             print("✓ Publication database schema initialized successfully")
         except Exception as e:
             print(f"✗ Error initializing database: {e}")
             import traceback
             traceback.print_exc()
 
+    def _init_fts(self, cursor):
+        """
+        Create the FTS5 index and its sync triggers
+
+        Returns:
+            bool: False if this SQLite build has no FTS5 (LIKE search is used then)
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'publications_fts'")
+        exists = cursor.fetchone() is not None
+
+        columns = ", ".join(FTS_COLUMNS)
+        new_values = ", ".join(f"new.{column}" for column in FTS_COLUMNS)
+        old_values = ", ".join(f"old.{column}" for column in FTS_COLUMNS)
+
+        try:
+            cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS publications_fts USING fts5(
+                    {columns},
+                    content='publications', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"Note: FTS5 not available, using LIKE search: {e}")
+            return False
+
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS publications_fts_insert AFTER INSERT ON publications BEGIN
+                INSERT INTO publications_fts(rowid, {columns}) VALUES (new.id, {new_values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS publications_fts_delete AFTER DELETE ON publications BEGIN
+                INSERT INTO publications_fts(publications_fts, rowid, {columns})
+                VALUES ('delete', old.id, {old_values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS publications_fts_update AFTER UPDATE ON publications BEGIN
+                INSERT INTO publications_fts(publications_fts, rowid, {columns})
+                VALUES ('delete', old.id, {old_values});
+                INSERT INTO publications_fts(rowid, {columns}) VALUES (new.id, {new_values});
+            END
+        ''')
+
+        if not exists:
+            # Index the rows that were stored before the FTS table existed
+            cursor.execute("INSERT INTO publications_fts(publications_fts) VALUES ('rebuild')")
+            print("✓ Built full-text index for existing publications")
+        return True
+
+    def _search_sql(self, select_columns, query):
+        """
+        Build the search statement for the given query
+
+        Uses the FTS5 index ranked by BM25 when available, otherwise the
+        LIKE scan over SEARCH_COLUMNS ordered by newest first.
+
+        Returns:
+            tuple: (sql, params)
+        """
+        match = build_fts_query(query) if self.fts_enabled else None
+        if match:
+            weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+            sql = f'''
+                SELECT {select_columns} FROM publications_fts
+                JOIN publications p ON p.id = publications_fts.rowid
+                WHERE publications_fts MATCH ?
+                ORDER BY bm25(publications_fts, {weights}), p.id DESC
+            '''
+            return sql, (match,)
+
+        where = " OR ".join(f"p.{column} LIKE ?" for column in SEARCH_COLUMNS)
+        sql = f'''
+            SELECT {select_columns} FROM publications p
+            WHERE {where}
+            ORDER BY p.id DESC
+        '''
+        return sql, (f"%{query}%",) * len(SEARCH_COLUMNS)
+
+    def _filter_sql(self, query):
+        """
+        FROM/WHERE clauses selecting the publications that match a query
+
+        Results can be ordered and paged by p.id (keyset pagination); with
+        FTS5 the rowid range is resolved inside the full-text index.
+
+        Returns:
+            tuple: (from_sql, where_sql, params) - where_sql is '' for no query
+        """
+        if not query:
+            return "publications p", "", ()
+
+        match = build_fts_query(query) if self.fts_enabled else None
+        if match:
+            return ("publications_fts JOIN publications p ON p.id = publications_fts.rowid",
+                    "publications_fts MATCH ?", (match,))
+
+        where = " OR ".join(f"p.{column} LIKE ?" for column in SEARCH_COLUMNS)
+        return "publications p", f"({where})", (f"%{query}%",) * len(SEARCH_COLUMNS)
+
+    def _keyset_page(self, cursor, select_columns, query, after, limit, ranked=False):
+        """
+        Run one keyset page query and return (rows, next_after)
+
+        Rows are ordered by id DESC. With ranked=True and an FTS5 query they
+        are ordered like _search_sql instead (BM25, then id DESC), and the
+        keyset cursor is a (rank, id) pair.
+        """
+        from_sql, where_sql, params = self._filter_sql(query)
+        conditions = [where_sql] if where_sql else []
+        ranked = ranked and from_sql.startswith("publications_fts")
+        if ranked:
+            weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+            rank = f"bm25(publications_fts, {weights})"
+            select_columns = f"{select_columns}, {rank}"
+            order = f"{rank}, p.id DESC"
+            if after is not None:
+                conditions.append(f"({rank} > ? OR ({rank} = ? AND p.id < ?))")
+                params = params + (after[0], after[0], after[1])
+        else:
+            order = "p.id DESC"
+            if after is not None:
+                conditions.append("p.id < ?")
+                params = params + (after,)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        # Fetch one extra row to know whether another page follows
+        cursor.execute(f'''
+            SELECT {select_columns} FROM {from_sql}
+            {where}
+            ORDER BY {order}
+            LIMIT ?
+        ''', params + (limit + 1,))
+        rows = cursor.fetchall()
+
+        next_after = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_after = (rows[-1][-1], rows[-1][0]) if ranked else rows[-1][0]
+        if ranked:
+            rows = [row[:-1] for row in rows]
+        return rows, next_after
+
     def add_publication(self, journal_name=None, publication_year=None, volume=None,
                         page_range=None, title=None, authors=None, abstract=None,
-                        pdf_data=None, pdf_filename=None):
-        """Add a new publication to the database"""
+                        pdf_data=None, pdf_filename=None, pdf_document_id=None):
+        """
+        Add a new publication to the database
+
+        The PDF is either given as pdf_data or as pdf_document_id from
+        stage_pdf(); the publication takes over the staged reference.
+        """
         print("\n=== Adding Publication ===")
         print(f"Journal: {journal_name}")
         print(f"Year: {publication_year}")
@@ -75,22 +354,32 @@ class PublicationDatabase:
 
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
+            pdf_size = None
+            if pdf_document_id is not None:
+                pdf_size = self.documents.get_info(cursor, pdf_document_id)[1]
+            elif pdf_data is not None:
+                pdf_document_id, pdf_size = self.documents.put(cursor, pdf_data)
+
             cursor.execute('''
                 INSERT INTO publications 
                 (journal_name, publication_year, volume, page_range, title, 
-                 authors, abstract, pdf_data, pdf_filename)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                 authors, abstract, pdf_document_id, pdf_size, pdf_filename)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (journal_name, publication_year, volume, page_range, title,
-                  authors, abstract, pdf_data, pdf_filename))
+                  authors, abstract, pdf_document_id, pdf_size, pdf_filename))
 
             publication_id = cursor.lastrowid
             conn.commit()
+            self.search_cache.clear()
 
             print(f"✓ Publication saved with ID: {publication_id}")
 
+            if self.pdf_indexer:
+                self.pdf_indexer.enqueue(pdf_document_id)
+
             # Retrieve the saved publication
             publication = self.get_publication(publication_id)
 
@@ -106,7 +395,8 @@ class PublicationDatabase:
                     'title': title,
                     'authors': authors,
                     'abstract': abstract,
-                    'pdf_data': pdf_data,
+                    'pdf_document_id': pdf_document_id,
+                    'pdf_size': pdf_size,
                     'pdf_filename': pdf_filename
                 }
 
@@ -126,15 +416,56 @@ class PublicationDatabase:
             import traceback
             traceback.print_exc()
             return None
-        finally:
+
+    def stage_pdf(self, file_path, progress=None):
+        """
+        Stream a PDF file into the document store ahead of saving a publication
+
+        The staged document holds one reference until it is passed to
+        add_publication(pdf_document_id=...) or given up with release_pdf().
+
+        Args:
+            file_path (str): PDF file to store
+            progress: Optional callback(bytes_done, bytes_total), called on this thread
+
+        Returns:
+            int: document id
+
+        Raises:
+            DocumentTooLargeError: The file is larger than max_pdf_size
+        """
+        conn = None
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            document_id, size = self.documents.put_file(cursor, file_path, progress=progress)
+            conn.commit()
+            print(f"✓ Staged PDF {os.path.basename(file_path)} ({size} bytes) as document {document_id}")
+            return document_id
+
+        except (sqlite3.Error, OSError, DocumentTooLargeError) as e:
+            print(f"✗ Could not store PDF {file_path}: {e}")
+            if conn:
+                conn.rollback()
+            raise
+
+    def release_pdf(self, document_id):
+        """Give up a staged PDF that was never attached to a publication"""
+        conn = None
+        try:
+            conn = self._connect()
+            self.documents.release(conn.cursor(), document_id)
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"✗ Database error releasing staged PDF: {e}")
             if conn:
-                conn.close()
+                conn.rollback()
 
     def get_publication(self, pub_id):
         """Get a specific publication by ID"""
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
             cursor.execute('SELECT * FROM publications WHERE id = ?', (pub_id,))
@@ -153,15 +484,12 @@ class PublicationDatabase:
             import traceback
             traceback.print_exc()
             return None
-        finally:
-            if conn:
-                conn.close()
 
     def get_all_publications(self):
         """Get all publications from database"""
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
             cursor.execute('SELECT * FROM publications ORDER BY id DESC')
@@ -173,32 +501,164 @@ class PublicationDatabase:
             import traceback
             traceback.print_exc()
             return []
-        finally:
-            if conn:
-                conn.close()
 
-    def search_publications(self, query):
-        """Search publications across all text fields"""
+    def quick_search_summaries(self, query):
+        """
+        Search-as-you-type lookup backed by the in-memory result cache
+
+        A query that extends a cached one (e.g. "watso" after "wat") is
+        answered by filtering the cached hits, keeping their order.
+
+        Returns:
+            list or None: PublicationSummary hits, or None if more publications
+                          match than the cache holds (use the paged listing then)
+        """
+        results = self.search_cache.get(query, self._cached_hit_matches)
+        if results is not None:
+            return results
+
+        query = normalize_query(query)
+        generation = self.search_cache.generation
+        try:
+            cursor = self._connect().cursor()
+            # All searchable columns, one per line, to re-check hits in memory
+            text = " || char(10) || ".join(f"coalesce(p.{column}, '')" for column in SEARCH_COLUMNS)
+            sql, params = self._search_sql(
+                f"p.id, p.title, p.authors, p.pdf_document_id IS NOT NULL, {text}", query)
+            cursor.execute(f"{sql} LIMIT ?", params + (self.search_cache.max_results + 1,))
+            rows = cursor.fetchall()
+
+        except sqlite3.Error as e:
+            print(f"✗ Database error during search: {e}")
+            return []
+
+        if len(rows) > self.search_cache.max_results:
+            return None
+
+        if not self.fts_enabled:
+            entries = [(PublicationSummary(*row[:4]), row[4].lower()) for row in rows]
+        elif build_fts_query(query):
+            entries = [(PublicationSummary(*row[:4]), word_index(row[4])) for row in rows]
+        else:
+            # Punctuation-only query ran as a LIKE scan; not refinable with FTS rules
+            return [PublicationSummary(*row[:4]) for row in rows]
+        self.search_cache.put(query, entries, generation)
+        return [summary for summary, _ in entries]
+
+    def _cached_hit_matches(self, match_data, query):
+        """Re-check a cached hit against a longer query (FTS prefix or LIKE rules)"""
+        if self.fts_enabled:
+            return prefix_terms_match(match_data, query)
+        return like_match(match_data, query)
+
+    def count_publications(self, query=None):
+        """Number of publications matching query (all publications if None)"""
+        try:
+            cursor = self._connect().cursor()
+            from_sql, where_sql, params = self._filter_sql(query)
+            where = f"WHERE {where_sql}" if where_sql else ""
+            cursor.execute(f"SELECT COUNT(*) FROM {from_sql} {where}", params)
+            return cursor.fetchone()[0]
+
+        except sqlite3.Error as e:
+            print(f"✗ Database error counting publications: {e}")
+            return 0
+
+    def get_publication_summary_page(self, query=None, after=None, limit=50):
+        """
+        Get one page of listing records (keyset pagination)
+
+        Full-text searches come best match first, in the same order as
+        search_publications and the search-as-you-type results;
+        the plain listing and LIKE searches come newest first.
+
+        Args:
+            query (str): Search text, or None to list all publications
+            after: Cursor returned with the previous page, None for the first page
+            limit (int): Page size
+
+        Returns:
+            tuple: (list of PublicationSummary, next cursor or None if last page)
+        """
+        try:
+            cursor = self._connect().cursor()
+            rows, next_after = self._keyset_page(
+                cursor, "p.id, p.title, p.authors, p.pdf_document_id IS NOT NULL",
+                query, after, limit, ranked=True)
+            return [PublicationSummary(*row) for row in rows], next_after
+
+        except sqlite3.Error as e:
+            print(f"✗ Database error loading page: {e}")
+            import traceback
+            traceback.print_exc()
+            return [], None
+
+    def search_pdf_text(self, query, limit=200):
+        """
+        Search the text of stored PDFs page by page
+
+        Args:
+            query (str): Search box text (same syntax as the metadata search)
+            limit (int): Maximum number of page hits
+
+        Returns:
+            list: (publication dict, page number, snippet) tuples, best match first
+        """
+        match = build_fts_query(query) if self.fts_enabled else None
+        if not match:
+            return []
+
+        try:
+            cursor = self._connect().cursor()
+            cursor.execute('''
+                SELECT p.*, f.page_number AS pdf_page,
+                       snippet(document_pages_fts, 0, '[', ']', '...', 12) AS pdf_snippet
+                FROM document_pages_fts f
+                JOIN publications p ON p.pdf_document_id = f.document_id
+                WHERE document_pages_fts MATCH ?
+                ORDER BY bm25(document_pages_fts), p.id DESC
+                LIMIT ?
+            ''', (match, limit))
+
+            hits = []
+            for row in cursor.fetchall():
+                pub = self._row_to_dict(cursor, row)
+                hits.append((pub, pub.pop('pdf_page'), pub.pop('pdf_snippet')))
+            print(f"✓ PDF search for '{query}' found {len(hits)} page hit(s)")
+            return hits
+
+        except sqlite3.Error as e:
+            print(f"✗ Database error during PDF search: {e}")
+            import traceback
+            traceback.print_exc()
+            return []
+
+    def search_publications(self, query, search_type="manual"):
+        """
+        Search publications
+
+        Args:
+            query (str): Search text
+            search_type (str): "manual" searches the metadata fields, "pdf"
+                               searches inside the PDFs; PDF hits carry the
+                               extra keys 'pdf_page' and 'pdf_snippet'
+        """
+        if search_type == "pdf":
+            results = []
+            for pub, page_number, snippet in self.search_pdf_text(query):
+                pub['pdf_page'] = page_number
+                pub['pdf_snippet'] = snippet
+                results.append(pub)
+            return results
+
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
-            search_term = f"%{query}%"
-            # Search across multiple fields
-            cursor.execute('''
-                SELECT * FROM publications 
-                WHERE journal_name LIKE ? 
-                   OR publication_year LIKE ?
-                   OR volume LIKE ?
-                   OR page_range LIKE ?
-                   OR title LIKE ?
-                   OR authors LIKE ?
-                   OR abstract LIKE ?
-                   OR pdf_filename LIKE ?
-                ORDER BY id DESC
-            ''', (search_term, search_term, search_term, search_term,
-                  search_term, search_term, search_term, search_term))
+            # Ranked full-text search (or LIKE scan when FTS5 is missing)
+            sql, params = self._search_sql("p.*", query)
+            cursor.execute(sql, params)
 
             rows = cursor.fetchall()
             results = [self._row_to_dict(cursor, row) for row in rows]
@@ -210,9 +670,6 @@ class PublicationDatabase:
             import traceback
             traceback.print_exc()
             return []
-        finally:
-            if conn:
-                conn.close()
 
     def update_publication(self, pub_id, journal_name=None, publication_year=None,
                            volume=None, page_range=None, title=None, authors=None,
@@ -220,7 +677,7 @@ class PublicationDatabase:
         """Update an existing publication"""
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
             cursor.execute('''
@@ -233,6 +690,7 @@ class PublicationDatabase:
 
             success = cursor.rowcount > 0
             conn.commit()
+            self.search_cache.clear()
 
             if success:
                 print(f"✓ Publication {pub_id} updated successfully")
@@ -248,20 +706,23 @@ class PublicationDatabase:
             import traceback
             traceback.print_exc()
             return False
-        finally:
-            if conn:
-                conn.close()
 
     def delete_publication(self, pub_id):
         """Delete a publication by ID"""
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
+            cursor.execute('SELECT pdf_document_id FROM publications WHERE id = ?', (pub_id,))
+            row = cursor.fetchone()
+
             cursor.execute('DELETE FROM publications WHERE id = ?', (pub_id,))
             success = cursor.rowcount > 0
+            if success:
+                self.documents.release(cursor, row[0])
             conn.commit()
+            self.search_cache.clear()
 
             if success:
                 print(f"✓ Publication {pub_id} deleted successfully")
@@ -277,9 +738,6 @@ class PublicationDatabase:
             import traceback
             traceback.print_exc()
             return False
-        finally:
-            if conn:
-                conn.close()
 
     def _row_to_dict(self, cursor, row):
         """Convert SQLite row to dictionary"""
@@ -295,26 +753,64 @@ class PublicationDatabase:
             traceback.print_exc()
             return None
 
+    def get_pdf_data(self, pub_id):
+        """Load the PDF content of a publication (only when it is needed)"""
+        try:
+            cursor = self._connect().cursor()
+            cursor.execute('SELECT pdf_document_id FROM publications WHERE id = ?', (pub_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return self.documents.read(cursor, row[0])
+        except sqlite3.Error as e:
+            print(f"✗ Database error loading PDF: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    def get_pdf_document(self, pub_id):
+        """
+        Load the PDF of a publication for viewing
+
+        Returns:
+            tuple or None: (pdf_bytes, sha256) - the stored hash keys the
+                           viewer's render and thumbnail caches
+        """
+        try:
+            cursor = self._connect().cursor()
+            cursor.execute('SELECT pdf_document_id FROM publications WHERE id = ?', (pub_id,))
+            row = cursor.fetchone()
+            info = self.documents.get_info(cursor, row[0]) if row else None
+            if info is None:
+                return None
+            return self.documents.read(cursor, row[0]), info[0]
+        except sqlite3.Error as e:
+            print(f"✗ Database error loading PDF: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+
     def export_pdf(self, pub_id, save_path=None):
         """Export PDF file from database"""
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
-            cursor.execute('SELECT pdf_data, pdf_filename FROM publications WHERE id = ?', (pub_id,))
+            cursor.execute('SELECT pdf_document_id, pdf_filename FROM publications WHERE id = ?', (pub_id,))
             result = cursor.fetchone()
 
             if result and result[0] is not None:
-                pdf_data, pdf_filename = result[0], result[1]
+                document_id, pdf_filename = result[0], result[1]
 
                 if save_path is None:
                     downloads_dir = "downloads"
                     os.makedirs(downloads_dir, exist_ok=True)
                     save_path = os.path.join(downloads_dir, pdf_filename)
 
+                # Stream the BLOB to disk instead of loading it whole
                 with open(save_path, 'wb') as file:
-                    file.write(pdf_data)
+                    self.documents.copy_to_file(cursor, document_id, file)
 
                 print(f"✓ PDF exported to: {save_path}")
                 return save_path
@@ -327,9 +823,6 @@ class PublicationDatabase:
             import traceback
             traceback.print_exc()
             return None
-        finally:
-            if conn:
-                conn.close()
 
 
 # Test the database if run directly
@@ -8,9 +8,12 @@ import tkinter as tk
 from tkinter import messagebox, filedialog
 import os
 
+from query_executor import QueryExecutor
+
 
 class PublicationFormGUI:
-    def __init__(self, parent_container, db, back_button_image, navigate_back_callback, navigate_to_callback):
+    def __init__(self, parent_container, db, back_button_image, navigate_back_callback, navigate_to_callback,
+                 executor=None):
         """Initialize the form GUI component"""
         self.parent_container = parent_container
         self.db = db
@@ -18,9 +21,15 @@ class PublicationFormGUI:
         self.navigate_back = navigate_back_callback
         self.navigate_to = navigate_to_callback
 
+        # Saving runs on a worker thread so the form keeps repainting
+        self.executor = executor if executor else QueryExecutor(parent_container)
+
         self.form_entries = {}
-        self.current_pdf_data = None
+        # Uploaded PDFs are streamed into the document store right away;
+        # the form only keeps the staged document id until it is saved
+        self.current_pdf_document_id = None
         self.current_pdf_filename = None
+        self.upload_in_progress = False
         self.pdf_status_label = None
 
     def create_submission_form(self):
@@ -295,19 +304,59 @@ class PublicationFormGUI:
             filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")]
         )
 
-        if file_path:
-            try:
-                with open(file_path, 'rb') as file:
-                    self.current_pdf_data = file.read()
-                self.current_pdf_filename = os.path.basename(file_path)
-                if self.pdf_status_label:
-                    self.pdf_status_label.config(
-                        text=f"PDF: {self.current_pdf_filename}",
-                        fg="#4CAF50"
-                    )
-                messagebox.showinfo("Success", f"PDF '{self.current_pdf_filename}' uploaded successfully!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to upload PDF: {str(e)}")
+        if not file_path:
+            return
+        if self.upload_in_progress:
+            messagebox.showwarning("Upload Running", "Please wait for the current PDF upload to finish.")
+            return
+        if not self.db:
+            messagebox.showerror("Error", "Database not available")
+            return
+
+        # Replacing an earlier upload of this form
+        self.discard_staged_pdf()
+
+        filename = os.path.basename(file_path)
+        self.upload_in_progress = True
+        self.show_pdf_status(f"Uploading {filename}...", "#FFD54F")
+
+        # Streamed into the database on the worker thread, chunk by chunk
+        self.executor.submit(
+            self.db.stage_pdf,
+            file_path,
+            on_done=lambda document_id: self.on_pdf_staged(document_id, filename),
+            on_error=self.on_pdf_upload_failed,
+            on_progress=lambda done, total: self.show_pdf_status(
+                f"Uploading {filename}... {done * 100 // max(total, 1)}%", "#FFD54F")
+        )
+
+    def on_pdf_staged(self, document_id, filename):
+        """Handle the result of a background stage_pdf call"""
+        self.upload_in_progress = False
+        self.current_pdf_document_id = document_id
+        self.current_pdf_filename = filename
+        self.show_pdf_status(f"PDF: {filename}", "#4CAF50")
+        messagebox.showinfo("Success", f"PDF '{filename}' uploaded successfully!")
+
+    def on_pdf_upload_failed(self, error):
+        self.upload_in_progress = False
+        self.show_pdf_status("No PDF uploaded", "#FFD54F")
+        messagebox.showerror("Error", f"Failed to upload PDF: {str(error)}")
+
+    def show_pdf_status(self, text, color):
+        try:
+            if self.pdf_status_label:
+                self.pdf_status_label.config(text=text, fg=color)
+        except tk.TclError:
+            # Form was closed while the upload was running
+            pass
+
+    def discard_staged_pdf(self):
+        """Release an uploaded PDF that was not saved with a publication"""
+        if self.current_pdf_document_id is not None and self.db:
+            self.executor.submit(self.db.release_pdf, self.current_pdf_document_id)
+        self.current_pdf_document_id = None
+        self.current_pdf_filename = None
 
     def save_publication(self):
         """Handle publication submission with better error handling"""
@@ -323,9 +372,13 @@ class PublicationFormGUI:
             authors = self.form_entries['authors'].get("1.0", tk.END).strip()
             abstract = self.form_entries['abstract'].get("1.0", tk.END).strip()
 
+            if self.upload_in_progress:
+                messagebox.showwarning("Upload Running", "Please wait for the PDF upload to finish.")
+                return
+
             # Check if at least one field is filled
             if not any([journal_name, publication_year, volume, page_range, title,
-                        authors, abstract, self.current_pdf_data]):
+                        authors, abstract, self.current_pdf_document_id]):
                 messagebox.showwarning("Empty Form", "Please fill in at least one field or upload a PDF file.")
                 return
 
@@ -334,8 +387,9 @@ class PublicationFormGUI:
                 messagebox.showerror("Error", "Database not available")
                 return
 
-            # Save to database
-            pub = self.db.add_publication(
+            # Save to database in the background
+            self.executor.submit(
+                self.db.add_publication,
                 journal_name=journal_name if journal_name else None,
                 publication_year=publication_year if publication_year else None,
                 volume=volume if volume else None,
@@ -343,38 +397,50 @@ class PublicationFormGUI:
                 title=title if title else None,
                 authors=authors if authors else None,
                 abstract=abstract if abstract else None,
-                pdf_data=self.current_pdf_data,
-                pdf_filename=self.current_pdf_filename
+                pdf_document_id=self.current_pdf_document_id,
+                pdf_filename=self.current_pdf_filename,
+                on_done=lambda pub: self.on_publication_saved(pub, title),
+                on_error=lambda e: messagebox.showerror(
+                    "Error", f"Failed to save publication:\n{str(e)}\n\nCheck console for details.")
             )
 
-            # Check if publication was saved successfully
-            if pub is None:
-                messagebox.showerror("Error", "Failed to save publication. Database returned None.")
-                return
-
-            if not isinstance(pub, dict) or 'id' not in pub:
-                messagebox.showerror("Error", "Failed to save publication. Invalid response from database.")
-                return
-
-            # Success message
-            messagebox.showinfo(
-                "Success",
-                f"Publication submitted successfully!\n\n"
-                f"ID: {pub.get('id', 'Unknown')}\n"
-                f"Title: {title if title else 'Not provided'}"
-            )
-
-            self.clear_form()
-            self.navigate_to("main_view")
-
         except Exception as e:
             import traceback
             error_details = traceback.format_exc()
             print(f"Error saving publication: {error_details}")
             messagebox.showerror("Error", f"Failed to save publication:\n{str(e)}\n\nCheck console for details.")
 
-    def update_publication_data(self, pub_id, entries):
-        """Update publication in database"""
+    def on_publication_saved(self, pub, title):
+        """Handle the result of a background add_publication call"""
+        # Check if publication was saved successfully
+        if pub is None:
+            messagebox.showerror("Error", "Failed to save publication. Database returned None.")
+            return
+
+        if not isinstance(pub, dict) or 'id' not in pub:
+            messagebox.showerror("Error", "Failed to save publication. Invalid response from database.")
+            return
+
+        # Success message
+        messagebox.showinfo(
+            "Success",
+            f"Publication submitted successfully!\n\n"
+            f"ID: {pub.get('id', 'Unknown')}\n"
+            f"Title: {title if title else 'Not provided'}"
+        )
+
+        # The publication now owns the staged PDF
+        self.current_pdf_document_id = None
+        self.clear_form()
+        self.navigate_to("main_view")
+
+    def update_publication_data(self, pub_id, entries, on_updated=None):
+        """
+        Update publication in database (in the background)
+
+        Args:
+            on_updated: Optional callback(publication) with the saved record
+        """
         try:
             journal_name = entries['journal_name'].get().strip()
             publication_year = entries['publication_year'].get().strip()
@@ -386,32 +452,41 @@ class PublicationFormGUI:
 
             if not self.db:
                 messagebox.showerror("Error", "Database not available")
-                return False
+                return
 
-            success = self.db.update_publication(
-                pub_id=pub_id,
+            def update_and_reload(**fields):
+                if not self.db.update_publication(pub_id=pub_id, **fields):
+                    return None
+                return self.db.get_publication(pub_id)
+
+            self.executor.submit(
+                update_and_reload,
                 journal_name=journal_name if journal_name else None,
                 publication_year=publication_year if publication_year else None,
                 volume=volume if volume else None,
                 page_range=page_range if page_range else None,
                 title=title if title else None,
                 authors=authors if authors else None,
-                abstract=abstract if abstract else None
+                abstract=abstract if abstract else None,
+                on_done=lambda pub: self.on_publication_updated(pub, on_updated),
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to update publication:\n{str(e)}")
             )
 
-            if success:
-                messagebox.showinfo("Success", "Publication updated successfully!")
-                return True
-            else:
-                messagebox.showerror("Error", "Failed to update publication")
-                return False
-
         except Exception as e:
             import traceback
             error_details = traceback.format_exc()
             print(f"Error updating publication: {error_details}")
             messagebox.showerror("Error", f"Failed to update publication:\n{str(e)}")
-            return False
+
+    def on_publication_updated(self, pub, on_updated):
+        """Handle the result of a background update"""
+        if pub is None:
+            messagebox.showerror("Error", "Failed to update publication")
+            return
+
+        messagebox.showinfo("Success", "Publication updated successfully!")
+        if on_updated:
+            on_updated(pub)
 
     def clear_form(self):
         """Clear all form fields"""
@@ -421,7 +496,5 @@ class PublicationFormGUI:
             else:
                 widget.delete(0, tk.END)
 
-        self.current_pdf_data = None
-        self.current_pdf_filename = None
-        if self.pdf_status_label:
-            self.pdf_status_label.config(text="No PDF uploaded", fg="#FFD54F")
\ No newline at end of file
+        self.discard_staged_pdf()
+        self.show_pdf_status("No PDF uploaded", "#FFD54F")
\ No newline at end of file
@@ -32,6 +32,7 @@ except ImportError:
 from publication_db_form import PublicationFormGUI
 from publication_db_results import PublicationResultsGUI
 from publication_db_pdf_viewer import PDFViewerGUI
+from query_executor import QueryExecutor
 
 
 class PublicationDatabaseGUI(tk.Frame):
@@ -49,6 +50,8 @@ class PublicationDatabaseGUI(tk.Frame):
 
         if DB_AVAILABLE:
             self.db = PublicationDatabase()
+            # Extract PDF page text in the background for "PDF Search"
+            self.db.start_pdf_indexing()
         else:
             self.db = None
 
@@ -58,6 +61,10 @@ class PublicationDatabaseGUI(tk.Frame):
         self.navigation_history = []
         self.setup_ttk_style()
 
+        # One background worker shared by the form and results screens
+        self.busy_label = None
+        self.executor = QueryExecutor(self, on_busy=self.set_busy)
+
         self.main_container = tk.Frame(self, bg="#305CDE")
         self.main_container.pack(fill="both", expand=True)
 
@@ -74,13 +81,15 @@ class PublicationDatabaseGUI(tk.Frame):
             self.db,
             self.back_button_image,
             self.navigate_back,
-            self.navigate_to
+            self.navigate_to,
+            executor=self.executor
         )
 
         self.results_gui = PublicationResultsGUI(
             self.main_view_container,
             self.db,
-            self.navigate_to
+            self.navigate_to,
+            executor=self.executor
         )
 
         # Initialize PDF viewer
@@ -158,6 +167,12 @@ class PublicationDatabaseGUI(tk.Frame):
         style.map("Vertical.TScrollbar",
                   background=[('active', '#1976D2'), ('!active', '#305CDE')])
 
+    def set_busy(self, busy):
+        """Show or hide the busy indicator while database work is running"""
+        self.config(cursor="watch" if busy else "")
+        if self.busy_label:
+            self.busy_label.config(text="⏳ Working..." if busy else "")
+
     def navigate_to(self, frame_name, *args):
         """Navigate to a specific frame and track history"""
         current_frame = self.get_current_frame_name()
@@ -304,6 +319,48 @@ class PublicationDatabaseGUI(tk.Frame):
         )
         search_desc.pack(pady=(0, 15), padx=20)
 
+        # Search type selection
+        search_type_frame = tk.Frame(self.main_view_container, bg="#305CDE")
+        search_type_frame.pack(fill=tk.X, padx=60, pady=(0, 10))
+
+        tk.Label(
+            search_type_frame,
+            text="Search Type:",
+            font=("Arial", 11, "bold"),
+            fg="white",
+            bg="#305CDE"
+        ).pack(side=tk.LEFT)
+
+        self.search_type = tk.StringVar(value="manual")
+
+        manual_radio = tk.Radiobutton(
+            search_type_frame,
+            text="Manual Search",
+            variable=self.search_type,
+            value="manual",
+            font=("Arial", 10),
+            fg="white",
+            bg="#305CDE",
+            selectcolor="#305CDE",
+            activebackground="#305CDE",
+            activeforeground="white"
+        )
+        manual_radio.pack(side=tk.LEFT, padx=(20, 10))
+
+        pdf_radio = tk.Radiobutton(
+            search_type_frame,
+            text="PDF Search",
+            variable=self.search_type,
+            value="pdf",
+            font=("Arial", 10),
+            fg="white",
+            bg="#305CDE",
+            selectcolor="#305CDE",
+            activebackground="#305CDE",
+            activeforeground="white"
+        )
+        pdf_radio.pack(side=tk.LEFT, padx=(10, 0))
+
         # Search box with button
         search_container = tk.Frame(self.main_view_container, bg="#305CDE")
         search_container.pack(fill=tk.X, padx=60, pady=(0, 20))
@@ -318,6 +375,8 @@ class PublicationDatabaseGUI(tk.Frame):
         )
         self.search_entry.pack(fill=tk.X, side=tk.LEFT, expand=True, ipady=8)
         self.search_entry.bind("<Return>", lambda e: self.results_gui.perform_search())
+        # Search as you type (debounced, served from the result cache)
+        self.search_entry.bind("<KeyRelease>", lambda e: self.results_gui.schedule_incremental_search())
 
         search_button = tk.Button(
             search_container,
@@ -349,8 +408,19 @@ class PublicationDatabaseGUI(tk.Frame):
         )
         clear_button.pack(side=tk.RIGHT, padx=(0, 10))
 
+        # Busy indicator shown while a query runs in the background
+        self.busy_label = tk.Label(
+            search_container,
+            text="",
+            font=("Arial", 9, "italic"),
+            fg="#FFD54F",
+            bg="#305CDE"
+        )
+        self.busy_label.pack(side=tk.RIGHT, padx=(0, 10))
+
         self.results_gui.parent_container = self.main_view_container
         self.results_gui.search_entry = self.search_entry
+        self.results_gui.search_type = self.search_type
 
         # Results display area
         results_label = tk.Label(
@@ -375,15 +445,29 @@ class PublicationDatabaseGUI(tk.Frame):
         self.results_gui.results_container.pack(fill=tk.BOTH, expand=True)
 
     def show_pdf_viewer(self, pub):
-        """Show PDF viewer for a publication"""
-        if not pub.get('pdf_data'):
+        """Show PDF viewer for a publication (the PDF is loaded in the background)"""
+        if pub.get('pdf_document_id') is None or not self.db:
+            messagebox.showerror("Error", "No PDF available for this publication")
+            return
+
+        self.executor.submit(
+            self.db.get_pdf_document, pub['id'],
+            on_done=lambda document: self.open_pdf_document(pub, document),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load PDF: {str(e)}"),
+            key="pdf"
+        )
+
+    def open_pdf_document(self, pub, document):
+        """Show a PDF loaded by show_pdf_viewer()"""
+        if not document:
             messagebox.showerror("Error", "No PDF available for this publication")
             return
 
         self.hide_all_frames()
 
-        # Show PDF using the viewer
-        self.pdf_viewer.show_pdf(pub['pdf_data'], pub.get('pdf_filename', 'document.pdf'))
+        # Show PDF using the viewer (bytes are loaded only now, not with the listing)
+        pdf_data, doc_hash = document
+        self.pdf_viewer.show_pdf(pdf_data, pub.get('pdf_filename', 'document.pdf'), doc_hash)
 
         self.pdf_viewer_container.pack(fill="both", expand=True)
 
@@ -457,11 +541,8 @@ class PublicationDatabaseGUI(tk.Frame):
 
     def update_publication(self, pub_id, entries):
         """Update publication in database"""
-        success = self.form_gui.update_publication_data(pub_id, entries)
-        if success and self.db:
-            updated_pub = self.db.get_publication(pub_id)
-            if updated_pub:
-                self.navigate_to("detail", updated_pub)
+        self.form_gui.update_publication_data(
+            pub_id, entries, on_updated=lambda updated_pub: self.navigate_to("detail", updated_pub))
 
     def delete_publication_confirm(self, pub):
         """Confirm and delete publication"""
@@ -472,11 +553,19 @@ class PublicationDatabaseGUI(tk.Frame):
         )
 
         if result and self.db:
-            if self.db.delete_publication(pub['id']):
-                messagebox.showinfo("Success", "Publication deleted successfully!")
-                self.navigate_to("main_view")
-            else:
-                messagebox.showerror("Error", "Failed to delete publication.")
+            self.executor.submit(
+                self.db.delete_publication, pub['id'],
+                on_done=self.on_publication_deleted,
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to delete publication: {str(e)}")
+            )
+
+    def on_publication_deleted(self, success):
+        """Report the result of a background delete_publication call"""
+        if success:
+            messagebox.showinfo("Success", "Publication deleted successfully!")
+            self.navigate_to("main_view")
+        else:
+            messagebox.showerror("Error", "Failed to delete publication.")
 
     def hide_all_frames(self):
         """Hide all frames"""
@@ -5,14 +5,44 @@ MODIFIED: Uses main application's scrollbar instead of internal scrollbar
 """
 
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import ttk, messagebox
 import fitz  # PyMuPDF
 from PIL import Image, ImageTk
 import io
+import bisect
+import hashlib
+
+from pdf_render import RenderCache, PageRenderer, ThumbnailCache
+
+
+# Pages rendered ahead of and behind the current page
+PREFETCH_PAGES = 3
+
+# Above PROGRESSIVE_MIN_ZOOM a quick render at PREVIEW_ZOOM is shown (scaled
+# up) while the full-resolution page renders in the background
+PREVIEW_ZOOM = 0.3
+PROGRESSIVE_MIN_ZOOM = 1.0
+
+# Above TILED_MIN_ZOOM only the TILE_SIZE x TILE_SIZE tiles of the page that
+# are on screen are rendered, so memory does not grow with the zoom level
+TILED_MIN_ZOOM = 1.5
+TILE_SIZE = 512
+TILE_CACHE_BYTES = 48 * 1024 * 1024
+VIEWPORT_POLL_MS = 150
+
+# Continuous-scroll mode: every page gets a placeholder slot, only pages near
+# the viewport are rendered, and page images beyond the budget are dropped
+CONTINUOUS_VIEW_HEIGHT = 800
+CONTINUOUS_PAGE_GAP = 10
+CONTINUOUS_BUDGET_BYTES = 96 * 1024 * 1024
+
+# Thumbnail sidebar: rendered at low DPI by the worker, kept on disk
+THUMBNAIL_ZOOM = 0.15
+THUMBNAIL_GAP = 8
 
 
 class PDFViewerGUI:
-    def __init__(self, parent_container, back_button_image, navigate_back_callback):
+    def __init__(self, parent_container, back_button_image, navigate_back_callback, thumbnail_dir=None):
         """
         Initialize PDF viewer component
 
@@ -20,6 +50,7 @@ class PDFViewerGUI:
             parent_container: The container frame for PDF viewer
             back_button_image: Image for back button
             navigate_back_callback: Function to navigate back
+            thumbnail_dir: Directory of the page thumbnail cache (default: user cache dir)
         """
         self.parent_container = parent_container
         self.back_button_image = back_button_image
@@ -32,13 +63,49 @@ class PDFViewerGUI:
         self.pdf_images = []  # Store PhotoImage references
         self.pdf_image_label = None  # Store reference to the label displaying PDF
 
-    def show_pdf(self, pdf_data, pdf_filename):
+        # Rendered pages survive closing the viewer, so reopening is instant
+        self.render_cache = RenderCache()
+        self.tile_cache = RenderCache(TILE_CACHE_BYTES)
+        self.renderer = None
+        self.doc_hash = None
+
+        # Page sizes in points, read once when the PDF is opened
+        self.page_sizes = []
+
+        # Tiled view: canvas replacing the label at high zoom
+        self.page_canvas = None
+        self.tiles = {}  # (column, row) -> (canvas item, PhotoImage, is_full_render)
+        self.viewport = None
+        self.viewport_job = None
+
+        # Continuous-scroll view: own canvas and scrollbar holding all page slots
+        self.continuous = False
+        self.continuous_button = None
+        self.continuous_frame = None
+        self.continuous_canvas = None
+        self.continuous_scrollbar = None
+        self.continuous_zoom = None
+        self.slot_tops = []
+        self.slot_lefts = []
+        self.slot_images = {}  # page -> (canvas item, PhotoImage, bytes)
+        self.visible_pages = set()
+        self.scroll_job = None
+
+        # Thumbnail sidebar
+        self.thumbnail_cache = ThumbnailCache(thumbnail_dir) if thumbnail_dir else ThumbnailCache()
+        self.thumbnail_canvas = None
+        self.thumbnail_slots = []  # page -> (x, y, width, height) on the sidebar canvas
+        self.thumbnail_images = {}  # page -> PhotoImage
+        self.thumbnail_marker = None
+
+    def show_pdf(self, pdf_data, pdf_filename, doc_hash=None):
         """
         Display PDF from binary data
 
         Args:
             pdf_data: Binary PDF data from database
             pdf_filename: Name of the PDF file
+            doc_hash: SHA-256 of the PDF (computed if not given), keys the render cache
         """
         # Clear existing content
         for widget in self.parent_container.winfo_children():
@@ -50,10 +117,19 @@ class PDFViewerGUI:
             return
 
         try:
-            # Open PDF from memory
+            # Open PDF from memory; the render worker opens its own document
+            # on the same bytes object, so the PDF is held in memory only once
             self.current_pdf_doc = fitz.open(stream=pdf_data, filetype="pdf")
             self.total_pages = len(self.current_pdf_doc)
             self.current_page = 0
+            self.page_sizes = [(page.rect.width, page.rect.height) for page in self.current_pdf_doc]
+
+            # Pages are rendered on a worker thread with its own document
+            if self.renderer:
+                self.renderer.close()
+            self.doc_hash = doc_hash or hashlib.sha256(pdf_data).hexdigest()
+            self.renderer = PageRenderer(self.parent_container, pdf_data, self.doc_hash,
+                                         self.render_cache, self.tile_cache)
 
             # Create PDF viewer UI
             self.create_pdf_viewer_ui(pdf_filename)
@@ -235,37 +311,502 @@ class PDFViewerGUI:
             pady=5
         ).pack(side=tk.LEFT, padx=5)
 
+        self.continuous_button = tk.Button(
+            zoom_frame,
+            text="📜 Continuous" if not self.continuous else "📄 Single Page",
+            command=self.toggle_continuous,
+            bg="#9C27B0",
+            fg="white",
+            font=("Arial", 9, "bold"),
+            cursor="hand2",
+            relief=tk.FLAT,
+            padx=10,
+            pady=5
+        )
+        self.continuous_button.pack(side=tk.LEFT, padx=5)
+
         # PDF display area - REMOVED internal Canvas and Scrollbar
         # Now just a simple frame that will use the main app's scrollbar
         pdf_display_frame = tk.Frame(self.parent_container, bg="white")
         pdf_display_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=(0, 20))
 
+        # Thumbnail sidebar on the left, page display on the right
+        self.create_thumbnail_sidebar(pdf_display_frame)
+        page_area = tk.Frame(pdf_display_frame, bg="white")
+        page_area.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
         # Label to hold the PDF image
         self.pdf_image_label = tk.Label(
-            pdf_display_frame,
+            page_area,
             bg="white"
         )
         self.pdf_image_label.pack(pady=10)
 
+        # Canvas for the tiled view at high zoom (packed instead of the label)
+        self.page_canvas = tk.Canvas(
+            page_area,
+            bg="white",
+            highlightthickness=0
+        )
+        self.tiles = {}
+
+        # Continuous-scroll view. It scrolls by itself: a frame tall enough for
+        # hundreds of pages would exceed the window size limit of the main canvas.
+        self.continuous_frame = tk.Frame(page_area, bg="#305CDE")
+        self.continuous_canvas = tk.Canvas(
+            self.continuous_frame,
+            bg="#305CDE",
+            height=CONTINUOUS_VIEW_HEIGHT,
+            highlightthickness=0,
+            yscrollincrement=40
+        )
+        self.continuous_scrollbar = ttk.Scrollbar(
+            self.continuous_frame,
+            orient=tk.VERTICAL,
+            command=self.continuous_canvas.yview,
+            style="Vertical.TScrollbar"
+        )
+        self.continuous_canvas.configure(yscrollcommand=self.on_continuous_scroll)
+        self.continuous_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.continuous_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.continuous_canvas.bind("<MouseWheel>", self.on_continuous_wheel)
+        self.continuous_canvas.bind("<Button-4>", self.on_continuous_wheel)
+        self.continuous_canvas.bind("<Button-5>", self.on_continuous_wheel)
+        self.continuous_canvas.bind("<Configure>", lambda e: self.schedule_visible_pages())
+        self.continuous_zoom = None
+        self.slot_images = {}
+
         # Display first page
         self.display_current_page()
 
     def display_current_page(self):
-        """Render and display the current PDF page"""
-        if not self.current_pdf_doc:
+        """Show the current PDF page from the render cache or the render worker"""
+        if not self.current_pdf_doc or not self.renderer:
+            return
+
+        # Requests queued for the previous page/zoom are no longer needed
+        self.renderer.new_generation()
+        self.page_info_label.config(text=f"Page {self.current_page + 1} of {self.total_pages}")
+        self.mark_thumbnail(self.current_page)
+
+        if self.continuous:
+            self.show_continuous()
+            return
+        if self.zoom_level > TILED_MIN_ZOOM:
+            self.show_tiled_page()
             return
+        self.set_display_mode("page")
+
+        image = self.renderer.cached(self.current_page, self.zoom_level)
+        if image is not None:
+            self.show_page_image(image)
+        else:
+            if self.zoom_level > PROGRESSIVE_MIN_ZOOM:
+                self.show_preview(self.current_page, self.zoom_level)
+            self.renderer.request(
+                self.current_page, self.zoom_level,
+                on_done=self.show_page_image,
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to display page: {str(e)}")
+            )
+
+        self.prefetch_pages()
 
+    def show_preview(self, page_number, zoom):
+        """
+        First pass of a progressive render: a low-DPI page scaled to the
+        final size, replaced when the full-resolution render arrives
+        """
+        def show(preview):
+            scale = zoom / PREVIEW_ZOOM
+            size = (round(preview.width * scale), round(preview.height * scale))
+            self.show_page_image(preview.resize(size, Image.BILINEAR))
+
+        preview = self.renderer.cached(page_number, PREVIEW_ZOOM)
+        if preview is not None:
+            show(preview)
+        else:
+            # Higher priority than the full render queued right after it
+            self.renderer.request(page_number, PREVIEW_ZOOM, on_done=show, priority=-1)
+
+    def page_pixel_size(self, page_number):
+        """Size in pixels of a page rendered at the current zoom"""
+        width, height = self.page_sizes[page_number]
+        return round(width * self.zoom_level), round(height * self.zoom_level)
+
+    def set_display_mode(self, mode):
+        """
+        Show the widget of one display mode and free the images of the others
+
+        Args:
+            mode (str): "page" (label), "tiled" (tile canvas) or "continuous"
+        """
+        widgets = {
+            "page": (self.pdf_image_label, {"pady": 10}),
+            "tiled": (self.page_canvas, {"pady": 10}),
+            "continuous": (self.continuous_frame, {"fill": tk.BOTH, "expand": True}),
+        }
+        for name, (widget, pack_options) in widgets.items():
+            # winfo_manager, not winfo_ismapped: the viewer may not be shown yet
+            if name == mode:
+                if not widget.winfo_manager():
+                    widget.pack(**pack_options)
+            elif widget.winfo_manager():
+                widget.pack_forget()
+
+        if mode != "page":
+            self.pdf_image_label.config(image="")
+            self.pdf_image_label.image = None
+            self.pdf_images = []
+        if mode != "tiled":
+            self.page_canvas.delete("all")
+            self.tiles = {}
+        if mode != "continuous":
+            self.continuous_canvas.delete("all")
+            self.slot_images = {}
+            self.continuous_zoom = None
+
+    def show_tiled_page(self):
+        """Lay out the current page on the tile canvas and render the visible tiles"""
+        self.set_display_mode("tiled")
+        width, height = self.page_pixel_size(self.current_page)
+        self.page_canvas.delete("all")
+        self.tiles = {}
+        self.page_canvas.config(width=width, height=height, scrollregion=(0, 0, width, height))
+
+        # Update the parent container to trigger scroll region update
+        self.parent_container.update_idletasks()
+        self.update_tiles()
+
+        if self.viewport_job is None:
+            self.viewport_job = self.page_canvas.after(VIEWPORT_POLL_MS, self.watch_viewport)
+
+    def visible_region(self):
+        """
+        Part of the tile canvas that is on screen, in canvas pixels
+
+        The viewer scrolls inside the main application's canvas, so the
+        canvas rectangle is clipped by every ancestor widget.
+
+        Returns:
+            tuple or None: (x0, y0, x1, y1), or None if nothing is visible
+        """
+        canvas = self.page_canvas
+        origin_x, origin_y = canvas.winfo_rootx(), canvas.winfo_rooty()
+        left, top = origin_x, origin_y
+        right, bottom = origin_x + canvas.winfo_width(), origin_y + canvas.winfo_height()
+
+        widget = canvas.master
+        while widget is not None:
+            x, y = widget.winfo_rootx(), widget.winfo_rooty()
+            left, top = max(left, x), max(top, y)
+            right = min(right, x + widget.winfo_width())
+            bottom = min(bottom, y + widget.winfo_height())
+            widget = widget.master
+
+        if right <= left or bottom <= top:
+            return None
+        return left - origin_x, top - origin_y, right - origin_x, bottom - origin_y
+
+    def watch_viewport(self):
+        """Re-render tiles when the visible part of the page changes (scrolling)"""
+        self.viewport_job = None
         try:
-            # Get the current page
-            page = self.current_pdf_doc[self.current_page]
+            if not self.renderer or not self.page_canvas.winfo_manager():
+                return
+            if self.visible_region() != self.viewport:
+                # Tiles queued for the old viewport are no longer needed
+                self.renderer.new_generation()
+                self.update_tiles()
+            self.viewport_job = self.page_canvas.after(VIEWPORT_POLL_MS, self.watch_viewport)
+        except tk.TclError:
+            # Viewer was closed
+            pass
+
+    def update_tiles(self):
+        """Render the tiles around the viewport and drop the ones far from it"""
+        self.viewport = self.visible_region()
+        if self.viewport is None:
+            return
 
-            # Render page to pixmap with zoom
-            mat = fitz.Matrix(self.zoom_level, self.zoom_level)
-            pix = page.get_pixmap(matrix=mat)
+        page_number, zoom = self.current_page, self.zoom_level
+        width, height = self.page_pixel_size(page_number)
+        x0, y0, x1, y1 = self.viewport
+        margin = TILE_SIZE // 2
+        columns = range(max(0, (x0 - margin) // TILE_SIZE), min(width - 1, x1 + margin) // TILE_SIZE + 1)
+        rows = range(max(0, (y0 - margin) // TILE_SIZE), min(height - 1, y1 + margin) // TILE_SIZE + 1)
+        wanted = {(column, row) for column in columns for row in rows}
+
+        # Free the images of tiles that scrolled away so memory stays flat
+        for tile in list(self.tiles):
+            if tile not in wanted:
+                self.page_canvas.delete(self.tiles.pop(tile)[0])
+
+        preview = self.renderer.cached(page_number, PREVIEW_ZOOM)
+        if preview is None:
+            # Low-DPI page used as placeholder for tiles until they render
+            self.renderer.request(page_number, PREVIEW_ZOOM, on_done=lambda image: self.update_tiles(),
+                                  priority=-1)
+
+        # Tiles nearest to the middle of the viewport first
+        center_x, center_y = (x0 + x1) / 2, (y0 + y1) / 2
+        for column, row in sorted(wanted, key=lambda t: abs((t[0] + 0.5) * TILE_SIZE - center_x) +
+                                  abs((t[1] + 0.5) * TILE_SIZE - center_y)):
+            if (column, row) in self.tiles and self.tiles[(column, row)][2]:
+                continue
+            clip = (column * TILE_SIZE, row * TILE_SIZE,
+                    min(width, (column + 1) * TILE_SIZE), min(height, (row + 1) * TILE_SIZE))
+
+            image = self.renderer.cached(page_number, zoom, clip=clip)
+            if image is not None:
+                self.place_tile(column, row, image, True)
+                continue
+
+            if preview is not None and (column, row) not in self.tiles:
+                scale = PREVIEW_ZOOM / zoom
+                box = (min(round(clip[0] * scale), preview.width - 1), min(round(clip[1] * scale), preview.height - 1),
+                       min(round(clip[2] * scale), preview.width), min(round(clip[3] * scale), preview.height))
+                placeholder = preview.crop(box).resize((clip[2] - clip[0], clip[3] - clip[1]), Image.BILINEAR)
+                self.place_tile(column, row, placeholder, False)
+            self.renderer.request(
+                page_number, zoom, clip=clip,
+                on_done=lambda image, c=column, r=row: self.place_tile(c, r, image, True)
+            )
+
+    def place_tile(self, column, row, image, full):
+        """Show one tile image on the canvas, replacing its placeholder"""
+        old = self.tiles.get((column, row))
+        if old:
+            if old[2] and not full:
+                return
+            self.page_canvas.delete(old[0])
+        photo = ImageTk.PhotoImage(image)
+        item = self.page_canvas.create_image(column * TILE_SIZE, row * TILE_SIZE, image=photo, anchor="nw")
+        self.tiles[(column, row)] = (item, photo, full)
+
+    def toggle_continuous(self):
+        """Switch between single-page and continuous-scroll mode"""
+        self.continuous = not self.continuous
+        self.continuous_button.config(text="📄 Single Page" if self.continuous else "📜 Continuous")
+        self.display_current_page()
 
-            # Convert to PIL Image
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    def show_continuous(self):
+        """Lay out one placeholder slot per page and scroll to the current page"""
+        self.set_display_mode("continuous")
+        canvas = self.continuous_canvas
+
+        if self.continuous_zoom != self.zoom_level:
+            # Slots are sized from the page rectangles; nothing is rendered here
+            canvas.delete("all")
+            self.slot_images = {}
+            self.slot_tops, self.slot_lefts = [], []
+            sizes = [self.page_pixel_size(page_number) for page_number in range(self.total_pages)]
+            max_width = max((width for width, _ in sizes), default=0)
+
+            y = CONTINUOUS_PAGE_GAP
+            for page_number, (width, height) in enumerate(sizes):
+                x = CONTINUOUS_PAGE_GAP + (max_width - width) // 2
+                self.slot_tops.append(y)
+                self.slot_lefts.append(x)
+                canvas.create_rectangle(x, y, x + width, y + height, fill="white", outline="#1E40AF")
+                canvas.create_text(x + width // 2, y + height // 2, text=f"Page {page_number + 1}",
+                                   fill="#9E9E9E", font=("Arial", 14))
+                y += height + CONTINUOUS_PAGE_GAP
+
+            canvas.config(width=max_width + 2 * CONTINUOUS_PAGE_GAP, scrollregion=(0, 0, max_width + 2 * CONTINUOUS_PAGE_GAP, y))
+            self.continuous_zoom = self.zoom_level
+            self.parent_container.update_idletasks()
 
+        self.scroll_to_page(self.current_page)
+
+    def scroll_to_page(self, page_number):
+        """Scroll the continuous view so page_number is at the top"""
+        scrollregion = self.continuous_canvas.cget("scrollregion").split()
+        total_height = float(scrollregion[3]) if scrollregion else 0
+        if total_height > 0:
+            self.continuous_canvas.yview_moveto((self.slot_tops[page_number] - CONTINUOUS_PAGE_GAP) / total_height)
+        self.schedule_visible_pages()
+
+    def on_continuous_scroll(self, first, last):
+        """yscrollcommand of the continuous view"""
+        self.continuous_scrollbar.set(first, last)
+        self.schedule_visible_pages()
+
+    def on_continuous_wheel(self, event):
+        """Scroll the continuous view with the mouse wheel (Windows/macOS and X11)"""
+        if event.num == 4 or event.delta > 0:
+            self.continuous_canvas.yview_scroll(-1, "units")
+        elif event.num == 5 or event.delta < 0:
+            self.continuous_canvas.yview_scroll(1, "units")
+        return "break"
+
+    def schedule_visible_pages(self):
+        """Coalesce scroll events into one update of the rendered pages"""
+        if self.scroll_job is None and self.continuous_canvas is not None:
+            self.scroll_job = self.continuous_canvas.after(50, self.update_visible_pages)
+
+    def update_visible_pages(self):
+        """Render the pages in (and next to) the viewport of the continuous view"""
+        self.scroll_job = None
+        if not self.continuous or not self.renderer or not self.slot_tops:
+            return
+
+        canvas = self.continuous_canvas
+        top = canvas.canvasy(0)
+        bottom = canvas.canvasy(max(canvas.winfo_height(), 1))
+
+        # Pages overlapping the viewport (slot_tops is sorted)
+        first = max(0, bisect.bisect_right(self.slot_tops, top) - 1)
+        last = max(first, bisect.bisect_left(self.slot_tops, bottom) - 1)
+        visible = list(range(first, last + 1))
+        nearby = [page for page in (first - 1, last + 1) if 0 <= page < self.total_pages]
+
+        # The page whose top edge is at the top of the view (after the gap)
+        self.current_page = max(0, bisect.bisect_right(self.slot_tops, top + CONTINUOUS_PAGE_GAP) - 1)
+        self.page_info_label.config(text=f"Page {self.current_page + 1} of {self.total_pages}")
+        self.mark_thumbnail(self.current_page)
+
+        # Pages that scrolled out of view no longer need rendering
+        self.renderer.new_generation()
+        for priority, page_number in enumerate(visible + nearby):
+            if page_number in self.slot_images:
+                continue
+            image = self.renderer.cached(page_number, self.zoom_level)
+            if image is not None:
+                self.place_page(page_number, image)
+            else:
+                self.renderer.request(
+                    page_number, self.zoom_level, priority=priority,
+                    on_done=lambda image, p=page_number: self.place_page(p, image)
+                )
+
+        self.visible_pages = set(visible)
+        self.trim_page_images()
+
+    def place_page(self, page_number, image):
+        """Draw a rendered page into its slot of the continuous view"""
+        if page_number in self.slot_images or self.continuous_zoom != self.zoom_level:
+            return
+        photo = ImageTk.PhotoImage(image)
+        item = self.continuous_canvas.create_image(
+            self.slot_lefts[page_number], self.slot_tops[page_number], image=photo, anchor="nw")
+        # Tk keeps photo images as 32-bit pixels
+        self.slot_images[page_number] = (item, photo, image.width * image.height * 4)
+        self.trim_page_images()
+
+    def trim_page_images(self):
+        """Drop the page images farthest from the viewport while over the budget"""
+        total = sum(entry[2] for entry in self.slot_images.values())
+        for page_number in sorted(self.slot_images, key=lambda p: -abs(p - self.current_page)):
+            if total <= CONTINUOUS_BUDGET_BYTES:
+                break
+            if page_number in self.visible_pages:
+                continue
+            item, _, size = self.slot_images.pop(page_number)
+            self.continuous_canvas.delete(item)
+            total -= size
+
+    def create_thumbnail_sidebar(self, parent):
+        """Scrollable strip of page thumbnails; click a thumbnail to open that page"""
+        sidebar = tk.Frame(parent, bg="#1E40AF")
+        sidebar.pack(side=tk.LEFT, fill=tk.Y)
+
+        max_width = max((width for width, _ in self.page_sizes), default=0)
+        self.thumbnail_canvas = tk.Canvas(
+            sidebar,
+            bg="#1E40AF",
+            width=round(max_width * THUMBNAIL_ZOOM) + 2 * THUMBNAIL_GAP,
+            height=CONTINUOUS_VIEW_HEIGHT,
+            highlightthickness=0,
+            yscrollincrement=20
+        )
+        scrollbar = ttk.Scrollbar(sidebar, orient=tk.VERTICAL, command=self.thumbnail_canvas.yview,
+                                  style="Vertical.TScrollbar")
+        self.thumbnail_canvas.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.thumbnail_canvas.pack(side=tk.LEFT, fill=tk.Y)
+
+        def wheel(event):
+            step = -1 if (event.num == 4 or event.delta > 0) else 1
+            self.thumbnail_canvas.yview_scroll(step, "units")
+            return "break"
+
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.thumbnail_canvas.bind(sequence, wheel)
+
+        # Placeholder slot per page, filled as thumbnails arrive
+        self.thumbnail_slots = []
+        self.thumbnail_images = {}
+        y = THUMBNAIL_GAP
+        for page_number, (width, height) in enumerate(self.page_sizes):
+            thumb_width, thumb_height = round(width * THUMBNAIL_ZOOM), round(height * THUMBNAIL_ZOOM)
+            x = THUMBNAIL_GAP + (round(max_width * THUMBNAIL_ZOOM) - thumb_width) // 2
+            self.thumbnail_slots.append((x, y, thumb_width, thumb_height))
+            tag = f"thumb{page_number}"
+            self.thumbnail_canvas.create_rectangle(x, y, x + thumb_width, y + thumb_height,
+                                                   fill="white", outline="", tags=(tag,))
+            self.thumbnail_canvas.create_text(x + thumb_width // 2, y + thumb_height + 8,
+                                              text=str(page_number + 1), fill="white",
+                                              font=("Arial", 8), tags=(tag,))
+            self.thumbnail_canvas.tag_bind(tag, "<Button-1>",
+                                           lambda e, p=page_number: self.go_to_page(p))
+            y += thumb_height + 16 + THUMBNAIL_GAP
+        self.thumbnail_canvas.config(scrollregion=(0, 0, round(max_width * THUMBNAIL_ZOOM) + 2 * THUMBNAIL_GAP, y))
+        self.thumbnail_marker = None
+
+        # Thumbnails load from the disk cache or render after the visible pages
+        for page_number in range(self.total_pages):
+            self.renderer.request_thumbnail(
+                page_number, THUMBNAIL_ZOOM, self.thumbnail_cache,
+                on_done=lambda image, p=page_number: self.place_thumbnail(p, image),
+                priority=1000 + page_number
+            )
+
+    def place_thumbnail(self, page_number, image):
+        """Draw a finished thumbnail over its placeholder"""
+        if page_number >= len(self.thumbnail_slots):
+            return
+        x, y, _, _ = self.thumbnail_slots[page_number]
+        photo = ImageTk.PhotoImage(image)
+        self.thumbnail_images[page_number] = photo
+        self.thumbnail_canvas.create_image(x, y, image=photo, anchor="nw", tags=(f"thumb{page_number}",))
+        if self.thumbnail_marker:
+            self.thumbnail_canvas.tag_raise(self.thumbnail_marker)
+
+    def mark_thumbnail(self, page_number):
+        """Outline the current page's thumbnail and keep it in view"""
+        if not self.thumbnail_canvas or page_number >= len(self.thumbnail_slots):
+            return
+        x0, y0, width, height = self.thumbnail_slots[page_number]
+        x1, y1 = x0 + width, y0 + height
+        if self.thumbnail_marker:
+            self.thumbnail_canvas.coords(self.thumbnail_marker, x0 - 3, y0 - 3, x1 + 3, y1 + 3)
+        else:
+            self.thumbnail_marker = self.thumbnail_canvas.create_rectangle(
+                x0 - 3, y0 - 3, x1 + 3, y1 + 3, outline="#FFD54F", width=3)
+
+        scrollregion = self.thumbnail_canvas.cget("scrollregion").split()
+        total_height = float(scrollregion[3]) if scrollregion else 0
+        view_top = self.thumbnail_canvas.canvasy(0)
+        view_bottom = self.thumbnail_canvas.canvasy(self.thumbnail_canvas.winfo_height())
+        if total_height > 0 and (y0 < view_top or y1 > view_bottom):
+            self.thumbnail_canvas.yview_moveto(max(0, y0 - THUMBNAIL_GAP) / total_height)
+
+    def go_to_page(self, page_number):
+        """Open a page (thumbnail click)"""
+        self.current_page = page_number
+        self.display_current_page()
+
+    def prefetch_pages(self):
+        """Render the next and previous PREFETCH_PAGES pages in the background"""
+        for distance in range(1, PREFETCH_PAGES + 1):
+            for page_number in (self.current_page + distance, self.current_page - distance):
+                if 0 <= page_number < self.total_pages and \
+                        self.renderer.cached(page_number, self.zoom_level) is None:
+                    self.renderer.request(page_number, self.zoom_level, priority=distance)
+
+    def show_page_image(self, img):
+        """Display a rendered page (PIL image) in the viewer"""
+        try:
             # Convert to PhotoImage
             photo = ImageTk.PhotoImage(img)
 
@@ -277,9 +818,6 @@ class PDFViewerGUI:
                 self.pdf_image_label.config(image=photo)
                 self.pdf_image_label.image = photo  # Keep a reference
 
-            # Update page info
-            self.page_info_label.config(text=f"Page {self.current_page + 1} of {self.total_pages}")
-
             # Update the parent container to trigger scroll region update
             self.parent_container.update_idletasks()
 
@@ -330,6 +868,10 @@ class PDFViewerGUI:
 
     def close_pdf(self):
         """Close PDF and navigate back"""
+        if self.renderer:
+            self.renderer.close()
+            self.renderer = None
+        self.tiles = {}
         if self.current_pdf_doc:
             self.current_pdf_doc.close()
             self.current_pdf_doc = None
@@ -7,18 +7,48 @@ UPDATED: Fixed white background to match blue theme
 import tkinter as tk
 from tkinter import messagebox, filedialog
 
+from virtual_list import VirtualResultsList
+from query_executor import QueryExecutor
+
+
+# Number of results fetched and shown per page
+PAGE_SIZE = 200
+
+# Search-as-you-type: wait this long after the last keystroke, and only
+# search once the query has this many characters
+SEARCH_DEBOUNCE_MS = 250
+INCREMENTAL_MIN_CHARS = 2
+
 
 class PublicationResultsGUI:
-    def __init__(self, parent_container, db, navigate_to_callback):
+    def __init__(self, parent_container, db, navigate_to_callback, executor=None):
         """Initialize the results GUI component"""
         self.parent_container = parent_container
         self.db = db
         self.navigate_to = navigate_to_callback
 
+        # Database calls run on a worker thread so the window keeps repainting
+        self.executor = executor if executor else QueryExecutor(parent_container)
+
         self.search_entry = None
+        self.search_type = None
         self.results_label_ref = None
         self.results_frame_ref = None
         self.results_container = None
+        self.results_list = None
+
+        # Keyset paging state: page_cursors[i] is the cursor (after) of page i
+        self.current_query = None
+        self.current_label = ""
+        self.total_results = None
+        self.page_cursors = [None]
+        self.page_index = 0
+        self.has_next_page = False
+
+        # Search-as-you-type: hits of the typed query, paged in memory
+        self.current_results = None
+        self.typed_query = ""
+        self.debounce_id = None
 
     def perform_search(self):
         """Perform search based on query"""
@@ -27,16 +57,182 @@ class PublicationResultsGUI:
             return
 
         query = self.search_entry.get().strip()
+        self.cancel_incremental_search(query)
 
         if not query:
             messagebox.showwarning("Empty Search", "Please enter a search term")
             return
 
-        if self.db:
-            results = self.db.search_publications(query)
-            self.display_results(results, query)
-        else:
+        if not self.db:
             messagebox.showerror("Error", "Database not available")
+        elif self.is_pdf_search():
+            self.start_pdf_search(query)
+        else:
+            self.start_listing(query, query)
+
+    def is_pdf_search(self):
+        return self.search_type is not None and self.search_type.get() == "pdf"
+
+    def start_pdf_search(self, query):
+        """Search the text of the stored PDFs and page through the hits"""
+        def on_done(results):
+            # Full records carry the document id instead of the listing flag
+            for pub in results:
+                pub['has_pdf'] = pub.get('pdf_document_id') is not None
+            self.current_query = None
+            self.current_label = f"PDF: {query}"
+            self.total_results = len(results)
+            self.current_results = results
+            self.show_page(0)
+
+        self.executor.submit(self.db.search_publications, query, "pdf", on_done=on_done, key="listing")
+
+    def schedule_incremental_search(self):
+        """Restart the debounce timer when the search box text changed"""
+        query = self.search_entry.get().strip()
+        if query == self.typed_query or self.is_pdf_search():
+            return
+        self.cancel_incremental_search(query)
+        self.debounce_id = self.search_entry.after(SEARCH_DEBOUNCE_MS, self.run_incremental_search)
+
+    def cancel_incremental_search(self, query):
+        """Forget a pending keystroke search (Return/Search runs its own)"""
+        self.typed_query = query
+        if self.debounce_id:
+            self.search_entry.after_cancel(self.debounce_id)
+            self.debounce_id = None
+
+    def run_incremental_search(self):
+        """Search for the typed query, served from the result cache when possible"""
+        self.debounce_id = None
+        query = self.typed_query
+
+        if len(query) < INCREMENTAL_MIN_CHARS or not self.db:
+            # Drop the result of a search for text that is gone
+            self.executor.cancel("listing")
+            return
+
+        def on_done(results):
+            if results is None:
+                # Too many hits to keep in memory - page through them instead
+                self.start_listing(query, query)
+                return
+            self.current_query = query
+            self.current_label = query
+            self.total_results = len(results)
+            self.current_results = results
+            self.show_page(0)
+
+        self.executor.submit(self.db.quick_search_summaries, query, on_done=on_done, key="listing")
+
+    def start_listing(self, query, label):
+        """
+        Show the first page of a search (query=None lists everything)
+
+        Only the page being shown is fetched from the database, in the
+        background; a newer search supersedes one still running.
+        """
+        def load_first_page():
+            total = self.db.count_publications(query)
+            return total, self.db.get_publication_summary_page(query, None, PAGE_SIZE)
+
+        def on_done(result):
+            total, page = result
+            self.current_query = query
+            self.current_label = label
+            self.total_results = total
+            self.page_cursors = [None]
+            self.current_results = None
+            self.display_page(0, page)
+
+        self.executor.submit(load_first_page, on_done=on_done, key="listing")
+
+    def show_page(self, page_index):
+        """Fetch and display one page of the current listing"""
+        if self.current_results is not None:
+            start = page_index * PAGE_SIZE
+            self.page_index = page_index
+            self.has_next_page = start + PAGE_SIZE < len(self.current_results)
+            self.display_results(self.current_results[start:start + PAGE_SIZE], self.current_label)
+            return
+
+        self.executor.submit(
+            self.db.get_publication_summary_page,
+            self.current_query, self.page_cursors[page_index], PAGE_SIZE,
+            on_done=lambda page: self.display_page(page_index, page),
+            key="listing"
+        )
+
+    def display_page(self, page_index, page):
+        """Display a fetched (results, next_after) page"""
+        results, next_after = page
+
+        self.page_index = page_index
+        self.has_next_page = next_after is not None
+        if self.has_next_page and len(self.page_cursors) == page_index + 1:
+            self.page_cursors.append(next_after)
+
+        self.display_results(results, self.current_label)
+
+    def create_pager(self):
+        """Previous/Next page buttons under the results"""
+        pager_frame = tk.Frame(self.results_container, bg="#305CDE")
+        pager_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+
+        if self.page_index > 0:
+            tk.Button(
+                pager_frame,
+                text="◀ Previous",
+                command=lambda: self.show_page(self.page_index - 1),
+                bg="#2196F3",
+                fg="white",
+                font=("Arial", 9, "bold"),
+                cursor="hand2",
+                relief=tk.FLAT,
+                bd=0,
+                padx=10,
+                pady=3
+            ).pack(side=tk.LEFT)
+
+        if self.has_next_page:
+            tk.Button(
+                pager_frame,
+                text="Next ▶",
+                command=lambda: self.show_page(self.page_index + 1),
+                bg="#2196F3",
+                fg="white",
+                font=("Arial", 9, "bold"),
+                cursor="hand2",
+                relief=tk.FLAT,
+                bd=0,
+                padx=10,
+                pady=3
+            ).pack(side=tk.RIGHT)
+
+    def load_full_record(self, pub, on_loaded):
+        """Pass the full publication record of a listing summary to on_loaded (loaded in the background)"""
+        if isinstance(pub, dict):
+            on_loaded(pub)
+            return
+        if not self.db:
+            return
+
+        def on_done(full_pub):
+            if full_pub is None:
+                messagebox.showerror("Error", "Publication not found. It may have been deleted.")
+            else:
+                on_loaded(full_pub)
+
+        self.executor.submit(
+            self.db.get_publication, pub['id'],
+            on_done=on_done,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load publication: {str(e)}"),
+            key="record"
+        )
+
+    def open_record(self, frame_name, pub):
+        """Navigate to the detail/edit view, loading the full record only now"""
+        self.load_full_record(pub, lambda full_pub: self.navigate_to(frame_name, full_pub))
 
     def format_publication(self, pub):
         """Format publication for display - ONLY TITLE"""
@@ -67,9 +263,15 @@ class PublicationResultsGUI:
             )
             no_results_label.pack(anchor="w", fill=tk.X)
         else:
+            page_offset = self.page_index * PAGE_SIZE
+            total = self.total_results if self.total_results is not None else len(results)
+            header_text = f"Found {total} result(s) for '{query}'"
+            if total > len(results):
+                header_text += f" (showing {page_offset + 1}-{page_offset + len(results)})"
+
             header_label = tk.Label(
                 self.results_container,
-                text=f"Found {len(results)} result(s) for '{query}':\n",
+                text=f"{header_text}:\n",
                 font=("Arial", 10, "bold"),
                 fg="white",
                 bg="#305CDE",
@@ -79,87 +281,37 @@ class PublicationResultsGUI:
             )
             header_label.pack(anchor="w", fill=tk.X)
 
-            for idx, pub in enumerate(results, 1):
-                formatted_text = self.format_publication(pub)
-
-                result_frame = tk.Frame(self.results_container, bg="#305CDE", pady=5)
-                result_frame.pack(anchor="w", fill=tk.X, padx=10)
-
-                number_label = tk.Label(
-                    result_frame,
-                    text=f"{idx}.",
-                    font=("Arial", 9, "bold"),
-                    fg="white",
-                    bg="#305CDE"
-                )
-                number_label.pack(side=tk.LEFT, padx=(0, 5))
-
-                result_label = tk.Label(
-                    result_frame,
-                    text=formatted_text,
-                    font=("Arial", 9, "underline"),
-                    fg="#4CAF50",
-                    bg="#305CDE",
-                    cursor="hand2",
-                    wraplength=400
-                )
-                result_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
-                result_label.bind("<Button-1>", lambda e, p=pub: self.navigate_to("detail", p))
-                result_label.bind("<Enter>", lambda e, lbl=result_label: lbl.config(fg="#66BB6A"))
-                result_label.bind("<Leave>", lambda e, lbl=result_label: lbl.config(fg="#4CAF50"))
-
-                button_frame = tk.Frame(result_frame, bg="#305CDE")
-                button_frame.pack(side=tk.RIGHT, padx=(10, 0))
-
-                if pub.get('pdf_data') is not None:
-                    pdf_button = tk.Button(
-                        button_frame,
-                        text="📥 PDF",
-                        command=lambda p=pub: self.download_pdf(p),
-                        bg="#FF9800",
-                        fg="white",
-                        font=("Arial", 8, "bold"),
-                        cursor="hand2",
-                        relief=tk.FLAT,
-                        bd=0,
-                        padx=8,
-                        pady=2
-                    )
-                    pdf_button.pack(side=tk.LEFT, padx=(0, 5))
-
-                edit_button = tk.Button(
-                    button_frame,
-                    text="Edit",
-                    command=lambda p=pub: self.navigate_to("edit", p),
-                    bg="#2196F3",
-                    fg="white",
-                    font=("Arial", 8, "bold"),
-                    cursor="hand2",
-                    relief=tk.FLAT,
-                    bd=0,
-                    padx=10,
-                    pady=3
-                )
-                edit_button.pack(side=tk.LEFT, padx=(0, 5))
-
-                delete_button = tk.Button(
-                    button_frame,
-                    text="Delete",
-                    command=lambda p=pub: self.delete_with_confirm(p),
-                    bg="#F44336",
-                    fg="white",
-                    font=("Arial", 8, "bold"),
-                    cursor="hand2",
-                    relief=tk.FLAT,
-                    bd=0,
-                    padx=10,
-                    pady=3
-                )
-                delete_button.pack(side=tk.LEFT)
-
-                if idx < len(results):
-                    separator = tk.Frame(self.results_container, bg="#1E3A8A", height=1)
-                    separator.pack(fill=tk.X, padx=20, pady=3)
+            columns = [
+                ("number", "#", 50, False),
+                ("title", "Title", 380, True),
+                ("authors", "Authors", 200, True),
+                ("pdf", "PDF", 50, False),
+            ]
+            pdf_matches = any(pub.get('pdf_snippet') for pub in results)
+            if pdf_matches:
+                columns.append(("match", "PDF Match", 300, True))
+
+            self.results_list = VirtualResultsList(
+                self.results_container,
+                columns=columns,
+                on_open=lambda p: self.open_record("detail", p),
+                actions=[
+                    ("📥 PDF", "#FF9800", self.download_pdf, lambda p: p.get('has_pdf')),
+                    ("Edit", "#2196F3", lambda p: self.open_record("edit", p), None),
+                    ("Delete", "#F44336", self.delete_with_confirm, None),
+                ]
+            )
+            self.results_list.pack(fill=tk.BOTH, expand=True, padx=10)
+            self.results_list.set_rows(results, lambda idx, pub: (
+                f"{page_offset + idx}.",
+                self.format_publication(pub),
+                pub.get('authors') or "",
+                "📄" if pub.get('has_pdf') else ""
+            ) + ((f"p. {pub['pdf_page']}: {pub['pdf_snippet']}" if pub.get('pdf_snippet') else "",)
+                 if pdf_matches else ()))
+
+            if self.page_index > 0 or self.has_next_page:
+                self.create_pager()
 
     def display_publication_details(self, detail_container, pub, navigate_to_callback,
                                    delete_callback, back_button_image=None, view_pdf_callback=None):
@@ -231,7 +383,7 @@ class PublicationResultsGUI:
         button_frame.pack(pady=30)
 
         # View PDF button (NEW!)
-        if pub.get('pdf_data') is not None and view_pdf_callback:
+        if pub.get('pdf_document_id') is not None and view_pdf_callback:
             view_pdf_button = tk.Button(
                 button_frame,
                 text="View PDF",
@@ -248,7 +400,7 @@ class PublicationResultsGUI:
             view_pdf_button.pack(side=tk.LEFT, padx=10)
 
         # Download PDF button
-        if pub.get('pdf_data') is not None:
+        if pub.get('pdf_document_id') is not None:
             pdf_button = tk.Button(
                 button_frame,
                 text="Download PDF",
@@ -294,6 +446,10 @@ class PublicationResultsGUI:
 
     def download_pdf(self, pub):
         """Download PDF file from database"""
+        self.load_full_record(pub, self.save_pdf_as)
+
+    def save_pdf_as(self, pub):
+        """Ask for a file name and export the PDF of a full record there"""
         if self.db:
             save_path = filedialog.asksaveasfilename(
                 title="Save PDF As",
@@ -303,14 +459,18 @@ class PublicationResultsGUI:
             )
 
             if save_path:
-                try:
-                    exported_path = self.db.export_pdf(pub['id'], save_path)
-                    if exported_path:
-                        messagebox.showinfo("Success", f"PDF downloaded successfully!\nSaved to: {exported_path}")
-                    else:
-                        messagebox.showerror("Error", "Failed to download PDF. File may not exist.")
-                except Exception as e:
-                    messagebox.showerror("Error", f"Failed to download PDF: {str(e)}")
+                self.executor.submit(
+                    self.db.export_pdf, pub['id'], save_path,
+                    on_done=self.on_pdf_exported,
+                    on_error=lambda e: messagebox.showerror("Error", f"Failed to download PDF: {str(e)}")
+                )
+
+    def on_pdf_exported(self, exported_path):
+        """Report the result of a background PDF export"""
+        if exported_path:
+            messagebox.showinfo("Success", f"PDF downloaded successfully!\nSaved to: {exported_path}")
+        else:
+            messagebox.showerror("Error", "Failed to download PDF. File may not exist.")
 
     def delete_with_confirm(self, pub):
         """Delete publication with confirmation"""
@@ -321,12 +481,20 @@ class PublicationResultsGUI:
         )
 
         if result and self.db:
-            if self.db.delete_publication(pub['id']):
-                messagebox.showinfo("Success", "Publication deleted successfully!")
-                # Clear results instead of showing all
-                for widget in self.results_container.winfo_children():
-                    widget.destroy()
-                self.results_label_ref.pack_forget()
-                self.results_frame_ref.pack_forget()
-            else:
-                messagebox.showerror("Error", "Failed to delete publication.")
\ No newline at end of file
+            self.executor.submit(
+                self.db.delete_publication, pub['id'],
+                on_done=self.on_publication_deleted,
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to delete publication: {str(e)}")
+            )
+
+    def on_publication_deleted(self, success):
+        """Report the result of a background delete_publication call"""
+        if success:
+            messagebox.showinfo("Success", "Publication deleted successfully!")
+            # Clear results instead of showing all
+            for widget in self.results_container.winfo_children():
+                widget.destroy()
+            self.results_label_ref.pack_forget()
+            self.results_frame_ref.pack_forget()
+        else:
+            messagebox.showerror("Error", "Failed to delete publication.")
\ No newline at end of file
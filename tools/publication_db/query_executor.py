@@ -0,0 +1,171 @@
+# query_executor.py
+"""
+Query Executor Module
+Runs database calls on a worker thread so the Tk main loop keeps repainting.
+Results are handed back on the Tk thread by polling a queue with after().
+"""
+
+import threading
+import queue
+import traceback
+import tkinter as tk
+from tkinter import messagebox
+
+
+class QueryJob:
+    """A submitted call and the callbacks that receive its outcome"""
+
+    __slots__ = ('func', 'args', 'kwargs', 'on_done', 'on_error', 'on_progress', 'key', 'generation')
+
+    def __init__(self, func, args, kwargs, on_done, on_error, on_progress, key, generation):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.key = key
+        self.generation = generation
+
+
+class QueryExecutor:
+    """
+    Single background worker for database calls.
+
+    submit() returns immediately; on_done(result) or on_error(exception) is
+    called later on the Tk thread. Jobs submitted with the same key supersede
+    each other: only the newest one's callback runs, and queued older jobs
+    are skipped without touching the database.
+    """
+
+    def __init__(self, widget, on_busy=None, poll_ms=50):
+        """
+        Initialize the executor
+
+        Args:
+            widget: Any Tk widget, used for after() polling
+            on_busy: Optional callback(bool) to show/hide a busy indicator
+            poll_ms (int): Result queue polling interval in milliseconds
+        """
+        self.widget = widget
+        self.on_busy = on_busy
+        self.poll_ms = poll_ms
+
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._polling = False
+
+        self._thread = threading.Thread(target=self._run, name="db-query-executor", daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args, on_done=None, on_error=None, on_progress=None, key=None, **kwargs):
+        """
+        Run func(*args, **kwargs) on the worker thread
+
+        Args:
+            func: Callable to run (typically a database method)
+            on_done: Callback(result) run on the Tk thread
+            on_error: Callback(exception) run on the Tk thread (default: error dialog)
+            on_progress: Callback(*args) run on the Tk thread; when given, func
+                         receives a progress=report(*args) keyword argument
+            key (str): Jobs sharing a key cancel the older ones (e.g. "search")
+        """
+        with self._lock:
+            generation = self._generations.get(key, 0) + 1
+            if key is not None:
+                self._generations[key] = generation
+            self._pending += 1
+
+        self._jobs.put(QueryJob(func, args, kwargs, on_done, on_error, on_progress, key, generation))
+
+        if not self._polling:
+            self._polling = True
+            self._set_busy(True)
+            self.widget.after(self.poll_ms, self._poll)
+
+    def cancel(self, key):
+        """Drop the callbacks of every pending job submitted with key"""
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def _is_current(self, job):
+        if job.key is None:
+            return True
+        with self._lock:
+            return self._generations.get(job.key) == job.generation
+
+    def _run(self):
+        """Worker loop"""
+        while True:
+            job = self._jobs.get()
+            if not self._is_current(job):
+                self._results.put(("skipped", job, None))
+                continue
+
+            kwargs = job.kwargs
+            if job.on_progress:
+                kwargs = dict(kwargs, progress=lambda *args, job=job: self._results.put(("progress", job, args)))
+
+            try:
+                result = job.func(*job.args, **kwargs)
+                self._results.put(("done", job, result))
+            except Exception as e:
+                traceback.print_exc()
+                self._results.put(("error", job, e))
+
+    def _poll(self):
+        """Deliver finished jobs on the Tk thread"""
+        try:
+            while True:
+                try:
+                    kind, job, payload = self._results.get_nowait()
+                except queue.Empty:
+                    break
+
+                if kind == "progress":
+                    if self._is_current(job):
+                        self._deliver(job.on_progress, *payload)
+                    continue
+
+                with self._lock:
+                    self._pending -= 1
+
+                if kind == "skipped" or not self._is_current(job):
+                    continue
+
+                if kind == "error":
+                    if job.on_error:
+                        self._deliver(job.on_error, payload)
+                    else:
+                        self._deliver(messagebox.showerror, "Error", f"Database operation failed:\n{payload}")
+                elif job.on_done:
+                    self._deliver(job.on_done, payload)
+        finally:
+            # Always reschedule, or later jobs would never be delivered
+            try:
+                if self._pending > 0:
+                    self.widget.after(self.poll_ms, self._poll)
+                else:
+                    self._polling = False
+                    self._set_busy(False)
+            except tk.TclError:
+                # Widget was destroyed while jobs were running
+                self._polling = False
+
+    @staticmethod
+    def _deliver(callback, *args):
+        """Run a result callback; a failing one (e.g. a destroyed widget) must not stop polling"""
+        try:
+            callback(*args)
+        except Exception:
+            traceback.print_exc()
+
+    def _set_busy(self, busy):
+        if self.on_busy:
+            try:
+                self.on_busy(busy)
+            except tk.TclError:
+                pass
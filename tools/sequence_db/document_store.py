@@ -0,0 +1,497 @@
+# document_store.py
+"""
+Document Store Module
+Content-addressed BLOB storage for PDFs attached to database records.
+Each distinct file is stored once in the 'documents' table, keyed by its
+SHA-256, and reference counted by the rows that point at it. Documents are
+compressed when that pays off; the codec is recorded per row.
+"""
+
+import os
+import re
+import uuid
+import hashlib
+import sqlite3
+import tempfile
+
+import storage_codec
+
+
+# Read/write granularity for streaming BLOB access
+CHUNK_SIZE = 1024 * 1024
+
+# Default upper bound for a single stored document
+MAX_DOCUMENT_SIZE = 512 * 1024 * 1024
+
+_SHA256_RE = re.compile(r"[0-9a-f]{64}")
+
+
+class DocumentTooLargeError(ValueError):
+    """Raised when a document exceeds the store's size limit"""
+
+    def __init__(self, size, max_size):
+        super().__init__(f"Document is {size / (1024 * 1024):.1f} MB, "
+                         f"the limit is {max_size / (1024 * 1024):.0f} MB")
+        self.size = size
+        self.max_size = max_size
+
+
+class DocumentStore:
+    """
+    Content-addressed 'documents' table shared by all records of one database.
+
+    All methods take a cursor so they run inside the caller's transaction.
+    """
+
+    def __init__(self, table="documents", max_size=MAX_DOCUMENT_SIZE, codec=storage_codec.DEFAULT_CODEC):
+        """
+        Initialize the store
+
+        Args:
+            table (str): Name of the documents table
+            max_size (int): Largest accepted document in bytes (None = no limit)
+            codec (str): storage_codec codec for new documents (None = never compress)
+        """
+        self.table = table
+        self.max_size = max_size
+        self.codec = codec
+
+    def check_size(self, size):
+        """Raise DocumentTooLargeError if size exceeds the limit"""
+        if self.max_size is not None and size > self.max_size:
+            raise DocumentTooLargeError(size, self.max_size)
+
+    def init_schema(self, cursor):
+        """Create the documents table if it does not exist"""
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sha256 TEXT NOT NULL UNIQUE,
+                size INTEGER NOT NULL,
+                ref_count INTEGER NOT NULL DEFAULT 0,
+                data BLOB NOT NULL,
+                codec TEXT
+            )
+        ''')
+
+        cursor.execute(f"PRAGMA table_info({self.table})")
+        if 'codec' not in [column[1] for column in cursor.fetchall()]:
+            cursor.execute(f'ALTER TABLE {self.table} ADD COLUMN codec TEXT')
+
+    @staticmethod
+    def hash_bytes(data):
+        """SHA-256 hex digest of a bytes object"""
+        return hashlib.sha256(data).hexdigest()
+
+    def put(self, cursor, data):
+        """
+        Store a document (or add a reference to an identical one)
+
+        The SHA-256 and size are those of the uncompressed content.
+
+        Args:
+            cursor: Cursor of the caller's transaction
+            data (bytes): Document content
+
+        Returns:
+            tuple: (document_id, size)
+        """
+        self.check_size(len(data))
+        digest = self.hash_bytes(data)
+        existing = self._add_reference(cursor, digest)
+        if existing:
+            return existing
+
+        codec, payload = storage_codec.encode(data, self.codec)
+        cursor.execute(
+            f'INSERT INTO {self.table} (sha256, size, ref_count, data, codec) VALUES (?, ?, 1, ?, ?)',
+            (digest, len(data), sqlite3.Binary(payload), codec)
+        )
+        return cursor.lastrowid, len(data)
+
+    def _add_reference(self, cursor, digest):
+        """Add a reference to the document with this hash; return (id, size) or None"""
+        cursor.execute(f'SELECT id, size FROM {self.table} WHERE sha256 = ?', (digest,))
+        row = cursor.fetchone()
+        if row:
+            cursor.execute(f'UPDATE {self.table} SET ref_count = ref_count + 1 WHERE id = ?', (row[0],))
+        return row
+
+    def put_file(self, cursor, path, progress=None, chunk_size=CHUNK_SIZE):
+        """
+        Store a file chunk by chunk (or add a reference to an identical document)
+
+        The BLOB is allocated with zeroblob() under a placeholder hash and
+        filled with incremental BLOB I/O while the SHA-256 is computed, so
+        only one chunk of the file is in memory. If the finished hash is
+        already stored, the new row is dropped in favour of the existing one.
+        When a sample of the file compresses well, the file is compressed
+        into a spooled temporary file first and that is written instead.
+        Without Connection.blobopen (Python < 3.11) the file is read whole.
+
+        Args:
+            cursor: Cursor of the caller's transaction
+            path (str): File to store
+            progress: Optional callback(bytes_done, bytes_total)
+            chunk_size (int): Bytes read and written per step
+
+        Returns:
+            tuple: (document_id, size)
+        """
+        size = os.path.getsize(path)
+        self.check_size(size)
+
+        conn = cursor.connection
+        if not hasattr(conn, 'blobopen'):
+            with open(path, 'rb') as file:
+                data = file.read()
+            if progress:
+                progress(size, size)
+            return self.put(cursor, data)
+
+        with open(path, 'rb') as file:
+            sample = file.read(storage_codec.SAMPLE_SIZE)
+        if storage_codec.sample_pays_off(sample, self.codec):
+            stored = self._put_file_compressed(cursor, path, size, progress, chunk_size)
+            if stored:
+                return stored
+
+        cursor.execute(
+            f'INSERT INTO {self.table} (sha256, size, ref_count, data) VALUES (?, ?, 1, zeroblob(?))',
+            (f"pending:{uuid.uuid4().hex}", size, size)
+        )
+        document_id = cursor.lastrowid
+
+        digest = hashlib.sha256()
+        done = 0
+        with open(path, 'rb') as file, conn.blobopen(self.table, 'data', document_id) as blob:
+            while done < size:
+                chunk = file.read(min(chunk_size, size - done))
+                if not chunk:
+                    raise OSError(f"{path} shrank while it was being stored")
+                blob.write(chunk)
+                digest.update(chunk)
+                done += len(chunk)
+                if progress:
+                    progress(done, size)
+
+        digest = digest.hexdigest()
+        existing = self._add_reference(cursor, digest)
+        if existing:
+            cursor.execute(f'DELETE FROM {self.table} WHERE id = ?', (document_id,))
+            return existing
+
+        cursor.execute(f'UPDATE {self.table} SET sha256 = ? WHERE id = ?', (digest, document_id))
+        return document_id, size
+
+    def _put_file_compressed(self, cursor, path, size, progress, chunk_size):
+        """
+        put_file() for compressible files: compress and hash, then write the BLOB
+
+        Returns:
+            tuple: (document_id, size), or None if compression did not pay off
+        """
+        compressor = storage_codec.get_codec(self.codec).compressor()
+        digest = hashlib.sha256()
+        done = 0
+        with open(path, 'rb') as file, tempfile.SpooledTemporaryFile(max_size=8 * chunk_size) as spool:
+            while done < size:
+                chunk = file.read(min(chunk_size, size - done))
+                if not chunk:
+                    raise OSError(f"{path} shrank while it was being stored")
+                digest.update(chunk)
+                spool.write(compressor.compress(chunk))
+                done += len(chunk)
+                if progress:
+                    progress(done, size)
+            spool.write(compressor.flush())
+
+            # The hash is known before anything is written
+            existing = self._add_reference(cursor, digest.hexdigest())
+            if existing:
+                return existing
+
+            stored_size = spool.tell()
+            if not storage_codec.pays_off(size, stored_size):
+                return None
+
+            cursor.execute(
+                f'INSERT INTO {self.table} (sha256, size, ref_count, data, codec) '
+                f'VALUES (?, ?, 1, zeroblob(?), ?)',
+                (digest.hexdigest(), size, stored_size, self.codec)
+            )
+            document_id = cursor.lastrowid
+            spool.seek(0)
+            with cursor.connection.blobopen(self.table, 'data', document_id) as blob:
+                while True:
+                    chunk = spool.read(chunk_size)
+                    if not chunk:
+                        break
+                    blob.write(chunk)
+        return document_id, size
+
+    def release(self, cursor, document_id):
+        """Drop one reference to a document and delete it when unused"""
+        if document_id is None:
+            return
+        cursor.execute(f'UPDATE {self.table} SET ref_count = ref_count - 1 WHERE id = ?', (document_id,))
+        cursor.execute(f'DELETE FROM {self.table} WHERE id = ? AND ref_count <= 0', (document_id,))
+
+    def get_data(self, cursor, document_id):
+        """Return the full (decompressed) content of a document, or None"""
+        if document_id is None:
+            return None
+        cursor.execute(f'SELECT codec, data FROM {self.table} WHERE id = ?', (document_id,))
+        row = cursor.fetchone()
+        return storage_codec.decode(row[0], row[1]) if row else None
+
+    def get_codec(self, cursor, document_id):
+        """Return the codec a document is stored with (None = uncompressed)"""
+        cursor.execute(f'SELECT codec FROM {self.table} WHERE id = ?', (document_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def get_info(self, cursor, document_id):
+        """Return (sha256, size) of a document, or None"""
+        if document_id is None:
+            return None
+        cursor.execute(f'SELECT sha256, size FROM {self.table} WHERE id = ?', (document_id,))
+        return cursor.fetchone()
+
+    def iter_chunks(self, cursor, document_id, chunk_size=CHUNK_SIZE):
+        """
+        Yield the content of a document in chunks without loading the whole BLOB
+
+        Compressed documents are decompressed chunk by chunk on the way.
+        """
+        codec = self.get_codec(cursor, document_id)
+        if codec is None:
+            yield from self._iter_stored_chunks(cursor, document_id, chunk_size)
+            return
+
+        decompressor = storage_codec.get_codec(codec).decompressor()
+        for chunk in self._iter_stored_chunks(cursor, document_id, chunk_size):
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+        data = decompressor.flush()
+        if data:
+            yield data
+
+    def _iter_stored_chunks(self, cursor, document_id, chunk_size):
+        """
+        Yield the stored BLOB bytes in chunks
+
+        Uses incremental BLOB I/O (Connection.blobopen, Python 3.11+) and falls
+        back to substr() slices on older Pythons.
+        """
+        conn = cursor.connection
+        if hasattr(conn, 'blobopen'):
+            with conn.blobopen(self.table, 'data', document_id, readonly=True) as blob:
+                while True:
+                    chunk = blob.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+            return
+
+        cursor.execute(f'SELECT length(data) FROM {self.table} WHERE id = ?', (document_id,))
+        row = cursor.fetchone()
+        size = row[0] if row else 0
+        for offset in range(0, size, chunk_size):
+            cursor.execute(f'SELECT substr(data, ?, ?) FROM {self.table} WHERE id = ?',
+                           (offset + 1, chunk_size, document_id))
+            yield cursor.fetchone()[0]
+
+    def read(self, cursor, document_id):
+        """
+        Return the content of a document as one bytes object, or None
+
+        With blobopen the bytes are read straight into the result; it is the
+        only copy, so callers can share it (e.g. several fitz documents).
+        """
+        info = self.get_info(cursor, document_id)
+        if info is None:
+            return None
+        conn = cursor.connection
+        if hasattr(conn, 'blobopen'):
+            codec = self.get_codec(cursor, document_id)
+            with conn.blobopen(self.table, 'data', document_id, readonly=True) as blob:
+                return storage_codec.decode(codec, blob.read())
+        return self.get_data(cursor, document_id)
+
+    def copy_to_file(self, cursor, document_id, file, chunk_size=CHUNK_SIZE):
+        """
+        Write a document to an open binary file chunk by chunk
+
+        Returns:
+            int: Number of bytes written
+        """
+        written = 0
+        for chunk in self.iter_chunks(cursor, document_id, chunk_size):
+            file.write(chunk)
+            written += len(chunk)
+        return written
+
+    def hash_document(self, cursor, document_id):
+        """SHA-256 of a stored document, computed from its content chunk by chunk"""
+        digest = hashlib.sha256()
+        for chunk in self.iter_chunks(cursor, document_id):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def owner_tables(cursor):
+        """Names of the tables that reference documents through pdf_document_id"""
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        owners = []
+        for (name,) in cursor.fetchall():
+            cursor.execute(f"PRAGMA table_info({name})")
+            if 'pdf_document_id' in [column[1] for column in cursor.fetchall()]:
+                owners.append(name)
+        return owners
+
+    def deduplicate(self, cursor, owner_tables, rehash=False):
+        """
+        Merge duplicate documents and recompute reference counts from the owners
+
+        Rows left with a placeholder hash by an interrupted upload are hashed
+        from their content (all rows with rehash=True). Rows with the same
+        content are merged into the oldest one and their owners repointed.
+        Afterwards ref_count is recomputed from owner_tables and documents
+        nobody references (e.g. abandoned uploads) are deleted, so this must
+        not run while a form holds a staged upload.
+
+        Args:
+            cursor: Cursor of the caller's transaction
+            owner_tables: Tables with a pdf_document_id column
+            rehash (bool): Verify every stored hash against the content
+
+        Returns:
+            dict: merged, orphans, refcounts_fixed and bytes_freed
+        """
+        stats = {'merged': 0, 'orphans': 0, 'refcounts_fixed': 0, 'bytes_freed': 0}
+
+        cursor.execute(f'SELECT id, sha256, length(data) FROM {self.table} ORDER BY id')
+        keepers = {}
+        new_hashes = []
+        for document_id, stored, size in cursor.fetchall():
+            digest = stored
+            if rehash or not _SHA256_RE.fullmatch(stored):
+                digest = self.hash_document(cursor, document_id)
+
+            keeper = keepers.setdefault(digest, document_id)
+            if keeper != document_id:
+                for owner in owner_tables:
+                    cursor.execute(f'UPDATE {owner} SET pdf_document_id = ? WHERE pdf_document_id = ?',
+                                   (keeper, document_id))
+                cursor.execute(f'DELETE FROM {self.table} WHERE id = ?', (document_id,))
+                stats['merged'] += 1
+                stats['bytes_freed'] += size
+            elif digest != stored:
+                new_hashes.append((digest, document_id))
+
+        # Only after the merges, when no other row can still hold the digest
+        cursor.executemany(f'UPDATE {self.table} SET sha256 = ? WHERE id = ?', new_hashes)
+
+        references = " + ".join(
+            f"(SELECT COUNT(*) FROM {owner} WHERE pdf_document_id = {self.table}.id)"
+            for owner in owner_tables) or "0"
+        cursor.execute(f'SELECT COUNT(*) FROM {self.table} WHERE ref_count != {references}')
+        stats['refcounts_fixed'] = cursor.fetchone()[0]
+        cursor.execute(f'UPDATE {self.table} SET ref_count = {references}')
+
+        cursor.execute(f'SELECT COUNT(*), COALESCE(SUM(length(data)), 0) FROM {self.table} WHERE ref_count <= 0')
+        orphans, orphan_bytes = cursor.fetchone()
+        cursor.execute(f'DELETE FROM {self.table} WHERE ref_count <= 0')
+        stats['orphans'] = orphans
+        stats['bytes_freed'] += orphan_bytes
+        return stats
+
+    def migrate_inline_blobs(self, cursor, owner_table):
+        """
+        Move legacy inline pdf_data BLOBs of owner_table into the documents table
+
+        The owner table must already have pdf_document_id and pdf_size columns.
+        Afterwards the pdf_data column is dropped (or cleared on SQLite < 3.35).
+
+        Returns:
+            int: Number of rows migrated
+        """
+        cursor.execute(f"PRAGMA table_info({owner_table})")
+        columns = [column[1] for column in cursor.fetchall()]
+        if 'pdf_data' not in columns:
+            return 0
+
+        cursor.execute(f'SELECT id FROM {owner_table} WHERE pdf_data IS NOT NULL')
+        row_ids = [row[0] for row in cursor.fetchall()]
+
+        # One row at a time so only a single BLOB is held in memory
+        for row_id in row_ids:
+            cursor.execute(f'SELECT pdf_data FROM {owner_table} WHERE id = ?', (row_id,))
+            data = bytes(cursor.fetchone()[0])
+            document_id, size = self.put(cursor, data)
+            cursor.execute(
+                f'UPDATE {owner_table} SET pdf_document_id = ?, pdf_size = ?, pdf_data = NULL WHERE id = ?',
+                (document_id, size, row_id)
+            )
+
+        try:
+            cursor.execute(f'ALTER TABLE {owner_table} DROP COLUMN pdf_data')
+        except sqlite3.OperationalError as e:
+            print(f"Note: Kept empty legacy pdf_data column in {owner_table}: {e}")
+
+        if row_ids:
+            print(f"✓ Migrated {len(row_ids)} PDF(s) from {owner_table} into {self.table} "
+                  f"(run compact() to reclaim the freed space)")
+        return len(row_ids)
+
+
+def compact_database(db_path, rehash=False):
+    """
+    One-off maintenance: merge duplicate PDFs, repair reference counts and VACUUM
+
+    Works on publication and sequence databases alike (owner tables are
+    found by their pdf_document_id column). Run it while the application
+    is closed.
+
+    Returns:
+        dict: deduplicate() statistics plus file_size_before/file_size_after
+    """
+    from db_connection import ConnectionManager
+
+    connections = ConnectionManager.for_path(db_path)
+    conn = connections.get_connection()
+    try:
+        cursor = conn.cursor()
+        store = DocumentStore()
+        owners = store.owner_tables(cursor)
+        stats = store.deduplicate(cursor, owners, rehash=rehash)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+    print(f"✓ Documents: merged {stats['merged']} duplicate(s), removed {stats['orphans']} "
+          f"unreferenced, fixed {stats['refcounts_fixed']} reference count(s)")
+    print(f"✓ {stats['bytes_freed'] / (1024 * 1024):.1f} MB of PDF data released")
+
+    stats['file_size_before'], stats['file_size_after'] = connections.compact()
+    connections.close_all()
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Deduplicate stored PDFs and reclaim their space")
+    parser.add_argument("database", help="Path to publications.db or sequences.db")
+    parser.add_argument("--rehash", action="store_true", help="Re-hash every document to verify stored hashes")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        parser.error(f"{args.database} does not exist")
+
+    stats = compact_database(args.database, rehash=args.rehash)
+    reclaimed = stats['file_size_before'] - stats['file_size_after']
+    print(f"✓ Reclaimed {reclaimed / (1024 * 1024):.1f} MB on disk")
@@ -0,0 +1,425 @@
+# kmer_index.py
+"""
+K-mer Index Module
+Inverted index from k-mers to the sequences that contain them, kept in side
+tables of the sequence database. A subsequence query intersects the posting
+lists of a few of its k-mers to get candidate sequences and only those
+candidates are checked, instead of scanning every stored sequence.
+"""
+
+import sys
+import sqlite3
+import threading
+from array import array
+
+
+# Length of the indexed k-mers; queries must be at least this long to use
+# the index. At most 8 so a k-mer packs into one SQLite INTEGER.
+KMER_SIZE = 8
+
+# Number of k-mers of a query whose posting lists are intersected
+MAX_QUERY_KMERS = 6
+
+# Sequences indexed per transaction by index_pending()
+INDEX_BATCH_SIZE = 2000
+
+# Residues loaded per pending batch (k-mer index and sketches); a batch
+# ends after the record that reaches it, so a long genome is indexed alone
+# and the write lock is released before the next one is read
+BATCH_RESIDUES = 2_000_000
+
+# Bulk segments written by the background indexer before it merges them
+MAX_SEGMENTS = 32
+
+# Posting list segments besides the bulk ones (numbered by their first
+# sequence id): optimize() writes the merged lists to MERGED_SEGMENT, single
+# adds are appended to TAIL_SEGMENT and removals to DELETED_SEGMENT, which
+# queries subtract until the next merge
+MERGED_SEGMENT = 0
+TAIL_SEGMENT = -1
+DELETED_SEGMENT = -2
+
+# The background indexer also merges once a tail or deletion list holds
+# this many ids, so appending to them stays cheap
+MAX_TAIL_IDS = 4096
+
+
+def create_pending_table(cursor, pending_table, owner_table="sequences"):
+    """
+    Create the queue of sequences an index still has to process
+
+    Every sequence already stored is queued, and rows deleted from
+    owner_table are dropped from the queue by a trigger.
+    """
+    cursor.execute(f'CREATE TABLE IF NOT EXISTS {pending_table} (sequence_id INTEGER PRIMARY KEY)')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {pending_table}_cleanup AFTER DELETE ON {owner_table} BEGIN
+            DELETE FROM {pending_table} WHERE sequence_id = old.id;
+        END
+    ''')
+    cursor.execute(f'''
+        INSERT OR IGNORE INTO {pending_table} (sequence_id)
+        SELECT id FROM {owner_table} WHERE sequence IS NOT NULL
+    ''')
+    if cursor.rowcount > 0:
+        print(f"{pending_table}: {cursor.rowcount} existing sequence(s) queued for indexing")
+
+
+def index_pending_batch(conn, pending_table, load_sequences, add_many, batch_size,
+                        max_residues=BATCH_RESIDUES):
+    """
+    Process one batch of queued sequences in its own write transaction
+
+    The write lock is taken before the sequences are read, so an update
+    committed meanwhile cannot be indexed with its old content. Sequences
+    are loaded one at a time until batch_size of them or max_residues
+    residues are in memory.
+
+    Args:
+        conn: Connection of the calling thread
+        pending_table (str): Queue table (see create_pending_table)
+        load_sequences: Function(cursor, ids) -> list of (id, sequence)
+        add_many: Function(cursor, items) that indexes (id, sequence) items
+        batch_size (int): Maximum sequences per transaction
+        max_residues (int): Residues per transaction (at least one sequence)
+
+    Returns:
+        int: Number of sequences processed (0 when nothing is pending)
+    """
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute(f'SELECT sequence_id FROM {pending_table} ORDER BY sequence_id LIMIT ?', (batch_size,))
+        pending = [row[0] for row in cursor.fetchall()]
+        ids = []
+        items = []
+        residues = 0
+        for sequence_id in pending:
+            if residues >= max_residues:
+                break
+            ids.append(sequence_id)
+            for item in load_sequences(cursor, [sequence_id]):
+                items.append(item)
+                residues += len(item[1])
+        if ids:
+            add_many(cursor, items)
+            cursor.executemany(f'DELETE FROM {pending_table} WHERE sequence_id = ?',
+                               ((sequence_id,) for sequence_id in ids))
+        conn.commit()
+        return len(ids)
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def normalize_sequence(sequence):
+    """Uppercase a sequence and drop whitespace (line breaks from pasted FASTA)"""
+    return "".join(sequence.split()).upper() if sequence else ""
+
+
+def pack_ids(ids):
+    """Posting list -> BLOB of little-endian uint32 sequence ids"""
+    packed = array('I', ids)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack_ids(blob):
+    """Inverse of pack_ids()"""
+    ids = array('I')
+    ids.frombytes(blob)
+    if sys.byteorder == 'big':
+        ids.byteswap()
+    return ids
+
+
+class KmerIndex:
+    """
+    Posting lists stored as packed id arrays, one row per (kmer, segment).
+
+    Every bulk indexing batch writes a new segment numbered by its first
+    sequence id, so indexing 2000 sequences is one insert per distinct k-mer
+    rather than one per (k-mer, sequence). Single adds and removals only
+    append to the small tail and deletion lists (in SQL with an upsert), so
+    they never rewrite the large merged lists; optimize() folds everything
+    back into MERGED_SEGMENT.
+    Sequences added in bulk are first recorded in the pending table and
+    indexed later by index_pending(); queries check pending sequences
+    directly, so results are complete at any time. All methods take a
+    cursor so they run inside the caller's transaction.
+    """
+
+    def __init__(self, table="sequence_kmers", k=KMER_SIZE):
+        if not 1 <= k <= 8:
+            raise ValueError("k must be between 1 and 8")
+        self.table = table
+        self.pending_table = f"{table}_pending"
+        self.k = k
+        # Single adds and removals since the last optimize() (None = not
+        # counted yet); each appends at most one id to a tail or deletion list
+        self.tail_edits = None
+
+    def init_schema(self, cursor, owner_table="sequences"):
+        """Create the index tables; sequences stored before the index existed become pending"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.table,))
+        if cursor.fetchone():
+            return
+
+        cursor.execute(f'''
+            CREATE TABLE {self.table} (
+                kmer INTEGER NOT NULL,
+                segment INTEGER NOT NULL,
+                ids BLOB NOT NULL,
+                PRIMARY KEY (kmer, segment)
+            ) WITHOUT ROWID
+        ''')
+        create_pending_table(cursor, self.pending_table, owner_table)
+
+    def kmers(self, sequence):
+        """Distinct k-mers of a normalized sequence, packed as integers"""
+        data = sequence.encode('ascii', errors='replace')
+        k = self.k
+        return {int.from_bytes(data[i:i + k], 'big') for i in range(len(data) - k + 1)}
+
+    def add(self, cursor, sequence_id, sequence):
+        """Index one sequence right away (appended to the tail segment)"""
+        self._append(cursor, TAIL_SEGMENT, sequence_id, self.kmers(normalize_sequence(sequence)))
+        self._count_edit()
+
+    def _count_edit(self):
+        if self.tail_edits is not None:
+            self.tail_edits += 1
+
+    def _append(self, cursor, segment, sequence_id, kmers):
+        """Append a sequence id to the lists of the given k-mers in one segment"""
+        blob = pack_ids((sequence_id,))
+        cursor.executemany(f'''
+            INSERT INTO {self.table} (kmer, segment, ids) VALUES (?, ?, ?)
+            ON CONFLICT (kmer, segment) DO UPDATE SET ids = CAST(ids || excluded.ids AS BLOB)
+        ''', [(kmer, segment, blob) for kmer in sorted(kmers)])
+
+    def add_many(self, cursor, items):
+        """
+        Index several sequences as one new segment
+
+        Args:
+            items: Iterable of (sequence_id, sequence) of not yet indexed
+                   sequences; the smallest id becomes the segment number
+        """
+        postings = {}
+        for sequence_id, sequence in items:
+            for kmer in self.kmers(normalize_sequence(sequence)):
+                ids = postings.get(kmer)
+                if ids is None:
+                    postings[kmer] = ids = array('I')
+                ids.append(sequence_id)
+        if not postings:
+            return
+
+        segment = min(ids[0] for ids in postings.values())
+        cursor.executemany(
+            f'INSERT INTO {self.table} (kmer, segment, ids) VALUES (?, ?, ?)',
+            ((kmer, segment, pack_ids(postings[kmer])) for kmer in sorted(postings))
+        )
+
+    def remove(self, cursor, sequence_id, sequence):
+        """
+        Drop a sequence from the posting lists of its k-mers
+
+        The id is appended to the deletion lists of the k-mers; the posting
+        lists themselves are cleaned up by optimize().
+        """
+        self.replace(cursor, sequence_id, sequence, None)
+
+    def replace(self, cursor, sequence_id, old_sequence, sequence):
+        """
+        Re-index a sequence whose content changed (sequence None = removed)
+
+        Only the k-mers gained or lost are touched: lost ones get a deletion
+        entry, gained ones a tail entry (and lose a deletion entry left by an
+        earlier change). Call it before deleting the sequence row, whose
+        trigger drops the pending entry.
+        """
+        # A pending sequence is in no posting list yet
+        cursor.execute(f'SELECT 1 FROM {self.pending_table} WHERE sequence_id = ?', (sequence_id,))
+        if cursor.fetchone():
+            cursor.execute(f'DELETE FROM {self.pending_table} WHERE sequence_id = ?', (sequence_id,))
+            old_kmers = set()
+        else:
+            old_kmers = self.kmers(normalize_sequence(old_sequence))
+        new_kmers = self.kmers(normalize_sequence(sequence))
+
+        self._append(cursor, DELETED_SEGMENT, sequence_id, old_kmers - new_kmers)
+        added = new_kmers - old_kmers
+        for kmer in sorted(added):
+            cursor.execute(f'SELECT ids FROM {self.table} WHERE kmer = ? AND segment = ?', (kmer, DELETED_SEGMENT))
+            row = cursor.fetchone()
+            if row and sequence_id in unpack_ids(row[0]):
+                remaining = [i for i in unpack_ids(row[0]) if i != sequence_id]
+                if remaining:
+                    cursor.execute(f'UPDATE {self.table} SET ids = ? WHERE kmer = ? AND segment = ?',
+                                   (pack_ids(remaining), kmer, DELETED_SEGMENT))
+                else:
+                    cursor.execute(f'DELETE FROM {self.table} WHERE kmer = ? AND segment = ?',
+                                   (kmer, DELETED_SEGMENT))
+        self._append(cursor, TAIL_SEGMENT, sequence_id, added)
+        self._count_edit()
+
+    def index_pending(self, conn, load_sequences, batch_size=INDEX_BATCH_SIZE):
+        """Index one batch of pending sequences (see index_pending_batch)"""
+        return index_pending_batch(conn, self.pending_table, load_sequences, self.add_many, batch_size)
+
+    def tail_size(self, cursor):
+        """
+        Upper bound of the ids in the longest tail or deletion list
+
+        The index keys are scanned only on the first call; later calls
+        return the running count of single edits.
+        """
+        if self.tail_edits is None:
+            cursor.execute(f'SELECT COALESCE(MAX(length(ids)), 0) / 4 FROM {self.table} WHERE segment < 0')
+            self.tail_edits = cursor.fetchone()[0]
+        return self.tail_edits
+
+    def optimize(self, conn, kmers_per_step=2000):
+        """
+        Merge the segments of every posting list into MERGED_SEGMENT,
+        dropping the ids recorded in its deletion list
+
+        Runs one short write transaction per kmers_per_step k-mers, so
+        other writers are not blocked for the whole merge.
+        """
+        # Edits made while merging are counted again (over-estimating is harmless)
+        self.tail_edits = 0
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT DISTINCT kmer FROM {self.table} ORDER BY kmer')
+        kmers = [row[0] for row in cursor.fetchall()]
+        for start in range(0, len(kmers), kmers_per_step):
+            first, last = kmers[start], kmers[min(start + kmers_per_step, len(kmers)) - 1]
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute(f'SELECT kmer, segment, ids FROM {self.table} WHERE kmer BETWEEN ? AND ?',
+                               (first, last))
+                merged = {}
+                deleted = {}
+                for kmer, segment, blob in cursor.fetchall():
+                    target = deleted if segment == DELETED_SEGMENT else merged
+                    target.setdefault(kmer, set()).update(unpack_ids(blob))
+                cursor.execute(f'DELETE FROM {self.table} WHERE kmer BETWEEN ? AND ?', (first, last))
+                cursor.executemany(
+                    f'INSERT INTO {self.table} (kmer, segment, ids) VALUES (?, ?, ?)',
+                    ((kmer, MERGED_SEGMENT, pack_ids(sorted(ids - deleted.get(kmer, set()))))
+                     for kmer, ids in sorted(merged.items()) if ids - deleted.get(kmer, set()))
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def query_kmers(self, pattern):
+        """
+        K-mers of a normalized pattern used for the intersection
+
+        Spread over the whole pattern (first and last included), so together
+        they cover as much of it as possible.
+        """
+        positions = range(len(pattern) - self.k + 1)
+        if len(positions) > MAX_QUERY_KMERS:
+            step = (len(positions) - 1) / (MAX_QUERY_KMERS - 1)
+            positions = sorted({round(i * step) for i in range(MAX_QUERY_KMERS)})
+        data = pattern.encode('ascii', errors='replace')
+        return sorted({int.from_bytes(data[i:i + self.k], 'big') for i in positions})
+
+    def candidates(self, cursor, pattern):
+        """
+        Ids of the sequences that may contain pattern
+
+        The intersection of the sampled k-mers' posting lists (minus their
+        deletion lists), plus every sequence still waiting to be indexed.
+
+        Args:
+            pattern (str): Normalized query of at least k residues
+
+        Returns:
+            set: Candidate sequence ids (a superset of the real matches)
+        """
+        result = None
+        for kmer in self.query_kmers(pattern):
+            cursor.execute(f'SELECT segment, ids FROM {self.table} WHERE kmer = ?', (kmer,))
+            ids = set()
+            deleted = set()
+            for segment, blob in cursor.fetchall():
+                (deleted if segment == DELETED_SEGMENT else ids).update(unpack_ids(blob))
+            ids -= deleted
+            result = ids if result is None else result & ids
+            if not result:
+                break
+
+        cursor.execute(f'SELECT sequence_id FROM {self.pending_table}')
+        result.update(row[0] for row in cursor.fetchall())
+        return result
+
+
+class KmerIndexer:
+    """
+    Background worker that indexes pending sequences (after bulk imports):
+    k-mer posting lists first, then MinHash sketches.
+
+    Mirrors PDFTextIndexer: start() once, wake() after queueing work.
+    Once it has written MAX_SEGMENTS segments, or single adds and removals
+    made a tail list longer than MAX_TAIL_IDS, it merges the posting lists.
+    """
+
+    def __init__(self, db):
+        """
+        Initialize the indexer
+
+        Args:
+            db: SequenceDatabase whose pending sequences should be indexed
+        """
+        self.db = db
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._segments = 0
+
+    def start(self):
+        """Start the worker thread; it first indexes whatever is already pending"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._wake.set()
+        self._thread = threading.Thread(target=self._run, name="kmer-indexer", daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """Index newly pending sequences"""
+        self._wake.set()
+
+    def stop(self, wait=True):
+        """Stop the worker after the current batch"""
+        self._stop.set()
+        self._wake.set()
+        if wait and self._thread:
+            self._thread.join()
+
+    def _run(self):
+        """Worker loop"""
+        try:
+            while not self._stop.is_set():
+                self._wake.wait()
+                self._wake.clear()
+                try:
+                    while not self._stop.is_set() and self.db.index_pending_kmers():
+                        self._segments += 1
+                    if not self._stop.is_set() and (self._segments >= MAX_SEGMENTS
+                                                    or self.db.kmer_tail_size() > MAX_TAIL_IDS):
+                        self.db.optimize_kmer_index()
+                        self._segments = 0
+                    while not self._stop.is_set() and self.db.index_pending_sketches():
+                        pass
+                except sqlite3.Error as e:
+                    print(f"✗ K-mer indexer: database error: {e}")
+        finally:
+            self.db.connections.close_thread_connection()
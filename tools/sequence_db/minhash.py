@@ -0,0 +1,353 @@
+# minhash.py
+"""
+MinHash Module
+Compact similarity sketches of stored sequences. Each sequence gets a
+fixed-size MinHash sketch of its k-mers; locality-sensitive hashing (LSH)
+over bands of the sketch finds the sequences likely to be similar to a
+query, and comparing their sketches estimates Jaccard similarity and
+average nucleotide/amino acid identity - without aligning anything.
+"""
+
+import sys
+import math
+import hashlib
+import struct
+from array import array
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from kmer_index import normalize_sequence, create_pending_table, index_pending_batch
+
+
+# Sketch bins (one-permutation MinHash, one 32-bit minimum per bin)
+SKETCH_SIZE = 64
+
+# LSH: the sketch is cut into LSH_BANDS bands of SKETCH_SIZE // LSH_BANDS
+# values; two sequences become candidates when any band is identical.
+# With 2 values per band a pair with Jaccard 0.3 (about 95% nucleotide or
+# 85% amino acid identity) is found 95% of the time, Jaccard 0.1 only 27%.
+LSH_BANDS = 32
+
+# K-mer length by sequence type: long enough that unrelated sequences share
+# almost no k-mers, short enough that diverged homologs still share some
+NUCLEOTIDE_KMER_SIZE = 16
+PROTEIN_KMER_SIZE = 5
+
+# Residues that make a sequence count as nucleotide (N and U included)
+NUCLEOTIDE_ALPHABET = frozenset("ACGTUN")
+
+# Similar sequences returned by default, and the lowest Jaccard reported
+SIMILAR_LIMIT = 20
+MIN_JACCARD = 0.05
+
+# Sequences sketched per transaction by index_pending()
+SKETCH_BATCH_SIZE = 2000
+
+# K-mers hashed per NumPy step (bounds the temporary arrays of long sequences)
+HASH_CHUNK_SIZE = 1 << 18
+
+_MASK64 = (1 << 64) - 1
+_BIN_SHIFT = 64 - int(math.log2(SKETCH_SIZE))
+_EMPTY = 0xFFFFFFFF
+_NUCLEOTIDE_BYTES = "".join(sorted(NUCLEOTIDE_ALPHABET)).encode('ascii')
+
+
+def is_nucleotide(sequence):
+    """True if a normalized sequence looks like DNA/RNA rather than protein"""
+    if not sequence:
+        return False
+    sample = sequence[:1000].encode('ascii', errors='replace')
+    others = len(sample.translate(None, _NUCLEOTIDE_BYTES))
+    return others <= 0.1 * len(sample)
+
+
+def kmer_size(sequence):
+    """K-mer length for a normalized sequence: nucleotide or protein"""
+    return NUCLEOTIDE_KMER_SIZE if is_nucleotide(sequence) else PROTEIN_KMER_SIZE
+
+
+def _mix64(x):
+    """64-bit finalizer (splitmix64); longer k-mers are folded in first"""
+    x = (x ^ (x >> 64) * 0xD6E8FEB86659FD93) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def _bin_minima(data, k):
+    """Smallest 32-bit value per bin over the k-mers of data (_EMPTY if none)"""
+    mins = [_EMPTY] * SKETCH_SIZE
+    from_bytes = int.from_bytes
+    for i in range(len(data) - k + 1):
+        h = _mix64(from_bytes(data[i:i + k], 'big'))
+        b = h >> _BIN_SHIFT
+        v = (h >> 16) & 0xFFFFFFFF
+        if v < mins[b]:
+            mins[b] = v
+    return mins
+
+
+def _window_values(codes, start, count, width):
+    """Big-endian integers of the width-byte windows codes[start + i:][:width], i < count"""
+    values = np.zeros(count, dtype=np.uint64)
+    for j in range(width):
+        values <<= np.uint64(8)
+        values |= codes[start + j:start + j + count]
+    return values
+
+
+def _bin_minima_numpy(data, k):
+    """
+    Same result as _bin_minima(), hashing a chunk of k-mers per step
+
+    _mix64 only sees the low 64 bits of the k-mer and of the k-mer shifted
+    right by 64 bits, i.e. the last 8 bytes of the window and the 8 before
+    them, so each fits in a uint64 whatever k is.
+    """
+    codes = np.frombuffer(data, dtype=np.uint8).astype(np.uint64)
+    mins = np.full(SKETCH_SIZE, _EMPTY, dtype=np.uint64)
+    low_width = min(k, 8)
+    high_width = min(max(k - 8, 0), 8)
+    total = len(data) - k + 1
+    for start in range(0, total, HASH_CHUNK_SIZE):
+        count = min(HASH_CHUNK_SIZE, total - start)
+        x = _window_values(codes, start + k - low_width, count, low_width)
+        if high_width:
+            x ^= _window_values(codes, start + k - 8 - high_width, count, high_width) * np.uint64(0xD6E8FEB86659FD93)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        x ^= x >> np.uint64(31)
+        np.minimum.at(mins, x >> np.uint64(_BIN_SHIFT), (x >> np.uint64(16)) & np.uint64(0xFFFFFFFF))
+    return mins.tolist()
+
+
+def compute_sketch(sequence, k=None):
+    """
+    MinHash sketch of a sequence (one-permutation hashing)
+
+    Every k-mer is hashed once; the top bits pick one of SKETCH_SIZE bins
+    and each bin keeps its smallest value. Empty bins (short sequences)
+    borrow the value of the next filled bin, so all sketches are comparable.
+
+    Args:
+        sequence (str): Sequence text (case and whitespace are ignored)
+        k (int): K-mer length, default: by sequence type
+
+    Returns:
+        tuple: (k, array of SKETCH_SIZE 32-bit values), or None if the
+               sequence is shorter than k
+    """
+    sequence = normalize_sequence(sequence)
+    k = k or kmer_size(sequence)
+    data = sequence.encode('ascii', errors='replace')
+    if len(data) < k:
+        return None
+
+    mins = _bin_minima_numpy(data, k) if NUMPY_AVAILABLE else _bin_minima(data, k)
+
+    # Densification: rotate the next filled bin's value into empty bins
+    for b in range(SKETCH_SIZE):
+        if mins[b] == _EMPTY:
+            for distance in range(1, SKETCH_SIZE):
+                value = mins[(b + distance) % SKETCH_SIZE]
+                if value != _EMPTY:
+                    # Offset by the distance so borrowed bins stay distinct
+                    mins[b] = (value ^ (distance * 0x9E3779B1)) & 0xFFFFFFFF
+                    break
+
+    return k, array('I', mins)
+
+
+def pack_sketch(sketch):
+    """Sketch values -> BLOB (little-endian uint32)"""
+    values = array('I', sketch)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def unpack_sketch(blob):
+    """Inverse of pack_sketch()"""
+    values = array('I')
+    values.frombytes(blob)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def jaccard(sketch_a, sketch_b):
+    """Estimated Jaccard similarity of the k-mer sets: fraction of equal bins"""
+    return sum(1 for a, b in zip(sketch_a, sketch_b) if a == b) / SKETCH_SIZE
+
+
+def identity_estimate(jaccard_value, k):
+    """
+    Estimated sequence identity (ANI/AAI) from Jaccard similarity
+
+    Mash distance: D = -1/k * ln(2J / (1 + J)), identity = 1 - D.
+    """
+    if jaccard_value <= 0:
+        return 0.0
+    distance = -math.log(2 * jaccard_value / (1 + jaccard_value)) / k
+    return max(0.0, 1.0 - distance)
+
+
+def band_keys(k, sketch):
+    """LSH bucket keys of a sketch: one signed 64-bit key per band"""
+    rows = SKETCH_SIZE // LSH_BANDS
+    keys = []
+    for band in range(LSH_BANDS):
+        values = sketch[band * rows:(band + 1) * rows]
+        digest = hashlib.blake2b(struct.pack(f'<BB{rows}I', k, band, *values), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+
+class SketchIndex:
+    """
+    MinHash sketches and LSH buckets in side tables of the sequence database.
+
+    Works like KmerIndex: single edits are sketched in the caller's
+    transaction, bulk imports through the pending table. All methods take
+    a cursor so they run inside the caller's transaction.
+    """
+
+    def __init__(self, table="sequence_sketches"):
+        self.table = table
+        self.bands_table = f"{table}_lsh"
+        self.pending_table = f"{table}_pending"
+
+    def init_schema(self, cursor, owner_table="sequences"):
+        """Create the sketch tables; sequences stored before they existed become pending"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.table,))
+        if cursor.fetchone():
+            return
+
+        cursor.execute(f'''
+            CREATE TABLE {self.table} (
+                sequence_id INTEGER PRIMARY KEY,
+                k INTEGER NOT NULL,
+                sketch BLOB NOT NULL
+            )
+        ''')
+        cursor.execute(f'''
+            CREATE TABLE {self.bands_table} (
+                band_key INTEGER NOT NULL,
+                sequence_id INTEGER NOT NULL,
+                PRIMARY KEY (band_key, sequence_id)
+            ) WITHOUT ROWID
+        ''')
+        create_pending_table(cursor, self.pending_table, owner_table)
+
+    def add(self, cursor, sequence_id, sequence):
+        """Sketch one sequence right away"""
+        self.add_many(cursor, [(sequence_id, sequence)])
+
+    def add_many(self, cursor, items):
+        """
+        Sketch several sequences
+
+        Args:
+            items: Iterable of (sequence_id, sequence) without a sketch yet
+        """
+        sketches = []
+        bands = []
+        for sequence_id, sequence in items:
+            result = compute_sketch(sequence)
+            if result is None:
+                continue
+            k, sketch = result
+            sketches.append((sequence_id, k, pack_sketch(sketch)))
+            bands.extend((key, sequence_id) for key in band_keys(k, sketch))
+
+        cursor.executemany(f'INSERT OR REPLACE INTO {self.table} (sequence_id, k, sketch) VALUES (?, ?, ?)',
+                           sketches)
+        bands.sort()
+        cursor.executemany(f'INSERT OR IGNORE INTO {self.bands_table} (band_key, sequence_id) VALUES (?, ?)',
+                           bands)
+
+    def remove(self, cursor, sequence_id):
+        """Drop the sketch and LSH buckets of a sequence"""
+        cursor.execute(f'DELETE FROM {self.pending_table} WHERE sequence_id = ?', (sequence_id,))
+        cursor.execute(f'SELECT k, sketch FROM {self.table} WHERE sequence_id = ?', (sequence_id,))
+        row = cursor.fetchone()
+        if not row:
+            return
+        cursor.executemany(f'DELETE FROM {self.bands_table} WHERE band_key = ? AND sequence_id = ?',
+                           ((key, sequence_id) for key in band_keys(row[0], unpack_sketch(row[1]))))
+        cursor.execute(f'DELETE FROM {self.table} WHERE sequence_id = ?', (sequence_id,))
+
+    def index_pending(self, conn, load_sequences, batch_size=SKETCH_BATCH_SIZE):
+        """Sketch one batch of pending sequences (see index_pending_batch)"""
+        return index_pending_batch(conn, self.pending_table, load_sequences, self.add_many, batch_size)
+
+    def pending_count(self, cursor):
+        cursor.execute(f'SELECT COUNT(*) FROM {self.pending_table}')
+        return cursor.fetchone()[0]
+
+    def stored_sketch(self, cursor, sequence_id):
+        """(k, sketch) stored for a sequence, or None"""
+        cursor.execute(f'SELECT k, sketch FROM {self.table} WHERE sequence_id = ?', (sequence_id,))
+        row = cursor.fetchone()
+        return (row[0], unpack_sketch(row[1])) if row else None
+
+    def similar(self, cursor, k, sketch, limit=SIMILAR_LIMIT, min_jaccard=MIN_JACCARD, exclude_id=None):
+        """
+        Sequences whose sketches resemble the given one, most similar first
+
+        Only LSH candidates (sharing at least one band) are compared.
+
+        Returns:
+            list: (sequence_id, jaccard, identity) tuples
+        """
+        keys = band_keys(k, sketch)
+        cursor.execute(f'''
+            SELECT DISTINCT sequence_id FROM {self.bands_table}
+            WHERE band_key IN ({", ".join("?" * len(keys))})
+        ''', keys)
+        candidate_ids = [row[0] for row in cursor.fetchall() if row[0] != exclude_id]
+
+        hits = []
+        for start in range(0, len(candidate_ids), 500):
+            batch = candidate_ids[start:start + 500]
+            cursor.execute(f'''
+                SELECT sequence_id, sketch FROM {self.table}
+                WHERE k = ? AND sequence_id IN ({", ".join("?" * len(batch))})
+            ''', [k] + batch)
+            for sequence_id, blob in cursor.fetchall():
+                value = jaccard(sketch, unpack_sketch(blob))
+                if value >= min_jaccard:
+                    hits.append((sequence_id, value, identity_estimate(value, k)))
+
+        hits.sort(key=lambda hit: (-hit[1], hit[0]))
+        return hits[:limit] if limit is not None else hits
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    # Accuracy check: mutate a random sequence and compare estimated with
+    # true identity and Jaccard similarity
+    rng = random.Random(7)
+    for alphabet, length in (("ACGT", 5000), ("ACDEFGHIKLMNPQRSTVWY", 400)):
+        base = "".join(rng.choices(alphabet, k=length))
+        k = kmer_size(base)
+        print(f"{'nucleotide' if k == NUCLEOTIDE_KMER_SIZE else 'protein'} (k={k}, {length} residues)")
+        print(f"{'identity':>9} {'true J':>7} {'est. J':>7} {'est. identity':>14}")
+        for identity in (1.0, 0.99, 0.95, 0.9, 0.8):
+            mutated = "".join(c if rng.random() < identity else rng.choice(alphabet) for c in base)
+            set_a = {base[i:i + k] for i in range(len(base) - k + 1)}
+            set_b = {mutated[i:i + k] for i in range(len(mutated) - k + 1)}
+            true_j = len(set_a & set_b) / len(set_a | set_b)
+            est_j = jaccard(compute_sketch(base)[1], compute_sketch(mutated)[1])
+            print(f"{identity:>9.2f} {true_j:>7.3f} {est_j:>7.3f} {identity_estimate(est_j, k):>14.3f}")
+
+    start = time.perf_counter()
+    genome = "".join(rng.choices("ACGT", k=1_000_000))
+    compute_sketch(genome)
+    print(f"Sketch of 1 Mbp: {time.perf_counter() - start:.2f} s")
@@ -0,0 +1,225 @@
+# nucleotide_pack.py
+"""
+Nucleotide Packing Module
+2-bit storage for DNA sequences: four bases per byte, with run lists for
+the characters that are not A/C/G/T (N and other IUPAC codes, gaps) and for
+lowercase (soft-masked) stretches, so every sequence round-trips exactly.
+Protein and other text that does not pack well is left to storage_codec.
+
+Packed layout (little-endian):
+    header      magic "2BIT", length (u64), exception runs (u32), lowercase runs (u32)
+    exceptions  start (u64), length (u64), character (1 byte) per run
+    lowercase   start (u64), length (u64) per run
+    bases       ceil(length / 4) bytes, first base in the high bits
+
+Because the bases sit at a fixed offset, any slice can be read from a
+BLOB handle without unpacking the whole record (see read_slice).
+"""
+
+import re
+import struct
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+import storage_codec
+
+
+# sequence_codec value of packed sequences
+CODEC_NAME = '2bit'
+
+# Shorter sequences are left to storage_codec (the header would not pay off)
+PACK_MIN_LENGTH = 64
+
+# Packing must at least halve the stored size, otherwise the sequence has
+# too many exceptions (protein, or heavily masked) and is stored as text
+MAX_PACKED_RATIO = 0.5
+
+_MAGIC = b'2BIT'
+_HEADER = struct.Struct('<4sQII')
+_EXCEPTION = struct.Struct('<QQc')
+_LOWER = struct.Struct('<QQ')
+
+_EXCEPTION_RE = re.compile(rb'([^ACGT])\1*')
+_LOWER_RE = re.compile(rb'[a-z]+')
+
+# Base -> 2-bit code (exceptions are stored as A and patched on unpack)
+_TO_CODES = bytes(b'ACGT'.find(value) if value in b'ACGT' else 0 for value in range(256))
+# Packed byte -> its four bases
+_BYTE_TO_BASES = [bytes(b'ACGT'[(value >> shift) & 3] for shift in (6, 4, 2, 0)) for value in range(256)]
+
+if NUMPY_AVAILABLE:
+    _CODE_LUT = np.zeros(256, dtype=np.uint8)
+    for _code, _base in enumerate(b'ACGT'):
+        _CODE_LUT[_base] = _code
+    # The four bases of a packed byte as one 32-bit word, so unpacking is one gather
+    _WORD_LUT = np.frombuffer(b''.join(_BYTE_TO_BASES), dtype=np.uint32)
+
+
+def _pack_codes(upper):
+    """Uppercase sequence bytes -> 2-bit packed bytes"""
+    if NUMPY_AVAILABLE:
+        codes = _CODE_LUT[np.frombuffer(upper, dtype=np.uint8)]
+        padded = np.zeros(-(-len(codes) // 4) * 4, dtype=np.uint8)
+        padded[:len(codes)] = codes
+        quads = padded.reshape(-1, 4)
+        return ((quads[:, 0] << 6) | (quads[:, 1] << 4) | (quads[:, 2] << 2) | quads[:, 3]).tobytes()
+
+    codes = upper.translate(_TO_CODES)
+    codes += b'\x00' * (-len(codes) % 4)
+    return bytes(a << 6 | b << 4 | c << 2 | d
+                 for a, b, c, d in zip(codes[0::4], codes[1::4], codes[2::4], codes[3::4]))
+
+
+def _unpack_codes(packed, first, count):
+    """
+    Bases first .. first + count of a packed byte string
+
+    Args:
+        packed (bytes): Packed bytes, starting with the byte holding base 'first'
+                        rounded down to a multiple of 4
+        first (int): Offset of the first wanted base inside packed[0]
+        count (int): Number of bases
+    """
+    if NUMPY_AVAILABLE:
+        bases = _WORD_LUT[np.frombuffer(packed, dtype=np.uint8)].view(np.uint8)
+        return bytearray(bases[first:first + count])
+
+    return bytearray(b''.join(map(_BYTE_TO_BASES.__getitem__, packed))[first:first + count])
+
+
+def pack(data):
+    """
+    Pack an ASCII nucleotide sequence
+
+    Args:
+        data (bytes): Sequence text
+
+    Returns:
+        bytes: Packed payload, or None if the sequence does not pack well
+               (too short, not ASCII, or mostly non-ACGT like protein)
+    """
+    if len(data) < PACK_MIN_LENGTH or not data.isascii():
+        return None
+
+    upper = data.upper()
+    exceptions = [(m.start(), m.end() - m.start(), m.group(1)) for m in _EXCEPTION_RE.finditer(upper)]
+    lower = [(m.start(), m.end() - m.start()) for m in _LOWER_RE.finditer(data)] if upper != data else []
+
+    size = _HEADER.size + len(exceptions) * _EXCEPTION.size + len(lower) * _LOWER.size + -(-len(data) // 4)
+    if size > len(data) * MAX_PACKED_RATIO:
+        return None
+
+    parts = [_HEADER.pack(_MAGIC, len(data), len(exceptions), len(lower))]
+    parts.extend(_EXCEPTION.pack(*run) for run in exceptions)
+    parts.extend(_LOWER.pack(*run) for run in lower)
+    parts.append(_pack_codes(upper))
+    return b''.join(parts)
+
+
+def read_slice(read, start=0, end=None):
+    """
+    Bases start .. end of a packed sequence, reading only what is needed
+
+    Args:
+        read: Function(offset, size) -> bytes of the packed payload
+              (e.g. a seek/read on an SQLite BLOB handle)
+        start (int): First base (0-based)
+        end (int): End base (exclusive), None = end of the sequence
+
+    Returns:
+        bytes: The requested part of the original sequence
+    """
+    magic, length, exception_count, lower_count = _HEADER.unpack(read(0, _HEADER.size))
+    if magic != _MAGIC:
+        raise ValueError("Not a 2-bit packed sequence")
+
+    start = max(0, min(start, length))
+    end = length if end is None else max(start, min(end, length))
+    offset = _HEADER.size
+    exception_table = read(offset, exception_count * _EXCEPTION.size)
+    offset += len(exception_table)
+    lower_table = read(offset, lower_count * _LOWER.size)
+    offset += len(lower_table)
+
+    if end == start:
+        return b''
+
+    first_byte = start // 4
+    packed = read(offset + first_byte, (end - 1) // 4 - first_byte + 1)
+    bases = _unpack_codes(packed, start - first_byte * 4, end - start)
+
+    for run_start, run_length, char in _EXCEPTION.iter_unpack(exception_table):
+        lo, hi = max(run_start, start), min(run_start + run_length, end)
+        if lo < hi:
+            bases[lo - start:hi - start] = char * (hi - lo)
+    for run_start, run_length in _LOWER.iter_unpack(lower_table):
+        lo, hi = max(run_start, start), min(run_start + run_length, end)
+        if lo < hi:
+            bases[lo - start:hi - start] = bases[lo - start:hi - start].lower()
+    return bytes(bases)
+
+
+def unpack(payload, start=0, end=None):
+    """Inverse of pack(), optionally only bases start .. end"""
+    payload = bytes(payload)
+    return read_slice(lambda offset, size: payload[offset:offset + size], start, end)
+
+
+def encode_sequence(text, fallback_codec=storage_codec.DEFAULT_CODEC):
+    """
+    Choose the stored form of a sequence: 2-bit if it packs, else storage_codec
+
+    Returns:
+        tuple: (codec name or None, stored value) as storage_codec.encode_text
+    """
+    if text is not None and text.isascii():
+        packed = pack(text.encode('ascii'))
+        if packed is not None:
+            return CODEC_NAME, packed
+    return storage_codec.encode_text(text, fallback_codec)
+
+
+# Packed sequences decode through storage_codec like compressed ones.
+# Packing needs the whole sequence, so there is no streaming mode.
+storage_codec.register_codec(storage_codec.Codec(
+    CODEC_NAME,
+    lambda data: pack(data) or data,
+    unpack,
+    None,
+    None
+))
+
+
+if __name__ == "__main__":
+    import time
+    import zlib
+
+    # Genome-scale benchmark: random genome with N gaps and soft-masked repeats
+    genome = bytearray(storage_codec.random_genome(20_000_000).encode('ascii'))
+    for position in range(0, len(genome), 1_000_000):
+        genome[position:position + 5000] = b'N' * 5000
+        genome[position + 200_000:position + 203_000] = genome[position + 200_000:position + 203_000].lower()
+    genome = bytes(genome)
+
+    print(f"NumPy: {'yes' if NUMPY_AVAILABLE else 'no (pure Python fallback)'}")
+    start = time.perf_counter()
+    packed = pack(genome)
+    packed_at = time.perf_counter()
+    assert unpack(packed) == genome
+    unpacked_at = time.perf_counter()
+    zlib_size = len(zlib.compress(genome, 6))
+    print(f"{len(genome):,} bases: text {len(genome):,} B, zlib {zlib_size:,} B, 2-bit {len(packed):,} B "
+          f"({len(genome) / len(packed):.2f}x)")
+    print(f"pack {(packed_at - start) * 1000:.0f} ms, unpack {(unpacked_at - packed_at) * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    for offset in range(0, len(genome) - 1000, len(genome) // 100):
+        assert unpack(packed, offset, offset + 1000) == genome[offset:offset + 1000]
+    print(f"1 kb slice: {(time.perf_counter() - start) * 10:.2f} ms")
+
+    protein = b"MKTAYIAKQRQISFVKSHFSRQLEERLGLIEVQAPILSRVGDGTQDNLSGAEKAVQVKVKALPDAQ" * 4
+    print(f"protein packs: {pack(protein) is not None}")
@@ -6,22 +6,166 @@ Handles SQLite database operations for biological sequence management
 
 import sqlite3
 import os
+import time
+
+from db_connection import ConnectionManager
+from document_store import DocumentStore, DocumentTooLargeError, MAX_DOCUMENT_SIZE
+from search_cache import SearchResultCache, normalize_query, like_match
+from kmer_index import KmerIndex, KmerIndexer, normalize_sequence
+from minhash import SketchIndex, compute_sketch, SIMILAR_LIMIT, MIN_JACCARD
+from sequence_dedup import (DuplicateSequenceError, sequence_hash, normalize_accession,
+                            SAME_SEQUENCE, SAME_ACCESSION)
+import sequence_dedup
+import storage_codec
+import nucleotide_pack
+
+
+# Metadata columns matched by search_sequences / search_sequence_summaries
+SEARCH_COLUMNS = ('gene_name', 'protein_name', 'organism_name', 'accession_number', 'user_name')
+
+# Columns filled by import_sequences (a record may leave any of them out)
+IMPORT_COLUMNS = ('user_name', 'user_affiliation', 'user_phone', 'gene_name', 'protein_name',
+                  'organism_name', 'accession_number', 'sequence')
+
+# Records inserted per executemany() call and transaction by import_sequences
+IMPORT_BATCH_SIZE = 10000
+
+
+class SequenceSummary:
+    """
+    Lightweight listing record without the sequence text or PDF.
+    Supports seq['id'] / seq.get('gene_name') like the full record dicts.
+    """
+    __slots__ = ('id', 'gene_name', 'protein_name', 'organism_name', 'accession_number', 'has_pdf')
+
+    def __init__(self, id, gene_name, protein_name, organism_name, accession_number, has_pdf):
+        self.id = id
+        self.gene_name = gene_name
+        self.protein_name = protein_name
+        self.organism_name = organism_name
+        self.accession_number = accession_number
+        self.has_pdf = bool(has_pdf)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __repr__(self):
+        return f"SequenceSummary(id={self.id!r}, gene_name={self.gene_name!r})"
 
 
 class SequenceDatabase:
-    def __init__(self, db_path="sequences.db"):
+    def __init__(self, db_path="sequences.db", pragmas=None, wal=None,
+                 max_pdf_size=MAX_DOCUMENT_SIZE, codec=storage_codec.DEFAULT_CODEC,
+                 pack_nucleotides=True):
         """
         Initialize sequence database
 
         Args:
             db_path (str): Path to SQLite database file
+            pragmas (dict): Optional PRAGMAs for the pooled connections
+            wal (bool): Opt in to WAL journal mode so searches are not blocked
+                        by a writer (synchronous/busy_timeout/wal_autocheckpoint
+                        can be tuned through pragmas). None = set by the
+                        BIOTOOLS_DB_WAL environment variable. Only for a
+                        database on a local disk: WAL is refused on network
+                        drives shared by several workstations
+            max_pdf_size (int): Largest accepted PDF upload in bytes
+            codec (str): storage_codec codec for sequences and PDFs (None = never compress)
+            pack_nucleotides (bool): Store DNA/RNA sequences 2-bit packed
+                                     (protein stays with codec)
         """
         self.db_path = db_path
+        self.connections = ConnectionManager.for_path(db_path, pragmas=pragmas, wal=wal)
+        self.codec = codec
+        self.pack_nucleotides = pack_nucleotides
+        self.documents = DocumentStore(max_size=max_pdf_size, codec=codec)
+        # Subsequence search; single edits are indexed in their own
+        # transaction, bulk imports by the background indexer
+        self.kmer_index = KmerIndex()
+        # MinHash sketches for find_similar, maintained the same way
+        self.sketch_index = SketchIndex()
+        self.kmer_indexer = None
+        # Search-as-you-type results; cleared by every add/update/delete
+        self.search_cache = SearchResultCache()
         self.init_database()
 
+    def _connect(self):
+        """Get the pooled connection for the calling thread"""
+        return self.connections.get_connection()
+
+    def close(self):
+        """Close all pooled connections to this database"""
+        if self.kmer_indexer:
+            self.kmer_indexer.stop()
+            self.kmer_indexer = None
+        self.connections.close_all()
+
+    def start_kmer_indexing(self):
+        """
+        Start the background indexer (k-mers and sketches) for sequences
+        added by bulk imports
+
+        Returns:
+            KmerIndexer: The running indexer
+        """
+        if self.kmer_indexer is None:
+            self.kmer_indexer = KmerIndexer(self)
+            self.kmer_indexer.start()
+        return self.kmer_indexer
+
+    def index_pending_kmers(self):
+        """
+        Add one batch of not yet indexed sequences to the k-mer index
+
+        Returns:
+            int: Number of sequences indexed (0 when the index is up to date)
+        """
+        return self.kmer_index.index_pending(self._connect(), self._load_sequences)
+
+    def index_pending_sketches(self):
+        """
+        Compute the MinHash sketches of one batch of not yet sketched sequences
+
+        Returns:
+            int: Number of sequences processed (0 when all are sketched)
+        """
+        return self.sketch_index.index_pending(self._connect(), self._load_sequences)
+
+    def kmer_tail_size(self):
+        """Longest k-mer posting list appended to since the last optimize_kmer_index()"""
+        return self.kmer_index.tail_size(self._connect().cursor())
+
+    def optimize_kmer_index(self):
+        """Merge the k-mer posting list segments left by bulk imports"""
+        start = time.perf_counter()
+        self.kmer_index.optimize(self._connect())
+        print(f"✓ K-mer index optimized ({time.perf_counter() - start:.1f} s)")
+
+    def _load_sequences(self, cursor, ids):
+        """(id, decoded sequence) of the given rows that have a sequence"""
+        cursor.execute(f'''
+            SELECT id, sequence, sequence_codec FROM sequences
+            WHERE id IN ({", ".join("?" * len(ids))}) AND sequence IS NOT NULL
+        ''', ids)
+        return [(row[0], storage_codec.decode_text(row[2], row[1])) for row in cursor.fetchall()]
+
+    def checkpoint(self, mode="PASSIVE"):
+        """Run a WAL checkpoint (no-op when WAL mode is not enabled)"""
+        return self.connections.checkpoint(mode)
+
+    def compact(self):
+        """Checkpoint the WAL and VACUUM the database file"""
+        return self.connections.compact()
+
     def init_database(self):
         """Initialize database with schema"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
 
         cursor.execute('''
@@ -35,11 +179,17 @@ class SequenceDatabase:
                 organism_name TEXT,
                 accession_number TEXT,
                 sequence TEXT,
-                pdf_data BLOB,
+                sequence_codec TEXT,
+                sequence_hash BLOB,
+                pdf_document_id INTEGER REFERENCES documents(id),
+                pdf_size INTEGER,
                 pdf_filename TEXT
             )
         ''')
 
+        # PDFs live in the content-addressed documents table
+        self.documents.init_schema(cursor)
+
         # Check and add missing columns
         cursor.execute("PRAGMA table_info(sequences)")
         columns = [column[1] for column in cursor.fetchall()]
@@ -50,9 +200,26 @@ class SequenceDatabase:
             cursor.execute('ALTER TABLE sequences ADD COLUMN user_affiliation TEXT')
         if 'user_phone' not in columns:
             cursor.execute('ALTER TABLE sequences ADD COLUMN user_phone TEXT')
-        if 'pdf_data' not in columns:
-            cursor.execute('ALTER TABLE sequences ADD COLUMN pdf_data BLOB')
+        if 'pdf_filename' not in columns:
             cursor.execute('ALTER TABLE sequences ADD COLUMN pdf_filename TEXT')
+        if 'pdf_document_id' not in columns:
+            cursor.execute('ALTER TABLE sequences ADD COLUMN pdf_document_id INTEGER REFERENCES documents(id)')
+            cursor.execute('ALTER TABLE sequences ADD COLUMN pdf_size INTEGER')
+        if 'sequence_codec' not in columns:
+            # NULL = plain TEXT, otherwise a compressed BLOB (see storage_codec)
+            cursor.execute('ALTER TABLE sequences ADD COLUMN sequence_codec TEXT')
+
+        self.documents.migrate_inline_blobs(cursor, 'sequences')
+
+        self.kmer_index.init_schema(cursor)
+        self.sketch_index.init_schema(cursor)
+
+        # Exact duplicate lookups: sequence_hash column plus hash/accession indexes
+        if sequence_dedup.init_schema(cursor):
+            conn.commit()
+            hashed = sequence_dedup.rehash_sequences(conn)
+            if hashed:
+                print(f"Hashed {hashed} existing sequence(s) for duplicate detection")
 
         # Create index for search performance
         try:
@@ -64,27 +231,103 @@ class SequenceDatabase:
             pass
 
         conn.commit()
-        conn.close()
         print("Sequence database schema updated successfully")
 
+    def _encode_sequence(self, sequence):
+        """(sequence_codec, stored value) for a sequence text"""
+        if self.pack_nucleotides:
+            return nucleotide_pack.encode_sequence(sequence, self.codec)
+        return storage_codec.encode_text(sequence, self.codec)
+
+    def _stored_sequence(self, cursor, seq_id):
+        """Decoded sequence text of a row (None if the row or sequence is missing)"""
+        cursor.execute('SELECT sequence, sequence_codec FROM sequences WHERE id = ?', (seq_id,))
+        row = cursor.fetchone()
+        return storage_codec.decode_text(row[1], row[0]) if row else None
+
+    def _filter_sql(self, query):
+        """
+        WHERE clause selecting the sequences that match a query
+
+        Returns:
+            tuple: (where_sql, params) - where_sql is '' for no query
+        """
+        if not query:
+            return "", ()
+        where = " OR ".join(f"{column} LIKE ?" for column in SEARCH_COLUMNS)
+        return f"({where})", (f"%{query}%",) * len(SEARCH_COLUMNS)
+
+    def _keyset_page(self, cursor, select_columns, query, after_id, limit):
+        """Run one keyset page query (id DESC) and return (rows, next_after_id)"""
+        where_sql, params = self._filter_sql(query)
+        conditions = [where_sql] if where_sql else []
+        if after_id is not None:
+            conditions.append("id < ?")
+            params = params + (after_id,)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        # Fetch one extra row to know whether another page follows
+        cursor.execute(f'''
+            SELECT {select_columns} FROM sequences
+            {where}
+            ORDER BY id DESC
+            LIMIT ?
+        ''', params + (limit + 1,))
+        rows = cursor.fetchall()
+
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, rows[-1][0]
+        return rows, None
+
     def add_sequence(self, user_name=None, user_affiliation=None, user_phone=None,
                     gene_name=None, protein_name=None, organism_name=None,
-                    accession_number=None, sequence=None, pdf_data=None, pdf_filename=None):
-        """Add a new sequence to the database"""
-        conn = sqlite3.connect(self.db_path)
+                    accession_number=None, sequence=None, pdf_data=None, pdf_filename=None,
+                    pdf_document_id=None, allow_duplicates=True):
+        """
+        Add a new sequence to the database
+
+        The PDF is either given as pdf_data or as pdf_document_id from
+        stage_pdf(); the sequence takes over the staged reference.
+
+        Raises:
+            DuplicateSequenceError: allow_duplicates is False and a stored
+                                    record has the same sequence or accession
+        """
+        conn = self._connect()
         cursor = conn.cursor()
+        hash_value = sequence_hash(sequence)
 
         try:
+            if not allow_duplicates:
+                duplicates = self._find_duplicates(cursor, hash_value, accession_number)
+                if duplicates:
+                    raise DuplicateSequenceError(duplicates)
+
+            pdf_size = None
+            if pdf_document_id is not None:
+                pdf_size = self.documents.get_info(cursor, pdf_document_id)[1]
+            elif pdf_data is not None:
+                pdf_document_id, pdf_size = self.documents.put(cursor, pdf_data)
+
+            sequence_codec, stored_sequence = self._encode_sequence(sequence)
+
             cursor.execute('''
                 INSERT INTO sequences 
                 (user_name, user_affiliation, user_phone, gene_name, protein_name, 
-                 organism_name, accession_number, sequence, pdf_data, pdf_filename)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                 organism_name, accession_number, sequence, sequence_codec, sequence_hash,
+                 pdf_document_id, pdf_size, pdf_filename)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (user_name, user_affiliation, user_phone, gene_name, protein_name,
-                  organism_name, accession_number, sequence, pdf_data, pdf_filename))
+                  organism_name, accession_number, stored_sequence, sequence_codec, hash_value,
+                  pdf_document_id, pdf_size, pdf_filename))
 
             sequence_id = cursor.lastrowid
+            if sequence:
+                self.kmer_index.add(cursor, sequence_id, sequence)
+                self.sketch_index.add(cursor, sequence_id, sequence)
             conn.commit()
+            self.search_cache.clear()
 
             sequence = self.get_sequence(sequence_id)
             return sequence
@@ -92,12 +335,194 @@ class SequenceDatabase:
             print(f"Database error: {e}")
             conn.rollback()
             return None
-        finally:
-            conn.close()
+
+    def find_duplicates(self, sequence=None, accession_number=None, exclude_id=None):
+        """
+        Stored records with the same sequence or accession number
+
+        Sequences are compared by hash after normalization (case, whitespace
+        and, for DNA/RNA, strand are ignored); accessions case-insensitively.
+
+        Args:
+            sequence (str): Sequence text to look for
+            accession_number (str): Accession to look for
+            exclude_id (int): Record to leave out (e.g. the one being edited)
+
+        Returns:
+            list: (SequenceSummary, reasons) tuples by id; reasons lists
+                  sequence_dedup.SAME_SEQUENCE and/or SAME_ACCESSION
+        """
+        cursor = self._connect().cursor()
+        try:
+            return self._find_duplicates(cursor, sequence_hash(sequence), accession_number, exclude_id)
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return []
+
+    def _find_duplicates(self, cursor, hash_value, accession_number, exclude_id=None):
+        duplicates = sequence_dedup.find_duplicates(cursor, hash_value, accession_number, exclude_id)
+        columns = "id, gene_name, protein_name, organism_name, accession_number, pdf_document_id IS NOT NULL"
+        return [(SequenceSummary(*row), duplicates[row[0]])
+                for row in self._iter_rows_by_id(columns, list(duplicates))]
+
+    def stage_pdf(self, file_path, progress=None):
+        """
+        Stream a PDF file into the document store ahead of saving a sequence
+
+        The staged document holds one reference until it is passed to
+        add_sequence(pdf_document_id=...) or given up with release_pdf().
+
+        Args:
+            file_path (str): PDF file to store
+            progress: Optional callback(bytes_done, bytes_total), called on this thread
+
+        Returns:
+            int: document id
+
+        Raises:
+            DocumentTooLargeError: The file is larger than max_pdf_size
+        """
+        conn = self._connect()
+        try:
+            document_id, _ = self.documents.put_file(conn.cursor(), file_path, progress=progress)
+            conn.commit()
+            return document_id
+        except (sqlite3.Error, OSError, DocumentTooLargeError) as e:
+            print(f"Could not store PDF {file_path}: {e}")
+            conn.rollback()
+            raise
+
+    def release_pdf(self, document_id):
+        """Give up a staged PDF that was never attached to a sequence"""
+        conn = self._connect()
+        try:
+            self.documents.release(conn.cursor(), document_id)
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            conn.rollback()
+
+    def import_sequences(self, records, batch_size=IMPORT_BATCH_SIZE, on_batch=None, cancel_event=None,
+                         skip_duplicates=False, on_duplicate=None):
+        """
+        Bulk insert sequences: one executemany() and one transaction per batch
+
+        Unlike add_sequence, rows are not read back, so a large FASTA file
+        goes in at parsing speed. The new sequences are queued for the k-mer
+        index and sketches rather than indexed here (see start_kmer_indexing). Batches
+        already committed stay in the database when the import is cancelled
+        or fails.
+
+        With skip_duplicates, records whose sequence or accession is already
+        stored - or appeared earlier in the same import - are left out. The
+        stored ones are looked up per batch, with a few IN queries on the
+        hash and accession indexes.
+
+        Args:
+            records: Iterable of dicts keyed by IMPORT_COLUMNS
+            batch_size (int): Records per transaction
+            on_batch: Optional callback(imported_count) after every commit
+            cancel_event: Optional threading.Event; checked between batches
+            skip_duplicates (bool): Leave out exact duplicates
+            on_duplicate: Optional callback(record, reason) for every skipped
+                          record (SAME_SEQUENCE or SAME_ACCESSION)
+
+        Returns:
+            int: Number of sequences imported
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        sql = f'''
+            INSERT INTO sequences ({", ".join(IMPORT_COLUMNS)}, sequence_codec, sequence_hash)
+            VALUES ({", ".join("?" * (len(IMPORT_COLUMNS) + 2))})
+        '''
+
+        imported = 0
+        # (record, row, sequence hash, lowercased accession) not yet inserted
+        batch = []
+        # Hashes and accessions seen in the current batch
+        batch_hashes = set()
+        batch_accessions = set()
+
+        def skip(record, reason):
+            if on_duplicate:
+                on_duplicate(record, reason)
+
+        def flush():
+            nonlocal imported
+            entries = batch
+            if skip_duplicates:
+                stored_hashes, stored_accessions = sequence_dedup.stored_keys(
+                    cursor, batch_hashes, batch_accessions)
+                entries = []
+                for entry in batch:
+                    record, _, hash_value, accession = entry
+                    if hash_value in stored_hashes:
+                        skip(record, SAME_SEQUENCE)
+                    elif accession in stored_accessions:
+                        skip(record, SAME_ACCESSION)
+                    else:
+                        entries.append(entry)
+
+            rows = []
+            for _, row, hash_value, _ in entries:
+                codec, row[-1] = self._encode_sequence(row[-1])
+                row.extend((codec, hash_value))
+                rows.append(row)
+            try:
+                cursor.executemany(sql, rows)
+                # The batch is the newest rows of this write transaction
+                for pending_table in (self.kmer_index.pending_table, self.sketch_index.pending_table):
+                    cursor.execute(f'''
+                        INSERT INTO {pending_table} (sequence_id)
+                        SELECT id FROM sequences
+                        WHERE id > (SELECT MAX(id) FROM sequences) - ? AND sequence IS NOT NULL
+                    ''', (len(rows),))
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+            finally:
+                self.search_cache.clear()
+            imported += len(rows)
+            batch.clear()
+            batch_hashes.clear()
+            batch_accessions.clear()
+            if self.kmer_indexer:
+                self.kmer_indexer.wake()
+            if on_batch:
+                on_batch(imported)
+
+        for record in records:
+            if cancel_event is not None and cancel_event.is_set():
+                batch.clear()
+                break
+            row = [record.get(column) for column in IMPORT_COLUMNS]
+            hash_value = sequence_hash(row[-1])
+            accession = normalize_accession(record.get('accession_number'))
+            accession = accession.lower() if accession else None
+            if skip_duplicates:
+                if hash_value is not None and hash_value in batch_hashes:
+                    skip(record, SAME_SEQUENCE)
+                    continue
+                if accession is not None and accession in batch_accessions:
+                    skip(record, SAME_ACCESSION)
+                    continue
+                if hash_value is not None:
+                    batch_hashes.add(hash_value)
+                if accession is not None:
+                    batch_accessions.add(accession)
+            batch.append((record, row, hash_value, accession))
+            if len(batch) >= batch_size:
+                flush()
+
+        if batch:
+            flush()
+        return imported
 
     def get_sequence(self, seq_id):
         """Get a specific sequence by ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
 
         try:
@@ -110,27 +535,322 @@ class SequenceDatabase:
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return None
-        finally:
-            conn.close()
+
+    def get_subsequence(self, seq_id, start=0, end=None):
+        """
+        Part of a stored sequence without loading the whole record
+
+        2-bit packed sequences are read in place through a BLOB handle, only
+        the bytes holding bases start .. end; plain text is cut in SQL.
+
+        Args:
+            seq_id (int): Sequence ID
+            start (int): First residue (0-based)
+            end (int): End residue (exclusive), None = to the end
+
+        Returns:
+            str: The subsequence ('' if the range is empty), or None if the
+                 record or its sequence does not exist
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('SELECT sequence_codec, sequence IS NULL FROM sequences WHERE id = ?', (seq_id,))
+            row = cursor.fetchone()
+            if not row or row[1]:
+                return None
+            codec = row[0]
+
+            if codec is None:
+                start = max(start, 0)
+                if end is None:
+                    cursor.execute('SELECT substr(sequence, ?) FROM sequences WHERE id = ?', (start + 1, seq_id))
+                else:
+                    cursor.execute('SELECT substr(sequence, ?, ?) FROM sequences WHERE id = ?',
+                                   (start + 1, max(0, end - start), seq_id))
+                return cursor.fetchone()[0]
+
+            if codec == nucleotide_pack.CODEC_NAME and hasattr(conn, 'blobopen'):
+                with conn.blobopen('sequences', 'sequence', seq_id, readonly=True) as blob:
+                    def read(offset, size):
+                        blob.seek(offset)
+                        return blob.read(size)
+                    return nucleotide_pack.read_slice(read, start, end).decode('ascii')
+
+            sequence = self._stored_sequence(cursor, seq_id)
+            return sequence[start:end]
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return None
 
     def get_all_sequences(self):
         """Get all sequences from database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
 
         try:
             cursor.execute('SELECT * FROM sequences ORDER BY id DESC')
             rows = cursor.fetchall()
-            return [self._row_to_dict(cursor, row) for row in rows]
+            return [self._row_to_dict(cursor, row, lazy=True) for row in rows]
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return []
+
+    def get_all_sequence_summaries(self):
+        """Get listing records for all sequences (no sequence text or PDF)"""
+        cursor = self._connect().cursor()
+
+        try:
+            cursor.execute('''
+                SELECT id, gene_name, protein_name, organism_name, accession_number,
+                       pdf_document_id IS NOT NULL
+                FROM sequences ORDER BY id DESC
+            ''')
+            return [SequenceSummary(*row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return []
+
+    def search_sequence_summaries(self, query):
+        """Search like search_sequences but only return listing records"""
+        cursor = self._connect().cursor()
+
+        try:
+            where = " OR ".join(f"{column} LIKE ?" for column in SEARCH_COLUMNS)
+            cursor.execute(f'''
+                SELECT id, gene_name, protein_name, organism_name, accession_number,
+                       pdf_document_id IS NOT NULL
+                FROM sequences
+                WHERE {where}
+                ORDER BY id DESC
+            ''', (f"%{query}%",) * len(SEARCH_COLUMNS))
+            return [SequenceSummary(*row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return []
+
+    def quick_search_sequence_summaries(self, query):
+        """
+        Search-as-you-type lookup backed by the in-memory result cache
+
+        A query that extends a cached one (e.g. "BRCA1" after "BRC") is
+        answered by filtering the cached hits.
+
+        Returns:
+            list or None: SequenceSummary hits, or None if more sequences match
+                          than the cache holds (use the paged listing then)
+        """
+        results = self.search_cache.get(query, like_match)
+        if results is not None:
+            return results
+
+        query = normalize_query(query)
+        generation = self.search_cache.generation
+        cursor = self._connect().cursor()
+
+        try:
+            where_sql, params = self._filter_sql(query)
+            # All searchable columns, one per line, to re-check hits in memory
+            text = " || char(10) || ".join(f"coalesce({column}, '')" for column in SEARCH_COLUMNS)
+            cursor.execute(f'''
+                SELECT id, gene_name, protein_name, organism_name, accession_number,
+                       pdf_document_id IS NOT NULL, {text}
+                FROM sequences
+                WHERE {where_sql}
+                ORDER BY id DESC
+                LIMIT ?
+            ''', params + (self.search_cache.max_results + 1,))
+            rows = cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return []
-        finally:
-            conn.close()
+
+        if len(rows) > self.search_cache.max_results:
+            return None
+
+        entries = [(SequenceSummary(*row[:6]), row[6].lower()) for row in rows]
+        self.search_cache.put(query, entries, generation)
+        return [summary for summary, _ in entries]
+
+    def count_sequences(self, query=None):
+        """Number of sequences matching query (all sequences if None)"""
+        cursor = self._connect().cursor()
+
+        try:
+            where_sql, params = self._filter_sql(query)
+            where = f"WHERE {where_sql}" if where_sql else ""
+            cursor.execute(f"SELECT COUNT(*) FROM sequences {where}", params)
+            return cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return 0
+
+    def get_sequence_summary_page(self, query=None, after_id=None, limit=50):
+        """
+        Get one page of listing records, newest first (keyset pagination)
+
+        Args:
+            query (str): Search text, or None to list all sequences
+            after_id (int): Last id of the previous page, None for the first page
+            limit (int): Page size
+
+        Returns:
+            tuple: (list of SequenceSummary, next_after_id or None if last page)
+        """
+        cursor = self._connect().cursor()
+
+        try:
+            rows, next_after_id = self._keyset_page(
+                cursor,
+                "id, gene_name, protein_name, organism_name, accession_number, pdf_document_id IS NOT NULL",
+                query, after_id, limit)
+            return [SequenceSummary(*row) for row in rows], next_after_id
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return [], None
+
+    def iter_fasta_rows(self, query=None, batch_size=500, sequence_ids=None):
+        """
+        Stream the FASTA fields of matching sequences, newest first
+
+        Pages through the table by id fetching only the header fields, then
+        loads the sequences one at a time, so a single sequence is in memory
+        however long the records are, and no read lock is held between pages.
+
+        Args:
+            query (str): Search text (None = all sequences)
+            batch_size (int): Header rows per page
+            sequence_ids (list): Export exactly these rows, in this order
+                                 (e.g. subsequence search hits) instead of query
+
+        Yields:
+            tuple: (id, accession_number, gene_name, protein_name, organism_name, sequence)
+        """
+        columns = "id, accession_number, gene_name, protein_name, organism_name"
+        if sequence_ids is not None:
+            rows = self._iter_rows_by_id(columns, list(sequence_ids), batch_size)
+        else:
+            rows = (row for page in self._iter_keyset_pages(columns, query, batch_size) for row in page)
+
+        cursor = self._connect().cursor()
+        for row in rows:
+            cursor.execute('SELECT sequence, sequence_codec FROM sequences WHERE id = ?', (row[0],))
+            stored = cursor.fetchone()
+            # Skip rows deleted since their page was read
+            if stored:
+                yield row + (storage_codec.decode_text(stored[1], stored[0]),)
+
+    def _iter_keyset_pages(self, columns, query, batch_size):
+        """Yield the keyset pages (lists of rows, id DESC) of a listing"""
+        after_id = None
+        while True:
+            rows, after_id = self._keyset_page(self._connect().cursor(), columns, query, after_id, batch_size)
+            yield rows
+            if after_id is None:
+                return
+
+    def search_subsequence(self, pattern, limit=None):
+        """
+        Find the sequences that contain pattern (case and whitespace insensitive)
+
+        Patterns of at least k residues are answered from the k-mer index:
+        the posting lists give candidates, which are then checked. Shorter
+        patterns have too many candidates and fall back to a full scan.
+
+        Args:
+            pattern (str): Subsequence to look for
+            limit (int): Maximum number of hits (None = all)
+
+        Returns:
+            list: SequenceSummary listing records, newest first
+        """
+        pattern = normalize_sequence(pattern)
+        if not pattern:
+            return []
+
+        cursor = self._connect().cursor()
+        columns = ("id, gene_name, protein_name, organism_name, accession_number, "
+                   "pdf_document_id IS NOT NULL, sequence, sequence_codec")
+        try:
+            if len(pattern) >= self.kmer_index.k:
+                candidate_ids = sorted(self.kmer_index.candidates(cursor, pattern), reverse=True)
+                checked = len(candidate_ids)
+                rows = self._iter_rows_by_id(columns, candidate_ids)
+            else:
+                checked = "all"
+                cursor.execute(f'SELECT {columns} FROM sequences WHERE sequence IS NOT NULL ORDER BY id DESC')
+                rows = cursor
+
+            hits = []
+            for row in rows:
+                if pattern in normalize_sequence(storage_codec.decode_text(row[7], row[6])):
+                    hits.append(SequenceSummary(*row[:6]))
+                    if limit is not None and len(hits) >= limit:
+                        break
+
+            print(f"✓ Subsequence search: {len(hits)} hit(s), {checked} candidate(s) checked")
+            return hits
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return []
+
+    def find_similar(self, seq_id=None, sequence=None, limit=SIMILAR_LIMIT, min_jaccard=MIN_JACCARD):
+        """
+        Find stored sequences similar to a stored record or to a new sequence
+
+        Compares MinHash sketches of the LSH candidates only, so the cost
+        does not grow with the size of the table. Sequences still waiting
+        for the background indexer are not found yet.
+
+        Args:
+            seq_id (int): Stored sequence to compare (excluded from the hits)
+            sequence (str): Sequence text to compare, if seq_id is None
+            limit (int): Maximum number of hits (None = all)
+            min_jaccard (float): Lowest estimated Jaccard similarity reported
+
+        Returns:
+            list: (SequenceSummary, jaccard, identity) tuples, most similar first;
+                  identity is the Mash estimate of sequence identity (ANI/AAI)
+        """
+        cursor = self._connect().cursor()
+        try:
+            if seq_id is not None:
+                sketch = self.sketch_index.stored_sketch(cursor, seq_id)
+                if sketch is None:
+                    sketch = compute_sketch(self._stored_sequence(cursor, seq_id) or "")
+            else:
+                sketch = compute_sketch(sequence or "")
+            if sketch is None:
+                return []
+
+            k, values = sketch
+            hits = self.sketch_index.similar(cursor, k, values, limit, min_jaccard, exclude_id=seq_id)
+            scores = {hit[0]: hit[1:] for hit in hits}
+            columns = "id, gene_name, protein_name, organism_name, accession_number, pdf_document_id IS NOT NULL"
+            results = [(SequenceSummary(*row),) + scores[row[0]]
+                       for row in self._iter_rows_by_id(columns, [hit[0] for hit in hits])]
+            print(f"✓ Similarity search: {len(results)} similar sequence(s)")
+            return results
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return []
+
+    def _iter_rows_by_id(self, columns, ids, batch_size=500):
+        """Yield the rows with the given ids (in the order of ids) batch by batch"""
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            cursor = self._connect().cursor()
+            cursor.execute(f'SELECT {columns} FROM sequences WHERE id IN ({", ".join("?" * len(batch))})',
+                           batch)
+            rows = {row[0]: row for row in cursor.fetchall()}
+            for seq_id in batch:
+                if seq_id in rows:
+                    yield rows[seq_id]
 
     def search_sequences(self, query):
         """Search sequences by query string"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
 
         try:
@@ -143,89 +863,134 @@ class SequenceDatabase:
             ''', (search_term, search_term, search_term, search_term, search_term))
 
             rows = cursor.fetchall()
-            return [self._row_to_dict(cursor, row) for row in rows]
+            return [self._row_to_dict(cursor, row, lazy=True) for row in rows]
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return []
-        finally:
-            conn.close()
 
     def update_sequence(self, seq_id, user_name=None, user_affiliation=None, user_phone=None,
                        gene_name=None, protein_name=None, organism_name=None,
                        accession_number=None, sequence=None):
         """Update an existing sequence"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
 
         try:
+            old_sequence = self._stored_sequence(cursor, seq_id)
+            sequence_codec, stored_sequence = self._encode_sequence(sequence)
+
             cursor.execute('''
                 UPDATE sequences 
                 SET user_name = ?, user_affiliation = ?, user_phone = ?,
                     gene_name = ?, protein_name = ?, organism_name = ?,
-                    accession_number = ?, sequence = ?
+                    accession_number = ?, sequence = ?, sequence_codec = ?, sequence_hash = ?
                 WHERE id = ?
             ''', (user_name, user_affiliation, user_phone, gene_name, protein_name,
-                  organism_name, accession_number, sequence, seq_id))
+                  organism_name, accession_number, stored_sequence, sequence_codec,
+                  sequence_hash(sequence), seq_id))
 
             success = cursor.rowcount > 0
+            if success and normalize_sequence(old_sequence) != normalize_sequence(sequence):
+                self.kmer_index.replace(cursor, seq_id, old_sequence, sequence)
+                self.sketch_index.remove(cursor, seq_id)
+                if sequence:
+                    self.sketch_index.add(cursor, seq_id, sequence)
             conn.commit()
+            self.search_cache.clear()
             return success
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             conn.rollback()
             return False
-        finally:
-            conn.close()
 
     def delete_sequence(self, seq_id):
         """Delete a sequence by ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
 
         try:
+            cursor.execute('SELECT pdf_document_id FROM sequences WHERE id = ?', (seq_id,))
+            row = cursor.fetchone()
+            old_sequence = self._stored_sequence(cursor, seq_id)
+
+            if row:
+                # Before the DELETE: its trigger would drop the pending entries
+                # that tell the indexes the sequence was never indexed
+                if old_sequence:
+                    self.kmer_index.remove(cursor, seq_id, old_sequence)
+                self.sketch_index.remove(cursor, seq_id)
+
             cursor.execute('DELETE FROM sequences WHERE id = ?', (seq_id,))
             success = cursor.rowcount > 0
+            if success:
+                self.documents.release(cursor, row[0])
             conn.commit()
+            self.search_cache.clear()
             return success
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             conn.rollback()
             return False
-        finally:
-            conn.close()
 
-    def _row_to_dict(self, cursor, row):
-        """Convert SQLite row to dictionary"""
+    def _row_to_dict(self, cursor, row, lazy=False):
+        """
+        Convert SQLite row to dictionary
+
+        With lazy=True (bulk listings) a compressed sequence is only
+        decompressed when the record's 'sequence' value is read (see
+        storage_codec.LazyRecord).
+        """
         columns = [description[0] for description in cursor.description]
         result = {}
         for i, column in enumerate(columns):
             result[column] = row[i]
-        return result
+
+        codec = result.pop('sequence_codec', None)
+        if codec is None:
+            return result
+        if not lazy:
+            result['sequence'] = storage_codec.decode_text(codec, result['sequence'])
+            return result
+        encoded = {'sequence': (codec, result.pop('sequence'))}
+        return storage_codec.LazyRecord(result, encoded)
+
+    def get_pdf_data(self, seq_id):
+        """Load the PDF content of a sequence record (only when it is needed)"""
+        cursor = self._connect().cursor()
+
+        try:
+            cursor.execute('SELECT pdf_document_id FROM sequences WHERE id = ?', (seq_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return self.documents.read(cursor, row[0])
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return None
 
     def export_pdf(self, seq_id, save_path=None):
         """Export PDF file from database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
 
         try:
-            cursor.execute('SELECT pdf_data, pdf_filename FROM sequences WHERE id = ?', (seq_id,))
+            cursor.execute('SELECT pdf_document_id, pdf_filename FROM sequences WHERE id = ?', (seq_id,))
             result = cursor.fetchone()
 
             if result and result[0] is not None:
-                pdf_data, pdf_filename = result[0], result[1]
+                document_id, pdf_filename = result[0], result[1]
 
                 if save_path is None:
                     downloads_dir = "downloads"
                     os.makedirs(downloads_dir, exist_ok=True)
                     save_path = os.path.join(downloads_dir, pdf_filename)
 
+                # Stream the BLOB to disk instead of loading it whole
                 with open(save_path, 'wb') as file:
-                    file.write(pdf_data)
+                    self.documents.copy_to_file(cursor, document_id, file)
 
                 return save_path
             return None
         except Exception as e:
             print(f"Error exporting PDF: {e}")
             return None
-        finally:
-            conn.close()
\ No newline at end of file
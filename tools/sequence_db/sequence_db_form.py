@@ -7,9 +7,17 @@ import tkinter as tk
 from tkinter import messagebox, filedialog
 import os
 
+from query_executor import QueryExecutor
+from sequence_dedup import DuplicateSequenceError, REASON_LABELS
+
+
+# Similar stored sequences listed after a submission
+SIMILAR_PREVIEW = 5
+
 
 class SequenceFormGUI:
-    def __init__(self, parent_container, db, back_button_image, navigate_back_callback, navigate_to_callback):
+    def __init__(self, parent_container, db, back_button_image, navigate_back_callback, navigate_to_callback,
+                 executor=None):
         """Initialize the form GUI component"""
         self.parent_container = parent_container
         self.db = db
@@ -17,9 +25,15 @@ class SequenceFormGUI:
         self.navigate_back = navigate_back_callback
         self.navigate_to = navigate_to_callback
 
+        # Saving runs on a worker thread so the form keeps repainting
+        self.executor = executor if executor else QueryExecutor(parent_container)
+
         self.form_entries = {}
-        self.current_pdf_data = None
+        # Uploaded PDFs are streamed into the document store right away;
+        # the form only keeps the staged document id until it is saved
+        self.current_pdf_document_id = None
         self.current_pdf_filename = None
+        self.upload_in_progress = False
         self.pdf_status_label = None
 
         # Debug output
@@ -378,19 +392,59 @@ class SequenceFormGUI:
             filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")]
         )
 
-        if file_path:
-            try:
-                with open(file_path, 'rb') as file:
-                    self.current_pdf_data = file.read()
-                self.current_pdf_filename = os.path.basename(file_path)
-                if self.pdf_status_label:
-                    self.pdf_status_label.config(
-                        text=f"PDF: {self.current_pdf_filename}",
-                        fg="#4CAF50"
-                    )
-                messagebox.showinfo("Success", f"PDF '{self.current_pdf_filename}' uploaded successfully!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to upload PDF: {str(e)}")
+        if not file_path:
+            return
+        if self.upload_in_progress:
+            messagebox.showwarning("Upload Running", "Please wait for the current PDF upload to finish.")
+            return
+        if not self.db:
+            messagebox.showerror("Error", "Database not available")
+            return
+
+        # Replacing an earlier upload of this form
+        self.discard_staged_pdf()
+
+        filename = os.path.basename(file_path)
+        self.upload_in_progress = True
+        self.show_pdf_status(f"Uploading {filename}...", "#FFD54F")
+
+        # Streamed into the database on the worker thread, chunk by chunk
+        self.executor.submit(
+            self.db.stage_pdf,
+            file_path,
+            on_done=lambda document_id: self.on_pdf_staged(document_id, filename),
+            on_error=self.on_pdf_upload_failed,
+            on_progress=lambda done, total: self.show_pdf_status(
+                f"Uploading {filename}... {done * 100 // max(total, 1)}%", "#FFD54F")
+        )
+
+    def on_pdf_staged(self, document_id, filename):
+        """Handle the result of a background stage_pdf call"""
+        self.upload_in_progress = False
+        self.current_pdf_document_id = document_id
+        self.current_pdf_filename = filename
+        self.show_pdf_status(f"PDF: {filename}", "#4CAF50")
+        messagebox.showinfo("Success", f"PDF '{filename}' uploaded successfully!")
+
+    def on_pdf_upload_failed(self, error):
+        self.upload_in_progress = False
+        self.show_pdf_status("No PDF uploaded", "#FFD54F")
+        messagebox.showerror("Error", f"Failed to upload PDF: {str(error)}")
+
+    def show_pdf_status(self, text, color):
+        try:
+            if self.pdf_status_label:
+                self.pdf_status_label.config(text=text, fg=color)
+        except tk.TclError:
+            # Form was closed while the upload was running
+            pass
+
+    def discard_staged_pdf(self):
+        """Release an uploaded PDF that was not saved with a sequence"""
+        if self.current_pdf_document_id is not None and self.db:
+            self.executor.submit(self.db.release_pdf, self.current_pdf_document_id)
+        self.current_pdf_document_id = None
+        self.current_pdf_filename = None
 
     def save_sequence(self):
         """Handle sequence submission"""
@@ -404,36 +458,109 @@ class SequenceFormGUI:
         accession_number = self.form_entries['accession_number'].get().strip()
         sequence = self.form_entries['sequence'].get("1.0", tk.END).strip()
 
+        if self.upload_in_progress:
+            messagebox.showwarning("Upload Running", "Please wait for the PDF upload to finish.")
+            return
+
         if not any([user_name, user_affiliation, user_phone, gene_name, protein_name,
-                    organism_name, accession_number, sequence, self.current_pdf_data]):
+                    organism_name, accession_number, sequence, self.current_pdf_document_id]):
             messagebox.showwarning("Empty Form", "Please fill in at least one field or upload a PDF file.")
             return
 
         if self.db:
-            try:
-                seq = self.db.add_sequence(
-                    user_name=user_name if user_name else None,
-                    user_affiliation=user_affiliation if user_affiliation else None,
-                    user_phone=user_phone if user_phone else None,
-                    gene_name=gene_name if gene_name else None,
-                    protein_name=protein_name if protein_name else None,
-                    organism_name=organism_name if organism_name else None,
-                    accession_number=accession_number if accession_number else None,
-                    sequence=sequence if sequence else None,
-                    pdf_data=self.current_pdf_data,
-                    pdf_filename=self.current_pdf_filename
-                )
-                messagebox.showinfo(
-                    "Success",
-                    f"Sequence submitted successfully!\n\nID: {seq['id']}\nGene: {gene_name if gene_name else 'Not provided'}"
+            self.submit_sequence(dict(
+                user_name=user_name if user_name else None,
+                user_affiliation=user_affiliation if user_affiliation else None,
+                user_phone=user_phone if user_phone else None,
+                gene_name=gene_name if gene_name else None,
+                protein_name=protein_name if protein_name else None,
+                organism_name=organism_name if organism_name else None,
+                accession_number=accession_number if accession_number else None,
+                sequence=sequence if sequence else None,
+                pdf_document_id=self.current_pdf_document_id,
+                pdf_filename=self.current_pdf_filename
+            ), gene_name)
+
+    def submit_sequence(self, fields, gene_name, allow_duplicates=False):
+        """Save on the worker thread; a duplicate is only stored after confirmation"""
+        self.executor.submit(
+            self.db.add_sequence,
+            allow_duplicates=allow_duplicates,
+            on_done=lambda seq: self.on_sequence_saved(seq, gene_name),
+            on_error=lambda e: self.on_save_failed(e, fields, gene_name),
+            **fields
+        )
+
+    def on_save_failed(self, error, fields, gene_name):
+        """Ask before storing a duplicate; report any other error"""
+        if not isinstance(error, DuplicateSequenceError):
+            messagebox.showerror("Error", f"Failed to save sequence:\n{str(error)}")
+            return
+
+        lines = [f"  • #{summary.id} {summary.get('accession_number') or summary.get('gene_name') or ''}".rstrip()
+                 + f" - {' and '.join(REASON_LABELS[reason] for reason in reasons)}"
+                 for summary, reasons in error.duplicates]
+        if messagebox.askyesno(
+            "Duplicate Sequence",
+            "This submission duplicates sequences already in the database:\n" + "\n".join(lines)
+            + "\n\nSave it anyway?"
+        ):
+            self.submit_sequence(fields, gene_name, allow_duplicates=True)
+
+    def on_sequence_saved(self, seq, gene_name):
+        """Handle the result of a background add_sequence call"""
+        # Keep the form (and the staged PDF) so a failed save can be retried
+        if seq is None:
+            messagebox.showerror("Error", "Failed to save sequence. Database returned None.")
+            return
+
+        if not isinstance(seq, dict) or 'id' not in seq:
+            messagebox.showerror("Error", "Failed to save sequence. Invalid response from database.")
+            return
+
+        try:
+            # The sequence now owns the staged PDF
+            self.current_pdf_document_id = None
+            self.clear_form()
+            if seq.get('sequence'):
+                # Tell the submitter right away about similar stored sequences
+                self.executor.submit(
+                    self.db.find_similar, seq['id'], limit=SIMILAR_PREVIEW,
+                    on_done=lambda hits: self.report_saved(seq, gene_name, hits),
+                    on_error=lambda e: self.report_saved(seq, gene_name, [])
                 )
-                self.clear_form()
-                self.navigate_to("main_view")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to save sequence:\n{str(e)}")
+            else:
+                self.report_saved(seq, gene_name, [])
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save sequence:\n{str(e)}")
+
+    def report_saved(self, seq, gene_name, similar):
+        """Confirm a submission, offering to list similar sequences already stored"""
+        message = f"Sequence submitted successfully!\n\nID: {seq['id']}\nGene: {gene_name if gene_name else 'Not provided'}"
+        if not similar:
+            messagebox.showinfo("Success", message)
+            self.navigate_to("main_view")
+            return
+
+        lines = [f"  • {hit.get('accession_number') or hit.get('gene_name') or f'Sequence #{hit.id}'}"
+                 f" - ~{identity:.0%} identity" for hit, jaccard, identity in similar]
+        if messagebox.askyesno(
+            "Similar Sequences Found",
+            f"{message}\n\nSimilar sequences already in the database:\n" + "\n".join(lines)
+            + "\n\nShow the similar sequences?"
+        ):
+            self.navigate_to("similar", seq)
+        else:
+            self.navigate_to("main_view")
+
+    def update_sequence_data(self, seq_id, entries, on_updated=None):
+        """
+        Update sequence in database (in the background: re-indexing and
+        sketching a changed sequence can take a while)
 
-    def update_sequence_data(self, seq_id, entries):
-        """Update sequence in database"""
+        Args:
+            on_updated: Optional callback(sequence) with the saved record
+        """
         user_name = entries['user_name'].get().strip()
         user_affiliation = entries['user_affiliation'].get().strip()
         user_phone = entries['user_phone'].get().strip()
@@ -445,9 +572,14 @@ class SequenceFormGUI:
         sequence = entries['sequence'].get("1.0", tk.END).strip()
 
         if self.db:
+            def update_and_reload(**fields):
+                if not self.db.update_sequence(seq_id=seq_id, **fields):
+                    return None
+                return self.db.get_sequence(seq_id)
+
             try:
-                success = self.db.update_sequence(
-                    seq_id=seq_id,
+                self.executor.submit(
+                    update_and_reload,
                     user_name=user_name if user_name else None,
                     user_affiliation=user_affiliation if user_affiliation else None,
                     user_phone=user_phone if user_phone else None,
@@ -455,17 +587,22 @@ class SequenceFormGUI:
                     protein_name=protein_name if protein_name else None,
                     organism_name=organism_name if organism_name else None,
                     accession_number=accession_number if accession_number else None,
-                    sequence=sequence if sequence else None
+                    sequence=sequence if sequence else None,
+                    on_done=lambda seq: self.on_sequence_updated(seq, on_updated),
+                    on_error=lambda e: messagebox.showerror("Error", f"Failed to update sequence:\n{str(e)}")
                 )
-                if success:
-                    messagebox.showinfo("Success", "Sequence updated successfully!")
-                    return True
-                else:
-                    messagebox.showerror("Error", "Failed to update sequence")
-                    return False
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to update sequence:\n{str(e)}")
-                return False
+
+    def on_sequence_updated(self, seq, on_updated):
+        """Handle the result of a background update"""
+        if seq is None:
+            messagebox.showerror("Error", "Failed to update sequence")
+            return
+
+        messagebox.showinfo("Success", "Sequence updated successfully!")
+        if on_updated:
+            on_updated(seq)
 
     def clear_form(self):
         """Clear all form fields"""
@@ -475,7 +612,5 @@ class SequenceFormGUI:
             else:
                 widget.delete(0, tk.END)
 
-        self.current_pdf_data = None
-        self.current_pdf_filename = None
-        if self.pdf_status_label:
-            self.pdf_status_label.config(text="No PDF uploaded", fg="#FFD54F")
\ No newline at end of file
+        self.discard_staged_pdf()
+        self.show_pdf_status("No PDF uploaded", "#FFD54F")
\ No newline at end of file
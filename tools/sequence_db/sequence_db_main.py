@@ -3,10 +3,11 @@ Main Sequence Database GUI Module
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from pathlib import Path
 import sys
 import os
+import threading
 
 # Try to import PIL for back button image
 try:
@@ -33,6 +34,9 @@ except ImportError:
 
 from sequence_db_form import SequenceFormGUI
 from sequence_db_results import SequenceResultsGUI
+from query_executor import QueryExecutor
+import sequence_import
+from sequence_dedup import REASON_LABELS
 
 
 class SequenceDatabaseGUI(tk.Frame):
@@ -43,6 +47,8 @@ class SequenceDatabaseGUI(tk.Frame):
 
         if DB_AVAILABLE:
             self.db = SequenceDatabase()
+            # Index sequences from bulk imports for "Sequence Search"
+            self.db.start_kmer_indexing()
         else:
             self.db = None
 
@@ -53,6 +59,16 @@ class SequenceDatabaseGUI(tk.Frame):
         self.navigation_history = []
         self.setup_ttk_style()
 
+        # One background worker shared by the form and results screens
+        self.busy_label = None
+        self.executor = QueryExecutor(self, on_busy=self.set_busy)
+
+        # Bulk imports get their own worker so searching keeps working meanwhile
+        self.import_executor = QueryExecutor(self)
+        self.import_cancel = None
+        self.import_status_label = None
+        self.import_cancel_button = None
+
         self.main_container = tk.Frame(self, bg="#305CDE")
         self.main_container.pack(fill="both", expand=True)
 
@@ -67,13 +83,15 @@ class SequenceDatabaseGUI(tk.Frame):
             self.db,
             self.back_button_image,
             self.navigate_back,
-            self.navigate_to
+            self.navigate_to,
+            executor=self.executor
         )
 
         self.results_gui = SequenceResultsGUI(
             self.main_view_container,
             self.db,
-            self.navigate_to
+            self.navigate_to,
+            executor=self.executor
         )
 
         self.create_main_view_frame()
@@ -179,6 +197,12 @@ class SequenceDatabaseGUI(tk.Frame):
         style.map("Vertical.TScrollbar",
                   background=[('active', '#1976D2'), ('!active', '#305CDE')])
 
+    def set_busy(self, busy):
+        """Show or hide the busy indicator while database work is running"""
+        self.config(cursor="watch" if busy else "")
+        if self.busy_label:
+            self.busy_label.config(text="⏳ Working..." if busy else "")
+
     def navigate_to(self, frame_name, *args):
         """Navigate to a specific frame and track history"""
         current_frame = self.get_current_frame_name()
@@ -193,6 +217,9 @@ class SequenceDatabaseGUI(tk.Frame):
             self.show_sequence_detail(args[0])
         elif frame_name == "edit":
             self.show_edit_frame(args[0])
+        elif frame_name == "similar":
+            self.show_main_view()
+            self.results_gui.show_similar(args[0])
 
     def navigate_back(self):
         """Navigate back to previous frame"""
@@ -262,6 +289,46 @@ class SequenceDatabaseGUI(tk.Frame):
         )
         submission_title.pack(anchor="w", pady=(0, 8))
 
+        import_frame = tk.Frame(submission_frame, bg="#305CDE")
+        import_frame.pack(anchor="w", fill=tk.X)
+
+        tk.Button(
+            import_frame,
+            text="📥 Import FASTA/GenBank",
+            command=self.import_sequence_file,
+            bg="#FF9800",
+            fg="white",
+            font=("Arial", 10, "bold"),
+            cursor="hand2",
+            relief=tk.FLAT,
+            bd=0,
+            padx=15,
+            pady=5
+        ).pack(side=tk.LEFT)
+
+        self.import_cancel_button = tk.Button(
+            import_frame,
+            text="Cancel Import",
+            command=self.cancel_import,
+            bg="#E0E0E0",
+            fg="#333333",
+            font=("Arial", 9),
+            cursor="hand2",
+            relief=tk.FLAT,
+            bd=0,
+            padx=10,
+            pady=5
+        )
+
+        self.import_status_label = tk.Label(
+            import_frame,
+            text="",
+            font=("Arial", 9, "italic"),
+            fg="#FFD54F",
+            bg="#305CDE"
+        )
+        self.import_status_label.pack(side=tk.LEFT, padx=(10, 0))
+
         user_info_frame = tk.Frame(self.main_view_container, bg="#305CDE")
         user_info_frame.pack(fill=tk.X, padx=60, pady=(10, 0))
 
@@ -315,7 +382,8 @@ class SequenceDatabaseGUI(tk.Frame):
 
         search_desc = tk.Label(
             self.main_view_container,
-            text="Search for sequences by gene name, protein name, organism name, or accession number.",
+            text="Search for sequences by gene name, protein name, organism name, or accession number, "
+                 "or choose Sequence Search to find sequences containing a subsequence.",
             font=("Arial", 10),
             fg="white",
             bg="#305CDE",
@@ -324,6 +392,48 @@ class SequenceDatabaseGUI(tk.Frame):
         )
         search_desc.pack(pady=(0, 15), padx=40)
 
+        # Search type selection
+        search_type_frame = tk.Frame(self.main_view_container, bg="#305CDE")
+        search_type_frame.pack(fill=tk.X, padx=60, pady=(0, 10))
+
+        tk.Label(
+            search_type_frame,
+            text="Search Type:",
+            font=("Arial", 11, "bold"),
+            fg="white",
+            bg="#305CDE"
+        ).pack(side=tk.LEFT)
+
+        self.search_type = tk.StringVar(value="metadata")
+
+        metadata_radio = tk.Radiobutton(
+            search_type_frame,
+            text="Metadata Search",
+            variable=self.search_type,
+            value="metadata",
+            font=("Arial", 10),
+            fg="white",
+            bg="#305CDE",
+            selectcolor="#305CDE",
+            activebackground="#305CDE",
+            activeforeground="white"
+        )
+        metadata_radio.pack(side=tk.LEFT, padx=(20, 10))
+
+        sequence_radio = tk.Radiobutton(
+            search_type_frame,
+            text="Sequence Search",
+            variable=self.search_type,
+            value="sequence",
+            font=("Arial", 10),
+            fg="white",
+            bg="#305CDE",
+            selectcolor="#305CDE",
+            activebackground="#305CDE",
+            activeforeground="white"
+        )
+        sequence_radio.pack(side=tk.LEFT, padx=(10, 0))
+
         # Search box with button
         search_container = tk.Frame(self.main_view_container, bg="#305CDE")
         search_container.pack(fill=tk.X, padx=60, pady=(0, 20))
@@ -338,6 +448,8 @@ class SequenceDatabaseGUI(tk.Frame):
         )
         self.search_entry.pack(fill=tk.X, side=tk.LEFT, expand=True, ipady=8)
         self.search_entry.bind("<Return>", lambda e: self.results_gui.perform_search())
+        # Search as you type (debounced, served from the result cache)
+        self.search_entry.bind("<KeyRelease>", lambda e: self.results_gui.schedule_incremental_search())
 
         search_button = tk.Button(
             search_container,
@@ -369,8 +481,19 @@ class SequenceDatabaseGUI(tk.Frame):
         )
         clear_button.pack(side=tk.RIGHT, padx=(0, 10))
 
+        # Busy indicator shown while a query runs in the background
+        self.busy_label = tk.Label(
+            search_container,
+            text="",
+            font=("Arial", 9, "italic"),
+            fg="#FFD54F",
+            bg="#305CDE"
+        )
+        self.busy_label.pack(side=tk.RIGHT, padx=(0, 10))
+
         self.results_gui.parent_container = self.main_view_container
         self.results_gui.search_entry = self.search_entry
+        self.results_gui.search_type = self.search_type
 
         # Show All button
         show_all_button = tk.Button(
@@ -409,6 +532,86 @@ class SequenceDatabaseGUI(tk.Frame):
         self.results_gui.results_container = tk.Frame(self.results_gui.results_frame_ref, bg="white")
         self.results_gui.results_container.pack(fill=tk.BOTH, expand=True)
 
+    def import_sequence_file(self):
+        """Bulk import a FASTA/GenBank file on the import worker"""
+        if not self.db:
+            messagebox.showerror("Error", "Database not available")
+            return
+        if self.import_cancel is not None:
+            messagebox.showwarning("Import Running", "Please wait for the current import to finish.")
+            return
+
+        file_path = filedialog.askopenfilename(
+            title="Select FASTA or GenBank File",
+            filetypes=[("Sequence files", "*.fasta *.fa *.fna *.faa *.fas *.gb *.gbk *.gbff *.gz"),
+                       ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        if sequence_import.detect_format(file_path) == 'genbank' and not sequence_import.BIOPYTHON_AVAILABLE:
+            messagebox.showerror("Error", "Importing GenBank files requires Biopython (pip install biopython).")
+            return
+
+        filename = os.path.basename(file_path)
+        # Reasons of the records skipped as duplicates (filled on the worker thread)
+        skipped = []
+        self.import_cancel = threading.Event()
+        self.import_status_label.config(text=f"Importing {filename}...")
+        self.import_cancel_button.pack(side=tk.LEFT, padx=(10, 0), before=self.import_status_label)
+
+        self.import_executor.submit(
+            sequence_import.import_file,
+            self.db,
+            file_path,
+            cancel_event=self.import_cancel,
+            on_duplicate=lambda record, reason: skipped.append(reason),
+            on_progress=self.show_import_progress,
+            on_done=lambda count: self.on_import_finished(count, filename, skipped),
+            on_error=self.on_import_failed
+        )
+
+    def show_import_progress(self, bytes_done, bytes_total, imported):
+        try:
+            self.import_status_label.config(
+                text=f"Importing... {bytes_done * 100 // max(bytes_total, 1)}% ({imported:,} sequences)")
+        except tk.TclError:
+            pass
+
+    def cancel_import(self):
+        """Stop the running import after its current batch"""
+        if self.import_cancel is not None:
+            self.import_cancel.set()
+            self.import_status_label.config(text="Cancelling import...")
+
+    def on_import_finished(self, count, filename, skipped):
+        """Handle the result of a background import_file call"""
+        cancelled = self.import_cancel.is_set()
+        self._end_import()
+        duplicates = ""
+        if skipped:
+            labels = [f"{skipped.count(reason):,} {label}" for reason, label in REASON_LABELS.items()
+                      if reason in skipped]
+            duplicates = f"\n\nSkipped {len(skipped):,} duplicate(s): {', '.join(labels)}."
+        if cancelled:
+            messagebox.showinfo("Import Cancelled",
+                                f"Import of {filename} was cancelled.\n\n{count:,} sequence(s) were imported."
+                                + duplicates)
+        else:
+            messagebox.showinfo("Import Complete", f"Imported {count:,} sequence(s) from {filename}." + duplicates)
+
+    def on_import_failed(self, error):
+        self._end_import()
+        messagebox.showerror("Error", f"Import failed:\n{str(error)}\n\n"
+                                      f"Batches committed before the error were kept.")
+
+    def _end_import(self):
+        self.import_cancel = None
+        try:
+            self.import_status_label.config(text="")
+            self.import_cancel_button.pack_forget()
+        except tk.TclError:
+            pass
+
     def show_sequence_detail(self, seq):
         """Show detailed view of a sequence"""
         self.hide_all_frames()
@@ -456,11 +659,8 @@ class SequenceDatabaseGUI(tk.Frame):
 
     def update_sequence(self, seq_id, entries):
         """Update sequence in database"""
-        success = self.form_gui.update_sequence_data(seq_id, entries)
-        if success and self.db:
-            updated_seq = self.db.get_sequence(seq_id)
-            if updated_seq:
-                self.navigate_to("detail", updated_seq)
+        self.form_gui.update_sequence_data(
+            seq_id, entries, on_updated=lambda updated_seq: self.navigate_to("detail", updated_seq))
 
     def delete_sequence_confirm(self, seq):
         """Confirm and delete sequence"""
@@ -472,11 +672,19 @@ class SequenceDatabaseGUI(tk.Frame):
         )
 
         if result and self.db:
-            if self.db.delete_sequence(seq['id']):
-                messagebox.showinfo("Success", "Sequence deleted successfully!")
-                self.navigate_to("main_view")
-            else:
-                messagebox.showerror("Error", "Failed to delete sequence.")
+            self.executor.submit(
+                self.db.delete_sequence, seq['id'],
+                on_done=self.on_sequence_deleted,
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to delete sequence: {str(e)}")
+            )
+
+    def on_sequence_deleted(self, success):
+        """Report the result of a background delete_sequence call"""
+        if success:
+            messagebox.showinfo("Success", "Sequence deleted successfully!")
+            self.navigate_to("main_view")
+        else:
+            messagebox.showerror("Error", "Failed to delete sequence.")
 
     def hide_all_frames(self):
         """Hide all frames"""
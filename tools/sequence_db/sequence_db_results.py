@@ -3,21 +3,64 @@
 Sequence Database Results GUI Module
 """
 
+import threading
 import tkinter as tk
 from tkinter import messagebox, filedialog
 
+from virtual_list import VirtualResultsList
+from query_executor import QueryExecutor
+import sequence_export
+
+
+# Number of results fetched and shown per page
+PAGE_SIZE = 200
+
+# Search-as-you-type: wait this long after the last keystroke, and only
+# search once the query has this many characters
+SEARCH_DEBOUNCE_MS = 250
+INCREMENTAL_MIN_CHARS = 2
+
 
 class SequenceResultsGUI:
-    def __init__(self, parent_container, db, navigate_to_callback):
+    def __init__(self, parent_container, db, navigate_to_callback, executor=None):
         """Initialize the results GUI component"""
         self.parent_container = parent_container
         self.db = db
         self.navigate_to = navigate_to_callback
 
+        # Database calls run on a worker thread so the window keeps repainting
+        self.executor = executor if executor else QueryExecutor(parent_container)
+
         self.search_entry = None
         self.results_label_ref = None
         self.results_frame_ref = None
         self.results_container = None
+        self.results_list = None
+
+        # Keyset paging state: page_cursors[i] is the after_id of page i
+        self.current_query = None
+        self.current_label = ""
+        self.total_results = None
+        self.page_cursors = [None]
+        self.page_index = 0
+        self.has_next_page = False
+
+        # Search-as-you-type: hits of the typed query, paged in memory
+        self.current_results = None
+        self.typed_query = ""
+        self.debounce_id = None
+
+        # "metadata" or "sequence" (StringVar set by the main view);
+        # current_ids holds the hits of a subsequence search for export
+        self.search_type = None
+        self.current_ids = None
+        # Similarity search: sequence id -> (jaccard, identity) of the hits
+        self.current_scores = None
+
+        # FASTA exports run on their own worker so browsing keeps working
+        self.export_executor = None
+        self.export_cancel = None
+        self.export_button = None
 
     def perform_search(self):
         """Perform search based on query"""
@@ -26,25 +69,215 @@ class SequenceResultsGUI:
             return
 
         query = self.search_entry.get().strip()
+        self.cancel_incremental_search(query)
 
         if not query:
             messagebox.showwarning("Empty Search", "Please enter a search term")
             return
 
-        if self.db:
-            results = self.db.search_sequences(query)
-            self.display_results(results, query)
+        if not self.db:
+            messagebox.showerror("Error", "Database not available")
+        elif self.is_sequence_search():
+            self.start_sequence_search(query)
         else:
+            self.start_listing(query, query)
+
+    def is_sequence_search(self):
+        return self.search_type is not None and self.search_type.get() == "sequence"
+
+    def start_sequence_search(self, pattern):
+        """Find the sequences containing pattern (k-mer index) and page through the hits"""
+        def on_done(results):
+            self.current_query = None
+            self.current_label = f"Sequence: {pattern}"
+            self.total_results = len(results)
+            self.current_results = results
+            self.current_ids = [seq.id for seq in results]
+            self.current_scores = None
+            self.show_page(0)
+
+        self.executor.submit(self.db.search_subsequence, pattern, on_done=on_done, key="listing")
+
+    def show_similar(self, seq):
+        """List the stored sequences most similar to seq (MinHash estimate)"""
+        if not self.db:
             messagebox.showerror("Error", "Database not available")
+            return
+        label = f"Similar to {self.format_sequence(seq)}"
+        self.executor.submit(
+            self.db.find_similar, seq['id'],
+            on_done=lambda hits: self.show_similar_results(hits, label),
+            key="listing"
+        )
+
+    def show_similar_results(self, hits, label):
+        """Page through find_similar() hits with their similarity scores"""
+        self.current_query = None
+        self.current_label = label
+        self.current_results = [hit[0] for hit in hits]
+        self.current_ids = [seq.id for seq in self.current_results]
+        self.current_scores = {seq.id: (jaccard, identity) for seq, jaccard, identity in hits}
+        self.total_results = len(hits)
+        self.show_page(0)
 
     def show_all_sequences(self):
         """Show all sequences"""
         if self.db:
-            results = self.db.get_all_sequences()
-            self.display_results(results, "All Sequences")
+            self.start_listing(None, "All Sequences")
         else:
             messagebox.showerror("Error", "Database not available")
 
+    def schedule_incremental_search(self):
+        """Restart the debounce timer when the search box text changed"""
+        query = self.search_entry.get().strip()
+        if query == self.typed_query or self.is_sequence_search():
+            return
+        self.cancel_incremental_search(query)
+        self.debounce_id = self.search_entry.after(SEARCH_DEBOUNCE_MS, self.run_incremental_search)
+
+    def cancel_incremental_search(self, query):
+        """Forget a pending keystroke search (Return/Search runs its own)"""
+        self.typed_query = query
+        if self.debounce_id:
+            self.search_entry.after_cancel(self.debounce_id)
+            self.debounce_id = None
+
+    def run_incremental_search(self):
+        """Search for the typed query, served from the result cache when possible"""
+        self.debounce_id = None
+        query = self.typed_query
+
+        if len(query) < INCREMENTAL_MIN_CHARS or not self.db:
+            # Drop the result of a search for text that is gone
+            self.executor.cancel("listing")
+            return
+
+        def on_done(results):
+            if results is None:
+                # Too many hits to keep in memory - page through them instead
+                self.start_listing(query, query)
+                return
+            self.current_query = query
+            self.current_label = query
+            self.total_results = len(results)
+            self.current_results = results
+            self.current_ids = None
+            self.current_scores = None
+            self.show_page(0)
+
+        self.executor.submit(self.db.quick_search_sequence_summaries, query, on_done=on_done, key="listing")
+
+    def start_listing(self, query, label):
+        """
+        Show the first page of a search (query=None lists everything)
+
+        Only the page being shown is fetched from the database, in the
+        background; a newer search supersedes one still running.
+        """
+        def load_first_page():
+            total = self.db.count_sequences(query)
+            return total, self.db.get_sequence_summary_page(query, None, PAGE_SIZE)
+
+        def on_done(result):
+            total, page = result
+            self.current_query = query
+            self.current_label = label
+            self.total_results = total
+            self.page_cursors = [None]
+            self.current_results = None
+            self.current_ids = None
+            self.current_scores = None
+            self.display_page(0, page)
+
+        self.executor.submit(load_first_page, on_done=on_done, key="listing")
+
+    def show_page(self, page_index):
+        """Fetch and display one page of the current listing"""
+        if self.current_results is not None:
+            start = page_index * PAGE_SIZE
+            self.page_index = page_index
+            self.has_next_page = start + PAGE_SIZE < len(self.current_results)
+            self.display_results(self.current_results[start:start + PAGE_SIZE], self.current_label)
+            return
+
+        self.executor.submit(
+            self.db.get_sequence_summary_page,
+            self.current_query, self.page_cursors[page_index], PAGE_SIZE,
+            on_done=lambda page: self.display_page(page_index, page),
+            key="listing"
+        )
+
+    def display_page(self, page_index, page):
+        """Display a fetched (results, next_after_id) page"""
+        results, next_after_id = page
+
+        self.page_index = page_index
+        self.has_next_page = next_after_id is not None
+        if self.has_next_page and len(self.page_cursors) == page_index + 1:
+            self.page_cursors.append(next_after_id)
+
+        self.display_results(results, self.current_label)
+
+    def create_pager(self):
+        """Previous/Next page buttons under the results"""
+        pager_frame = tk.Frame(self.results_container, bg="#305CDE")
+        pager_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+
+        if self.page_index > 0:
+            tk.Button(
+                pager_frame,
+                text="◀ Previous",
+                command=lambda: self.show_page(self.page_index - 1),
+                bg="#2196F3",
+                fg="white",
+                font=("Arial", 9, "bold"),
+                cursor="hand2",
+                relief=tk.FLAT,
+                bd=0,
+                padx=10,
+                pady=3
+            ).pack(side=tk.LEFT)
+
+        if self.has_next_page:
+            tk.Button(
+                pager_frame,
+                text="Next ▶",
+                command=lambda: self.show_page(self.page_index + 1),
+                bg="#2196F3",
+                fg="white",
+                font=("Arial", 9, "bold"),
+                cursor="hand2",
+                relief=tk.FLAT,
+                bd=0,
+                padx=10,
+                pady=3
+            ).pack(side=tk.RIGHT)
+
+    def load_full_record(self, seq, on_loaded):
+        """Pass the full sequence record of a listing summary to on_loaded (loaded in the background)"""
+        if isinstance(seq, dict):
+            on_loaded(seq)
+            return
+        if not self.db:
+            return
+
+        def on_done(full_seq):
+            if full_seq is None:
+                messagebox.showerror("Error", "Sequence not found. It may have been deleted.")
+            else:
+                on_loaded(full_seq)
+
+        self.executor.submit(
+            self.db.get_sequence, seq['id'],
+            on_done=on_done,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load sequence: {str(e)}"),
+            key="record"
+        )
+
+    def open_record(self, frame_name, seq):
+        """Navigate to the detail/edit view, loading the full record only now"""
+        self.load_full_record(seq, lambda full_seq: self.navigate_to(frame_name, full_seq))
+
     def format_sequence(self, seq):
         """Format sequence for display"""
         parts = []
@@ -84,9 +317,18 @@ class SequenceResultsGUI:
             )
             no_results_label.pack(anchor="w", fill=tk.X)
         else:
+            page_offset = self.page_index * PAGE_SIZE
+            total = self.total_results if self.total_results is not None else len(results)
+            header_text = f"Found {total} result(s) for '{query}'"
+            if total > len(results):
+                header_text += f" (showing {page_offset + 1}-{page_offset + len(results)})"
+
+            header_frame = tk.Frame(self.results_container, bg="#305CDE")
+            header_frame.pack(anchor="w", fill=tk.X)
+
             header_label = tk.Label(
-                self.results_container,
-                text=f"Found {len(results)} result(s) for '{query}':\n",
+                header_frame,
+                text=f"{header_text}:\n",
                 font=("Arial", 10, "bold"),
                 fg="white",
                 bg="#305CDE",
@@ -94,89 +336,56 @@ class SequenceResultsGUI:
                 pady=5,
                 anchor="w"
             )
-            header_label.pack(anchor="w", fill=tk.X)
+            header_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
-            for idx, seq in enumerate(results, 1):
-                formatted_text = self.format_sequence(seq)
+            self.export_button = tk.Button(
+                header_frame,
+                text="Cancel Export" if self.export_cancel else "💾 Export FASTA",
+                command=self.export_fasta,
+                bg="#4CAF50",
+                fg="white",
+                font=("Arial", 8, "bold"),
+                cursor="hand2",
+                relief=tk.FLAT,
+                bd=0,
+                padx=10,
+                pady=3
+            )
+            self.export_button.pack(side=tk.RIGHT, padx=10)
+
+            columns = [
+                ("number", "#", 50, False),
+                ("sequence", "Gene - Protein - Organism - Accession", 520, True),
+                ("pdf", "PDF", 50, False),
+            ]
+            scores = self.current_scores
+            if scores is not None:
+                columns.insert(2, ("similarity", "Jaccard / Identity", 130, False))
+
+            self.results_list = VirtualResultsList(
+                self.results_container,
+                columns=columns,
+                on_open=lambda s: self.open_record("detail", s),
+                actions=[
+                    ("📥 PDF", "#FF9800", self.download_pdf, lambda s: s.get('has_pdf')),
+                    ("≈ Similar", "#9C27B0", self.show_similar, None),
+                    ("Edit", "#2196F3", lambda s: self.open_record("edit", s), None),
+                    ("Delete", "#F44336", self.delete_with_confirm, None),
+                ]
+            )
+            self.results_list.pack(fill=tk.BOTH, expand=True, padx=10)
 
-                result_frame = tk.Frame(self.results_container, bg="#305CDE", pady=5)
-                result_frame.pack(anchor="w", fill=tk.X, padx=10)
+            def row_values(idx, seq):
+                values = [f"{page_offset + idx}.", self.format_sequence(seq), "📄" if seq.get('has_pdf') else ""]
+                if scores is not None:
+                    jaccard, identity = scores.get(seq.id, (0.0, 0.0))
+                    values.insert(2, f"{jaccard:.2f} / ~{identity:.0%}")
+                return tuple(values)
 
-                number_label = tk.Label(
-                    result_frame,
-                    text=f"{idx}.",
-                    font=("Arial", 9, "bold"),
-                    fg="white",
-                    bg="#305CDE"
-                )
-                number_label.pack(side=tk.LEFT, padx=(0, 5))
-
-                result_label = tk.Label(
-                    result_frame,
-                    text=formatted_text,
-                    font=("Arial", 9, "underline"),
-                    fg="#4CAF50",
-                    bg="#305CDE",
-                    cursor="hand2",
-                    wraplength=400
-                )
-                result_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
-                result_label.bind("<Button-1>", lambda e, s=seq: self.navigate_to("detail", s))
-                result_label.bind("<Enter>", lambda e, lbl=result_label: lbl.config(fg="#66BB6A"))
-                result_label.bind("<Leave>", lambda e, lbl=result_label: lbl.config(fg="#4CAF50"))
-
-                button_frame = tk.Frame(result_frame, bg="#305CDE")
-                button_frame.pack(side=tk.RIGHT, padx=(10, 0))
-
-                if seq.get('pdf_data') is not None:
-                    pdf_button = tk.Button(
-                        button_frame,
-                        text="📥 PDF",
-                        command=lambda s=seq: self.download_pdf(s),
-                        bg="#FF9800",
-                        fg="white",
-                        font=("Arial", 8, "bold"),
-                        cursor="hand2",
-                        relief=tk.FLAT,
-                        bd=0,
-                        padx=8,
-                        pady=2
-                    )
-                    pdf_button.pack(side=tk.LEFT, padx=(0, 5))
-
-                edit_button = tk.Button(
-                    button_frame,
-                    text="Edit",
-                    command=lambda s=seq: self.navigate_to("edit", s),
-                    bg="#2196F3",
-                    fg="white",
-                    font=("Arial", 8, "bold"),
-                    cursor="hand2",
-                    relief=tk.FLAT,
-                    bd=0,
-                    padx=10,
-                    pady=3
-                )
-                edit_button.pack(side=tk.LEFT, padx=(0, 5))
-
-                delete_button = tk.Button(
-                    button_frame,
-                    text="Delete",
-                    command=lambda s=seq: self.delete_with_confirm(s),
-                    bg="#F44336",
-                    fg="white",
-                    font=("Arial", 8, "bold"),
-                    cursor="hand2",
-                    relief=tk.FLAT,
-                    bd=0,
-                    padx=10,
-                    pady=3
-                )
-                delete_button.pack(side=tk.LEFT)
+            self.results_list.set_rows(results, row_values)
 
-                if idx < len(results):
-                    separator = tk.Frame(self.results_container, bg="#1E3A8A", height=1)
-                    separator.pack(fill=tk.X, padx=20, pady=3)
+            if self.page_index > 0 or self.has_next_page:
+                self.create_pager()
 
     def display_sequence_details(self, detail_container, seq, navigate_to_callback, delete_callback):
         """Display detailed view of a sequence"""
@@ -252,7 +461,7 @@ class SequenceResultsGUI:
         button_frame = tk.Frame(content_frame, bg="#305CDE")
         button_frame.pack(pady=30)
 
-        if seq.get('pdf_data') is not None:
+        if seq.get('pdf_document_id') is not None:
             pdf_button = tk.Button(
                 button_frame,
                 text="📥 Download PDF",
@@ -296,8 +505,73 @@ class SequenceResultsGUI:
             pady=10
         ).pack(side=tk.LEFT, padx=10)
 
+    def export_fasta(self):
+        """Export every sequence of the current result set (not just this page) to FASTA"""
+        if self.export_cancel is not None:
+            self.export_cancel.set()
+            return
+        if not self.db:
+            messagebox.showerror("Error", "Database not available")
+            return
+
+        query = self.current_query
+        sequence_ids = self.current_ids
+        save_path = filedialog.asksaveasfilename(
+            title="Export Sequences as FASTA",
+            defaultextension=".fasta",
+            filetypes=[("FASTA files", "*.fasta *.fa"), ("Gzipped FASTA", "*.fasta.gz *.fa.gz"),
+                       ("All files", "*.*")],
+            initialfile="sequences.fasta"
+        )
+        if not save_path:
+            return
+
+        if self.export_executor is None:
+            self.export_executor = QueryExecutor(self.parent_container)
+        self.export_cancel = threading.Event()
+        self.set_export_status("Cancel Export")
+
+        self.export_executor.submit(
+            sequence_export.export_fasta,
+            self.db,
+            save_path,
+            query=query,
+            sequence_ids=sequence_ids,
+            cancel_event=self.export_cancel,
+            on_progress=lambda written, total: self.set_export_status(
+                f"Cancel Export ({written * 100 // max(total, 1)}%)"),
+            on_done=lambda count: self.on_fasta_exported(count, save_path),
+            on_error=self.on_fasta_export_failed
+        )
+
+    def set_export_status(self, text):
+        try:
+            if self.export_button:
+                self.export_button.config(text=text)
+        except tk.TclError:
+            # Results were redrawn; the new button picks the state up
+            pass
+
+    def on_fasta_exported(self, count, save_path):
+        """Report the result of a background FASTA export"""
+        self.export_cancel = None
+        self.set_export_status("💾 Export FASTA")
+        if count is None:
+            messagebox.showinfo("Export Cancelled", "The FASTA export was cancelled.")
+        else:
+            messagebox.showinfo("Success", f"Exported {count:,} sequence(s)\nSaved to: {save_path}")
+
+    def on_fasta_export_failed(self, error):
+        self.export_cancel = None
+        self.set_export_status("💾 Export FASTA")
+        messagebox.showerror("Error", f"Failed to export FASTA:\n{str(error)}")
+
     def download_pdf(self, seq):
         """Download PDF file from database"""
+        self.load_full_record(seq, self.save_pdf_as)
+
+    def save_pdf_as(self, seq):
+        """Ask for a file name and export the PDF of a full record there"""
         if self.db:
             save_path = filedialog.asksaveasfilename(
                 title="Save PDF As",
@@ -307,14 +581,18 @@ class SequenceResultsGUI:
             )
 
             if save_path:
-                try:
-                    exported_path = self.db.export_pdf(seq['id'], save_path)
-                    if exported_path:
-                        messagebox.showinfo("Success", f"PDF downloaded successfully!\nSaved to: {exported_path}")
-                    else:
-                        messagebox.showerror("Error", "Failed to download PDF. File may not exist.")
-                except Exception as e:
-                    messagebox.showerror("Error", f"Failed to download PDF: {str(e)}")
+                self.executor.submit(
+                    self.db.export_pdf, seq['id'], save_path,
+                    on_done=self.on_pdf_exported,
+                    on_error=lambda e: messagebox.showerror("Error", f"Failed to download PDF: {str(e)}")
+                )
+
+    def on_pdf_exported(self, exported_path):
+        """Report the result of a background PDF export"""
+        if exported_path:
+            messagebox.showinfo("Success", f"PDF downloaded successfully!\nSaved to: {exported_path}")
+        else:
+            messagebox.showerror("Error", "Failed to download PDF. File may not exist.")
 
     def delete_with_confirm(self, seq):
         """Delete sequence with confirmation"""
@@ -326,8 +604,16 @@ class SequenceResultsGUI:
         )
 
         if result and self.db:
-            if self.db.delete_sequence(seq['id']):
-                messagebox.showinfo("Success", "Sequence deleted successfully!")
-                self.show_all_sequences()
-            else:
-                messagebox.showerror("Error", "Failed to delete sequence.")
\ No newline at end of file
+            self.executor.submit(
+                self.db.delete_sequence, seq['id'],
+                on_done=self.on_sequence_deleted,
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to delete sequence: {str(e)}")
+            )
+
+    def on_sequence_deleted(self, success):
+        """Report the result of a background delete_sequence call"""
+        if success:
+            messagebox.showinfo("Success", "Sequence deleted successfully!")
+            self.show_all_sequences()
+        else:
+            messagebox.showerror("Error", "Failed to delete sequence.")
\ No newline at end of file
@@ -0,0 +1,375 @@
+# sequence_dedup.py
+"""
+Sequence Deduplication Module
+Exact duplicate detection for the sequence database. Every row stores a
+hash of its normalized sequence (case and whitespace ignored, DNA/RNA
+taken in its canonical orientation), so an identical sequence or a
+repeated accession number is found with one index lookup when a record
+is submitted or imported. report_duplicates() lists the duplicate
+clusters already in a database, optionally with near-duplicates found
+through the MinHash LSH buckets.
+"""
+
+import sqlite3
+import hashlib
+
+from kmer_index import normalize_sequence
+from minhash import is_nucleotide, jaccard, unpack_sketch
+import storage_codec
+import nucleotide_pack  # registers the 2bit codec for decode_text
+
+
+# Treat a nucleotide sequence and its reverse complement as the same
+# sequence. Changing this requires re-hashing the table (--rehash).
+CANONICAL_NUCLEOTIDES = True
+
+# Duplicate reasons reported by find_duplicates()
+SAME_SEQUENCE = 'sequence'
+SAME_ACCESSION = 'accession'
+REASON_LABELS = {SAME_SEQUENCE: "identical sequence", SAME_ACCESSION: "same accession number"}
+
+# Whitespace ignored around accession numbers, in Python and in SQL (the
+# expression must match the one of idx_seq_accession_trim to use it)
+ACCESSION_WHITESPACE = " \t\r\n"
+ACCESSION_KEY = "trim(accession_number, char(32, 9, 13, 10))"
+
+# Rows hashed per transaction by rehash_sequences()
+REHASH_BATCH_SIZE = 2000
+
+# Sketch Jaccard above which two sequences count as near-duplicates
+# (about 99.5% nucleotide identity at k=16)
+NEAR_DUPLICATE_JACCARD = 0.9
+
+# LSH buckets with more members are skipped by the near-duplicate scan
+# (low-complexity sequences that would need quadratic comparisons)
+MAX_BUCKET_SIZE = 200
+
+# IUPAC complement; U pairs like T, ambiguity codes map to their complements
+_COMPLEMENT = bytes.maketrans(b"ACGTURYKMBVDHSWN", b"TGCAAYRMKVBHDSWN")
+
+
+class DuplicateSequenceError(ValueError):
+    """Raised when a submitted sequence duplicates stored records"""
+
+    def __init__(self, duplicates):
+        described = ", ".join(f"#{summary['id']} ({' and '.join(REASON_LABELS[r] for r in reasons)})"
+                              for summary, reasons in duplicates)
+        super().__init__(f"Duplicate of {len(duplicates)} stored sequence(s): {described}")
+        self.duplicates = duplicates
+
+
+def reverse_complement(sequence):
+    """Reverse complement of a normalized nucleotide sequence"""
+    return sequence.encode('utf-8').translate(_COMPLEMENT)[::-1].decode('utf-8')
+
+
+def canonical_sequence(sequence, canonical_nucleotides=CANONICAL_NUCLEOTIDES):
+    """
+    Normalized form used for duplicate detection, as UTF-8 bytes
+
+    Uppercase without whitespace; a nucleotide sequence is replaced by its
+    reverse complement when that sorts first, so both strands hash alike.
+    """
+    sequence = normalize_sequence(sequence)
+    data = sequence.encode('utf-8')
+    if canonical_nucleotides and is_nucleotide(sequence):
+        return min(data, data.translate(_COMPLEMENT)[::-1])
+    return data
+
+
+def sequence_hash(sequence):
+    """128-bit BLAKE2b digest (bytes) of the canonical sequence, None for no sequence"""
+    data = canonical_sequence(sequence)
+    if not data:
+        return None
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def normalize_accession(accession_number):
+    """Accession as compared for duplicates (stripped; None if empty)"""
+    return (accession_number.strip(ACCESSION_WHITESPACE) or None) if accession_number else None
+
+
+def init_schema(cursor, table="sequences"):
+    """
+    Add the sequence_hash column and the duplicate lookup indexes
+
+    Accessions are compared case-insensitively and without surrounding
+    whitespace, on both the stored and the submitted side. The indexes are not
+    UNIQUE: existing databases may already hold duplicates, and a
+    submitter can still decide to keep one.
+
+    Returns:
+        bool: True if the column was just added (rows need rehash_sequences)
+    """
+    cursor.execute(f"PRAGMA table_info({table})")
+    added = 'sequence_hash' not in [column[1] for column in cursor.fetchall()]
+    if added:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN sequence_hash BLOB')
+
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_seq_hash ON {table}(sequence_hash)')
+    # Replaced by the index on the trimmed accession
+    cursor.execute('DROP INDEX IF EXISTS idx_seq_accession')
+    cursor.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_seq_accession_trim
+        ON {table}({ACCESSION_KEY} COLLATE NOCASE)
+    ''')
+    return added
+
+
+def rehash_sequences(conn, table="sequences", only_missing=True, batch_size=REHASH_BATCH_SIZE):
+    """
+    Compute sequence_hash for stored rows, one transaction per batch
+
+    Args:
+        conn: Database connection
+        only_missing (bool): Only rows without a hash (False = every row,
+                             e.g. after changing CANONICAL_NUCLEOTIDES)
+
+    Returns:
+        int: Number of rows hashed
+    """
+    cursor = conn.cursor()
+    missing = "AND sequence_hash IS NULL" if only_missing else ""
+    hashed = 0
+    after_id = 0
+    while True:
+        cursor.execute(f'''
+            SELECT id, sequence, sequence_codec FROM {table}
+            WHERE id > ? AND sequence IS NOT NULL {missing}
+            ORDER BY id LIMIT ?
+        ''', (after_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            return hashed
+        try:
+            cursor.executemany(f'UPDATE {table} SET sequence_hash = ? WHERE id = ?',
+                               [(sequence_hash(storage_codec.decode_text(codec, stored)), seq_id)
+                                for seq_id, stored, codec in rows])
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        hashed += len(rows)
+        after_id = rows[-1][0]
+
+
+def find_duplicates(cursor, hash_value, accession_number, exclude_id=None, table="sequences"):
+    """
+    Stored rows with the same sequence hash or accession (two index lookups)
+
+    Returns:
+        dict: id -> list of reasons (SAME_SEQUENCE, SAME_ACCESSION), by id
+    """
+    # NULL matches nothing, so a missing hash or accession needs no branch
+    cursor.execute(f'''
+        SELECT id, ? FROM {table} WHERE sequence_hash = ?
+        UNION ALL
+        SELECT id, ? FROM {table} WHERE {ACCESSION_KEY} = ? COLLATE NOCASE
+    ''', (SAME_SEQUENCE, hash_value, SAME_ACCESSION, normalize_accession(accession_number)))
+    duplicates = {}
+    for seq_id, reason in cursor.fetchall():
+        if seq_id != exclude_id:
+            duplicates.setdefault(seq_id, []).append(reason)
+    return dict(sorted(duplicates.items()))
+
+
+def stored_keys(cursor, hashes, accessions, table="sequences", chunk_size=500):
+    """
+    Which of the given sequence hashes and accessions are already stored
+
+    Looks them up chunk_size at a time with IN queries on the indexes,
+    which is much cheaper than one query per record during an import.
+
+    Args:
+        hashes: Sequence hashes
+        accessions: Stripped, lowercased accession numbers
+
+    Returns:
+        tuple: (set of stored hashes, set of stored lowercased accessions)
+    """
+    stored_hashes = set()
+    stored_accessions = set()
+    for values, stored, sql in (
+        (list(hashes), stored_hashes,
+         f'SELECT sequence_hash FROM {table} WHERE sequence_hash IN ({{}})'),
+        (list(accessions), stored_accessions,
+         f'SELECT lower({ACCESSION_KEY}) FROM {table} WHERE {ACCESSION_KEY} COLLATE NOCASE IN ({{}})'),
+    ):
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start:start + chunk_size]
+            cursor.execute(sql.format(", ".join("?" * len(chunk))), chunk)
+            stored.update(row[0] for row in cursor.fetchall())
+    return stored_hashes, stored_accessions
+
+
+def exact_clusters(cursor, table="sequences"):
+    """
+    Groups of stored rows that duplicate each other
+
+    Returns:
+        tuple: (lists of ids sharing a sequence hash,
+                lists of ids sharing an accession number), largest cluster first
+    """
+    cursor.execute(f'''
+        SELECT group_concat(id) FROM {table}
+        WHERE sequence_hash IS NOT NULL
+        GROUP BY sequence_hash HAVING COUNT(*) > 1
+    ''')
+    by_sequence = _sorted_clusters(cursor.fetchall())
+    cursor.execute(f'''
+        SELECT group_concat(id) FROM {table}
+        WHERE {ACCESSION_KEY} != ''
+        GROUP BY {ACCESSION_KEY} COLLATE NOCASE HAVING COUNT(*) > 1
+    ''')
+    by_accession = _sorted_clusters(cursor.fetchall())
+    return by_sequence, by_accession
+
+
+def _sorted_clusters(rows):
+    """group_concat(id) rows -> id lists, largest cluster first"""
+    clusters = [sorted(map(int, row[0].split(','))) for row in rows]
+    return sorted(clusters, key=lambda ids: (-len(ids), ids[0]))
+
+
+def near_duplicate_clusters(cursor, min_jaccard=NEAR_DUPLICATE_JACCARD, sketch_table="sequence_sketches",
+                            max_bucket_size=MAX_BUCKET_SIZE):
+    """
+    Groups of sequences whose MinHash sketches are nearly identical
+
+    Members of every LSH bucket are compared pairwise and linked when their
+    estimated Jaccard similarity reaches min_jaccard; linked sequences form
+    a cluster (union-find). Sequences not sketched yet are not considered,
+    and sketches are strand-specific.
+
+    Returns:
+        list: Lists of ids, largest cluster first
+    """
+    cursor.execute(f'SELECT sequence_id, k, sketch FROM {sketch_table}')
+    sketches = {row[0]: (row[1], unpack_sketch(row[2])) for row in cursor.fetchall()}
+
+    parent = {}
+
+    def find(seq_id):
+        root = parent.setdefault(seq_id, seq_id)
+        while parent[root] != root:
+            root = parent[root]
+        while parent[seq_id] != root:
+            parent[seq_id], seq_id = root, parent[seq_id]
+        return root
+
+    def scan_bucket(members):
+        if len(members) < 2 or len(members) > max_bucket_size:
+            return
+        for i, a in enumerate(members):
+            k_a, sketch_a = sketches[a]
+            for b in members[i + 1:]:
+                if find(a) == find(b):
+                    continue
+                k_b, sketch_b = sketches[b]
+                if k_a == k_b and jaccard(sketch_a, sketch_b) >= min_jaccard:
+                    parent[find(b)] = find(a)
+
+    cursor.execute(f'SELECT band_key, sequence_id FROM {sketch_table}_lsh ORDER BY band_key')
+    bucket_key = None
+    members = []
+    for band_key, seq_id in cursor:
+        if band_key != bucket_key:
+            scan_bucket(members)
+            bucket_key, members = band_key, []
+        if seq_id in sketches:
+            members.append(seq_id)
+    scan_bucket(members)
+
+    clusters = {}
+    for seq_id in parent:
+        clusters.setdefault(find(seq_id), []).append(seq_id)
+    return sorted((sorted(ids) for ids in clusters.values() if len(ids) > 1),
+                  key=lambda ids: (-len(ids), ids[0]))
+
+
+def report_duplicates(db_path, rehash=False, near=None, show=20):
+    """
+    Offline job: print the duplicate clusters of a sequence database
+
+    Run it while the application is closed. Rows without a hash (stored
+    before hashing existed) are hashed first.
+
+    Args:
+        db_path (str): Path to sequences.db
+        rehash (bool): Recompute every stored hash, not only missing ones
+        near (float): Also report near-duplicates at this sketch Jaccard
+                      similarity (None = exact duplicates only)
+        show (int): Clusters printed per kind
+
+    Returns:
+        dict: 'sequence', 'accession' and 'near' lists of id clusters
+    """
+    from db_connection import ConnectionManager
+
+    connections = ConnectionManager.for_path(db_path)
+    conn = connections.get_connection()
+    try:
+        cursor = conn.cursor()
+        init_schema(cursor)
+        conn.commit()
+        hashed = rehash_sequences(conn, only_missing=not rehash)
+        if hashed:
+            print(f"✓ Hashed {hashed} sequence(s)")
+
+        by_sequence, by_accession = exact_clusters(cursor)
+        clusters = {'sequence': by_sequence, 'accession': by_accession, 'near': []}
+        if near is not None:
+            # Near-duplicate clusters that are exact copies are already listed
+            exact_ids = {seq_id: i for i, ids in enumerate(by_sequence) for seq_id in ids}
+            clusters['near'] = [ids for ids in near_duplicate_clusters(cursor, near)
+                                if len({exact_ids.get(seq_id, -seq_id) for seq_id in ids}) > 1]
+
+        titles = {'sequence': "identical sequences", 'accession': "repeated accession numbers",
+                  'near': f"near-duplicates (Jaccard >= {near})"}
+        for kind, found in clusters.items():
+            if kind == 'near' and near is None:
+                continue
+            print(f"✓ {len(found)} cluster(s) of {titles[kind]} "
+                  f"({sum(len(ids) for ids in found)} sequences)")
+            for ids in found[:show]:
+                print("    " + ", ".join(_describe(cursor, ids)))
+            if len(found) > show:
+                print(f"    ... {len(found) - show} more")
+        return clusters
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        connections.close_all()
+
+
+def _describe(cursor, ids):
+    """'#id accession' labels of the rows of one cluster"""
+    cursor.execute(f'''
+        SELECT id, accession_number, gene_name FROM sequences
+        WHERE id IN ({", ".join("?" * len(ids))}) ORDER BY id
+    ''', ids)
+    return [f"#{seq_id} {accession or gene or ''}".rstrip() for seq_id, accession, gene in cursor.fetchall()]
+
+
+if __name__ == "__main__":
+    import os
+    import time
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Report duplicate sequences and accession numbers")
+    parser.add_argument("database", help="Path to sequences.db")
+    parser.add_argument("--rehash", action="store_true",
+                        help="Recompute every sequence hash (e.g. after changing CANONICAL_NUCLEOTIDES)")
+    parser.add_argument("--near", type=float, nargs="?", const=NEAR_DUPLICATE_JACCARD,
+                        help=f"Also report near-duplicates (sketch Jaccard, default {NEAR_DUPLICATE_JACCARD})")
+    parser.add_argument("--show", type=int, default=20, help="Clusters listed per kind")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        parser.error(f"{args.database} does not exist")
+
+    start = time.perf_counter()
+    report_duplicates(args.database, rehash=args.rehash, near=args.near, show=args.show)
+    print(f"  ({time.perf_counter() - start:.1f} s)")
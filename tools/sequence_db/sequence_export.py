@@ -0,0 +1,138 @@
+# sequence_export.py
+"""
+Sequence Export Module
+Streams sequences (a search result set or the whole table) to a FASTA file,
+optionally gzip-compressed. Records are written one at a time while the
+database is paged through, and long sequences a block of lines at a time,
+so memory use grows with neither the export nor the record size.
+"""
+
+import os
+import gzip
+
+
+# Residues per FASTA sequence line
+FASTA_LINE_WIDTH = 60
+
+# Sequence lines joined per write() call
+WRITE_BLOCK_LINES = 1024
+
+
+def fasta_header(seq_id, accession_number, gene_name, protein_name, organism_name):
+    """
+    FASTA header line (without '>') for a sequence record
+
+    UniProt style ("ACC protein OS=organism GN=gene"), which
+    sequence_import.parse_fasta_header reads back into the same columns.
+    """
+    parts = [accession_number or f"sequence_{seq_id}"]
+    if protein_name:
+        parts.append(protein_name)
+    if organism_name:
+        parts.append(f"OS={organism_name}")
+    if gene_name:
+        parts.append(f"GN={gene_name}")
+    # Headers are a single line
+    return " ".join(" ".join(str(part).split()) for part in parts)
+
+
+def write_fasta_record(file, header, sequence, line_width=FASTA_LINE_WIDTH):
+    """
+    Write one FASTA entry: header line plus line-wrapped sequence
+
+    The wrapped lines are written WRITE_BLOCK_LINES at a time, so only a
+    block of the output is held in memory next to the sequence itself.
+    """
+    residues = sequence or ""
+    # Stored sequences are normally whitespace-free; copy only when needed
+    if not residues.isalpha():
+        residues = "".join(residues.split())
+    file.write(f">{header}\n")
+    block = line_width * WRITE_BLOCK_LINES
+    for start in range(0, len(residues), block):
+        end = min(start + block, len(residues))
+        file.write("\n".join(residues[i:i + line_width] for i in range(start, end, line_width)))
+        file.write("\n")
+
+
+def export_fasta(db, path, query=None, compress=None, progress=None, cancel_event=None,
+                 line_width=FASTA_LINE_WIDTH, sequence_ids=None):
+    """
+    Write the sequences matching query (all sequences if None) to a FASTA file
+
+    The file is written under a temporary name and renamed when complete,
+    so a cancelled or failed export never leaves a truncated file behind.
+
+    Args:
+        db (SequenceDatabase): Source database
+        path (str): Output file
+        query (str): Search text as used by the results screen, or None
+        compress (bool): gzip the output, default: path ends with .gz
+        progress: Optional callback(sequences_written, sequences_total)
+        cancel_event: Optional threading.Event to stop the export
+        line_width (int): Residues per sequence line
+        sequence_ids (list): Export these sequences instead of a query
+
+    Returns:
+        int: Number of sequences written, or None if the export was cancelled
+    """
+    if compress is None:
+        compress = path.lower().endswith('.gz')
+    if sequence_ids is not None:
+        total = len(sequence_ids)
+    else:
+        total = db.count_sequences(query) if progress else None
+    temp_path = f"{path}.part"
+
+    opener = gzip.open if compress else open
+    written = 0
+    try:
+        with opener(temp_path, 'wt', encoding='utf-8', newline='\n') as file:
+            for seq_id, accession, gene, protein, organism, sequence in db.iter_fasta_rows(query, sequence_ids=sequence_ids):
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                header = fasta_header(seq_id, accession, gene, protein, organism)
+                write_fasta_record(file, header, sequence, line_width)
+                written += 1
+                if progress and written % 1000 == 0:
+                    progress(written, total)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    if cancel_event is not None and cancel_event.is_set():
+        os.remove(temp_path)
+        print(f"Export to {path} cancelled")
+        return None
+
+    os.replace(temp_path, path)
+    if progress:
+        progress(written, total)
+    print(f"✓ Exported {written} sequence(s) to {path}")
+    return written
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    import argparse
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from sequence_db import SequenceDatabase
+
+    parser = argparse.ArgumentParser(description="Export sequences to a FASTA file")
+    parser.add_argument("output", help="Output file (gzip-compressed if it ends with .gz)")
+    parser.add_argument("--database", default="sequences.db", help="Path to sequences.db")
+    parser.add_argument("--query", help="Only export sequences matching this search")
+    parser.add_argument("--gzip", action="store_true", help="Compress the output even without .gz")
+    parser.add_argument("--width", type=int, default=FASTA_LINE_WIDTH, help="Residues per line")
+    args = parser.parse_args()
+
+    database = SequenceDatabase(args.database)
+    start = time.perf_counter()
+    count = export_fasta(database, args.output, query=args.query,
+                         compress=True if args.gzip else None, line_width=args.width)
+    elapsed = time.perf_counter() - start
+    print(f"  {count / max(elapsed, 1e-9):,.0f} records/s ({elapsed:.1f} s)")
+    database.close()
@@ -0,0 +1,234 @@
+# sequence_import.py
+"""
+Sequence Import Module
+Streams multi-record FASTA (and GenBank, when Biopython is installed) files
+into SequenceDatabase.import_sequences. Files are read line by line, so
+their size is not limited by memory; .gz files are decompressed on the fly.
+"""
+
+import io
+import os
+import re
+import gzip
+
+try:
+    from Bio import SeqIO
+    BIOPYTHON_AVAILABLE = True
+except ImportError:
+    BIOPYTHON_AVAILABLE = False
+
+
+GENBANK_EXTENSIONS = ('.gb', '.gbk', '.gbff', '.genbank')
+
+# Header annotations: UniProt "OS=Homo sapiens OX=9606 GN=TP53 PE=1 SV=4"
+# and NCBI protein "... [Homo sapiens]"
+_UNIPROT_FIELD_RE = re.compile(r"\b(OS|OX|GN|PE|SV)=")
+_NCBI_ORGANISM_RE = re.compile(r"\s*\[([^\[\]]+)\]\s*$")
+
+
+def detect_format(path):
+    """'genbank' for GenBank file extensions (optionally .gz), 'fasta' otherwise"""
+    name = path.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    return 'genbank' if name.endswith(GENBANK_EXTENSIONS) else 'fasta'
+
+
+def open_input(path):
+    """
+    Open a sequence file for binary line reading
+
+    Returns:
+        tuple: (raw file, stream) - raw.tell() is the progress in bytes of
+               the file on disk, also for gzip-compressed files
+    """
+    raw = open(path, 'rb')
+    if path.lower().endswith('.gz'):
+        return raw, gzip.GzipFile(fileobj=raw)
+    return raw, raw
+
+
+def parse_fasta_header(header):
+    """
+    Split a FASTA header line (without '>') into sequence record fields
+
+    The first word is the accession; UniProt OS=/GN= fields and a trailing
+    NCBI [organism] fill organism and gene; the rest of the description
+    becomes the protein name.
+    """
+    accession, _, description = header.strip().partition(" ")
+    record = {'accession_number': accession or None}
+
+    match = _UNIPROT_FIELD_RE.search(description)
+    if match:
+        fields = {}
+        parts = _UNIPROT_FIELD_RE.split(description[match.start():])
+        for key, value in zip(parts[1::2], parts[2::2]):
+            fields[key] = value.strip()
+        description = description[:match.start()]
+        record['organism_name'] = fields.get('OS')
+        record['gene_name'] = fields.get('GN')
+    else:
+        organism = _NCBI_ORGANISM_RE.search(description)
+        if organism:
+            record['organism_name'] = organism.group(1)
+            description = description[:organism.start()]
+
+    record['protein_name'] = description.strip() or None
+    return record
+
+
+def iter_fasta(stream):
+    """
+    Yield one record dict per FASTA entry of a binary stream
+
+    Sequence lines are joined without whitespace; a header without sequence
+    lines yields a record with sequence None.
+    """
+    header = None
+    parts = []
+    for line in stream:
+        if line.startswith(b'>'):
+            if header is not None:
+                yield _fasta_record(header, parts)
+            header = line[1:]
+            parts = []
+        elif header is not None:
+            parts.append(line)
+    if header is not None:
+        yield _fasta_record(header, parts)
+
+
+def _fasta_record(header, parts):
+    record = parse_fasta_header(header.decode('utf-8', errors='replace'))
+    sequence = b"".join(b"".join(parts).split())
+    record['sequence'] = sequence.decode('ascii', errors='replace') if sequence else None
+    return record
+
+
+def iter_genbank(stream):
+    """Yield one record dict per GenBank entry (requires Biopython)"""
+    if not BIOPYTHON_AVAILABLE:
+        raise RuntimeError("Biopython is required to import GenBank files (pip install biopython)")
+
+    text = io.TextIOWrapper(stream, encoding='utf-8', errors='replace')
+    for entry in SeqIO.parse(text, 'genbank'):
+        gene_name = protein_name = None
+        for feature in entry.features:
+            if feature.type in ('gene', 'CDS'):
+                qualifiers = feature.qualifiers
+                gene_name = gene_name or (qualifiers.get('gene') or [None])[0]
+                protein_name = protein_name or (qualifiers.get('product') or [None])[0]
+        yield {
+            'accession_number': entry.id,
+            'gene_name': gene_name,
+            'protein_name': protein_name or entry.description or None,
+            'organism_name': entry.annotations.get('organism'),
+            'sequence': str(entry.seq) or None,
+        }
+
+
+def import_file(db, path, file_format=None, progress=None, cancel_event=None,
+                skip_duplicates=True, on_duplicate=None, **defaults):
+    """
+    Import every record of a FASTA/GenBank file into a SequenceDatabase
+
+    Args:
+        db (SequenceDatabase): Target database
+        path (str): Input file (.gz allowed)
+        file_format (str): 'fasta' or 'genbank', default: from the extension
+        progress: Optional callback(bytes_done, bytes_total, records_imported)
+        cancel_event: Optional threading.Event to stop between batches
+        skip_duplicates (bool): Leave out records whose sequence or accession
+                                is already stored (see import_sequences)
+        on_duplicate: Optional callback(record, reason) per skipped record
+        **defaults: Values for columns the file does not provide
+                    (e.g. user_name, user_affiliation)
+
+    Returns:
+        int: Number of sequences imported
+    """
+    file_format = file_format or detect_format(path)
+    total = os.path.getsize(path)
+
+    raw, stream = open_input(path)
+    with raw, stream:
+        records = iter_genbank(stream) if file_format == 'genbank' else iter_fasta(stream)
+        if defaults:
+            records = (dict(defaults, **{k: v for k, v in record.items() if v is not None})
+                       for record in records)
+
+        on_batch = None
+        if progress:
+            on_batch = lambda imported: progress(raw.tell(), total, imported)
+
+        skipped = 0
+
+        def count_duplicate(record, reason):
+            nonlocal skipped
+            skipped += 1
+            if on_duplicate:
+                on_duplicate(record, reason)
+
+        imported = db.import_sequences(records, on_batch=on_batch, cancel_event=cancel_event,
+                                       skip_duplicates=skip_duplicates, on_duplicate=count_duplicate)
+
+    if progress:
+        progress(total, total, imported)
+    print(f"✓ Imported {imported} sequence(s) from {os.path.basename(path)}")
+    if skipped:
+        print(f"  Skipped {skipped} duplicate(s)")
+    return imported
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    import argparse
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from sequence_db import SequenceDatabase
+    from kmer_index import MAX_SEGMENTS
+
+    parser = argparse.ArgumentParser(description="Bulk import FASTA/GenBank files into a sequence database")
+    parser.add_argument("files", nargs="+", help="FASTA or GenBank files (.gz allowed)")
+    parser.add_argument("--database", default="sequences.db", help="Path to sequences.db")
+    parser.add_argument("--format", choices=("fasta", "genbank"), help="Input format (default: by extension)")
+    parser.add_argument("--user", help="user_name stored with every imported sequence")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="Also import records whose sequence or accession is already stored")
+    args = parser.parse_args()
+
+    database = SequenceDatabase(args.database)
+    for path in args.files:
+        start = time.perf_counter()
+        count = import_file(database, path, file_format=args.format,
+                            skip_duplicates=not args.keep_duplicates,
+                            **({'user_name': args.user} if args.user else {}))
+        elapsed = time.perf_counter() - start
+        print(f"  {count / max(elapsed, 1e-9):,.0f} records/s ({elapsed:.1f} s)")
+
+    # Index the imported sequences now instead of on the next GUI start
+    start = time.perf_counter()
+    indexed = segments = 0
+    while True:
+        count = database.index_pending_kmers()
+        if not count:
+            break
+        indexed += count
+        segments += 1
+    if indexed:
+        print(f"✓ K-mer index updated for {indexed} sequence(s) ({time.perf_counter() - start:.1f} s)")
+    if segments >= MAX_SEGMENTS:
+        database.optimize_kmer_index()
+
+    start = time.perf_counter()
+    sketched = 0
+    while True:
+        count = database.index_pending_sketches()
+        if not count:
+            break
+        sketched += count
+    if sketched:
+        print(f"✓ Similarity sketches computed for {sketched} sequence(s) ({time.perf_counter() - start:.1f} s)")
+    database.close()
@@ -0,0 +1,162 @@
+# virtual_list.py
+"""
+Virtual Results List Module
+Treeview-based result list shared by the database results screens.
+Rows are Treeview items instead of a Frame/Label/Button set per result, so
+Tk only draws the rows that are visible and thousands of hits stay cheap.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+
+class VirtualResultsList(tk.Frame):
+    """
+    Scrollable result list with a shared action bar.
+
+    Double-click or Return opens the selected record; the action buttons
+    (e.g. PDF, Edit, Delete) act on the selected row and are disabled when
+    they do not apply to it.
+    """
+
+    STYLE = "Results.Treeview"
+
+    def __init__(self, parent, columns, on_open, actions=(), height=15):
+        """
+        Initialize the result list
+
+        Args:
+            parent: Parent widget
+            columns: List of (key, heading, width, stretch) tuples
+            on_open: Callback(record) for double-click / Return
+            actions: List of (text, color, callback(record), enabled(record) or None)
+            height (int): Number of visible rows
+        """
+        super().__init__(parent, bg="#305CDE")
+        self.on_open = on_open
+        self.records = {}
+        self._action_buttons = []
+
+        self._setup_style()
+
+        tree_frame = tk.Frame(self, bg="#305CDE")
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.tree = ttk.Treeview(
+            tree_frame,
+            columns=[column[0] for column in columns],
+            show="headings",
+            selectmode="browse",
+            height=height,
+            style=self.STYLE
+        )
+        for key, heading, width, stretch in columns:
+            self.tree.heading(key, text=heading, anchor="w")
+            self.tree.column(key, width=width, stretch=stretch, anchor="w")
+
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview,
+                                  style="Vertical.TScrollbar")
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree.bind("<Double-1>", self._on_double_click)
+        self.tree.bind("<Return>", lambda e: self._open_selected())
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self._update_action_state())
+
+        if actions:
+            button_frame = tk.Frame(self, bg="#305CDE")
+            button_frame.pack(fill=tk.X, pady=(5, 0))
+
+            tk.Button(
+                button_frame,
+                text="Open",
+                command=self._open_selected,
+                bg="#4CAF50",
+                fg="white",
+                font=("Arial", 8, "bold"),
+                cursor="hand2",
+                relief=tk.FLAT,
+                bd=0,
+                padx=10,
+                pady=3
+            ).pack(side=tk.LEFT, padx=(0, 5))
+
+            for text, color, callback, enabled in actions:
+                button = tk.Button(
+                    button_frame,
+                    text=text,
+                    command=lambda cb=callback: self._run_action(cb),
+                    bg=color,
+                    fg="white",
+                    font=("Arial", 8, "bold"),
+                    cursor="hand2",
+                    relief=tk.FLAT,
+                    bd=0,
+                    padx=10,
+                    pady=3,
+                    state=tk.DISABLED
+                )
+                button.pack(side=tk.LEFT, padx=(0, 5))
+                self._action_buttons.append((button, enabled))
+
+    def _setup_style(self):
+        """Blue theme matching the database screens"""
+        style = ttk.Style()
+        style.configure(self.STYLE,
+                        background="#305CDE",
+                        fieldbackground="#305CDE",
+                        foreground="white",
+                        rowheight=24,
+                        font=("Arial", 9))
+        style.configure(f"{self.STYLE}.Heading",
+                        background="#1E40AF",
+                        foreground="white",
+                        font=("Arial", 9, "bold"))
+        style.map(self.STYLE,
+                  background=[('selected', '#4CAF50')],
+                  foreground=[('selected', 'white')])
+
+    def set_rows(self, records, row_values):
+        """
+        Replace the list content
+
+        Args:
+            records: Sequence of records (kept and passed back to callbacks)
+            row_values: Function(position, record) -> tuple of column values
+        """
+        self.tree.delete(*self.tree.get_children())
+        self.records = {}
+        for position, record in enumerate(records, 1):
+            iid = str(position)
+            self.records[iid] = record
+            self.tree.insert("", tk.END, iid=iid, values=row_values(position, record))
+        self._update_action_state()
+
+    def selected_record(self):
+        """Return the selected record or None"""
+        selection = self.tree.selection()
+        return self.records.get(selection[0]) if selection else None
+
+    def _on_double_click(self, event):
+        """Open the row under the mouse (ignore clicks on the heading)"""
+        if self.tree.identify_row(event.y):
+            self._open_selected()
+
+    def _open_selected(self):
+        record = self.selected_record()
+        if record is not None:
+            self.on_open(record)
+
+    def _run_action(self, callback):
+        record = self.selected_record()
+        if record is not None:
+            callback(record)
+
+    def _update_action_state(self):
+        """Enable only the actions that apply to the selected row"""
+        record = self.selected_record()
+        for button, enabled in self._action_buttons:
+            usable = record is not None and (enabled is None or enabled(record))
+            button.config(state=tk.NORMAL if usable else tk.DISABLED)